@@ -1,5 +1,6 @@
 from __future__ import annotations
 
 from pytherm.cpp import (
-    ActivityModel
-)
\ No newline at end of file
+    ActivityModel,
+    ActivityModel64,
+)
@@ -2,6 +2,7 @@ from math import exp, sqrt
 import numpy as np
 from ..stoichiometry import get_charge_dict
 from .db import pitzer as datasets
+from .electrolytes import get_harvie_j
 
 
 class Pitzer:
@@ -252,87 +253,20 @@ class Pitzer:
         return gibbs
 
     def get_harvie_j(self, x):
-        """Calculate J using Chebyshev polynomial approximations
+        """Calculate J using Chebyshev polynomial approximations,
+        see :func:`.electrolytes.get_harvie_j`
 
         Parameters
         ----------
-        x : _type_
-            _description_
+        x : float | np.ndarray
+            :math:`x_{ij} = 6 z_i z_j A_\\phi \\sqrt{I}`
 
         Returns
         -------
-        _type_
-            _description_
+        tuple
+            J(x) and J'(x)
         """
-        akI = (
-            -0.000000000010991,
-            -0.000000000002563,
-            0.000000000001943,
-            0.000000000046333,
-            -0.000000000050847,
-            -0.000000000821969,
-            0.000000001229405,
-            0.000000013522610,
-            -0.000000025267769,
-            -0.000000202099617,
-            0.000000396566462,
-            0.000002937706971,
-            -0.000004537895710,
-            -0.000045036975204,
-            0.000036583601823,
-            0.000636874599598,
-            0.000388260636404,
-            -0.007299499690937,
-            -0.029779077456514,
-            -0.060076477753119,
-            1.925154014814667
-        )
-        # Values from Table B-1, final column (akII)
-        akII = (
-            0.000000000237816,
-            -0.000000002849257,
-            -0.000000006944757,
-            0.000000004558555,
-            0.000000080779570,
-            0.000000216991779,
-            -0.000000250453880,
-            -0.000003548684306,
-            -0.000004583768938,
-            0.000034682122751,
-            0.000087294451594,
-            -0.000242107641309,
-            -0.000887171310131,
-            0.001130378079086,
-            0.006519840398744,
-            -0.001668087945272,
-            -0.036552745910311,
-            -0.028796057604906,
-            0.150044637187895,
-            0.462762985338493,
-            0.628023320520852,
-        )
-        x_vec = np.full_like(akI, x)
-        ak = np.where(x_vec < 1, akI, akII)
-        z = np.where(
-            x < 1, 4 * x ** 0.2 - 2,
-            40 / 9 * x ** -0.1 - 22 / 9
-        )
-        dz_dx = np.where(
-            x < 1, 4 * x ** -0.8 / 5,
-            -4 * x ** -1.1 / 9
-        )
-        b2, b1, b0 = 0.0, 0.0, 0.0
-        d2, d1, d0 = 0.0, 0.0, 0.0
-        for a in ak:
-            b2 = b1 * 1
-            b1 = b0 * 1
-            d2 = d1 * 1
-            d1 = d0 * 1
-            b0 = z * b1 - b2 + a  # Eq. (B-23/27)
-            d0 = b1 + z * d1 - d2  # Eq. (B-24/28)
-        J = 0.25 * x - 1 + 0.5 * (b0 - b2)  # Eq. (B-29)
-        Jp = 0.25 + 0.5 * dz_dx * (d0 - d2)  # Eq. (B-30)
-        return J, Jp
+        return get_harvie_j(x)
 
     def get_x_ij(self, z1, z2, I):
         A = self.get_A()
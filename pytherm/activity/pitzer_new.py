@@ -1,11 +1,43 @@
 import numpy as np
 from .db import pitzer as datasets
 from pytherm.activity import electrolytes as el
-from pytherm.activity.electrolytes import get_I
+from pytherm.activity.electrolytes import get_I, get_harvie_j
 from pytherm.stoichiometry import extract_charges
 
 
+def _get_g(x):
+    """g(x) = 2 (1 - (1 + x) exp(-x)) / x^2, g(0) = 1"""
+    x_safe = np.where(x > 0, x, 1.0)
+    g = 2 * (1 - (1 + x_safe) * np.exp(-x_safe)) / x_safe ** 2
+    return np.where(x > 0, g, 1.0)
+
+
+def _get_g_prime(x):
+    """g'(x) = -2 (1 - (1 + x + x^2 / 2) exp(-x)) / x^2, g'(0) = 0"""
+    x_safe = np.where(x > 0, x, 1.0)
+    gp = -2 * (1 - (1 + x_safe + x_safe ** 2 / 2) * np.exp(-x_safe)) / x_safe ** 2
+    return np.where(x > 0, gp, 0.0)
+
+
 class Pitzer:
+    r"""Pitzer model for activity coefficients in molality scale
+
+    Interaction parameters of the species set are compiled once into dense arrays,
+    :math:`\ln\gamma` of all species is calculated analytically in one vectorised pass.
+    Molalities are arrays in the order of :attr:`substances`, 1-D for one solution
+    or 2-D [n_points, n_species] for a batch of solutions
+
+    Parameters
+    ----------
+    ph : dict
+        Phase dict, keys define the species set
+    db : ParametersPitzerNew, optional
+        Pitzer parameters, by default pitzer_dataset
+    get_A : callable, optional
+        Debye-Huckel :math:`A_\phi(T)`, by default :func:`.electrolytes.get_A`
+    dict_mode : bool, optional
+        Dict or array mode of :meth:`get_y`, by default False
+    """
     get_A: callable
     substances: np.ndarray
     charges: np.ndarray
@@ -15,6 +47,7 @@ class Pitzer:
     neutral: np.ndarray
     db: datasets.ParametersPitzerNew
     T_model = -1
+    b = 1.2
 
     dict_mode: bool
 
@@ -31,316 +64,320 @@ class Pitzer:
         self.substances = subs
         self.charges_dict = {self.substances[i]: self.charges[i] for i in range(len(self.substances))}
 
-    def get_y(self, ph):
-        if self.dict_mode:
-            y = {}
-            for s in ph:
-                y[s] = np.exp(self.grad(ph, s))
-        else:
-            y = []
-            for s in self.substances:
-                y.append(np.exp(self.grad(ph, s)))
-                y = np.array(y)
-        return y
+        self.i_c = np.flatnonzero(self.charges > 0)
+        self.i_a = np.flatnonzero(self.charges < 0)
+        self.i_n = np.flatnonzero(self.charges == 0)
+        self.z_c = self.charges[self.i_c].astype(np.float64)
+        self.z_a = self.charges[self.i_a].astype(np.float64)
+        self.__compile()
+
+    def __compile(self):
+        """Collect raw parameters of the species set into index arrays and coefficient matrices"""
+        n_c, n_a, n_n = len(self.i_c), len(self.i_a), len(self.i_n)
+        self.shapes = {
+            'B0': (n_c, n_a),
+            'B1': (n_c, n_a),
+            'B2': (n_c, n_a),
+            'C0': (n_c, n_a),
+            'THETA_CC': (n_c, n_c),
+            'THETA_AA': (n_a, n_a),
+            'PSI_CCA': (n_c, n_c, n_a),
+            'PSI_CAA': (n_c, n_a, n_a),
+            'LAMDA_NC': (n_n, n_c),
+            'LAMDA_NA': (n_n, n_a),
+            'LAMDA_NN': (n_n, n_n),
+            'ZETA': (n_n, n_c, n_a),
+        }
+        local = {}
+        for kind, idx in (('c', self.i_c), ('a', self.i_a), ('n', self.i_n)):
+            for j, i in enumerate(idx):
+                local[self.substances[i]] = (kind, j)
+
+        entries = {name: [] for name in self.shapes}
+
+        def add(name, index, params, symmetric=None):
+            entries[name].append((index, params))
+            if symmetric is not None and symmetric != index:
+                entries[name].append((symmetric, params))
+
+        raw = self.db.raw_parameters
+        for key in ('B0', 'B1', 'B2', 'C0'):
+            for s1 in raw.get(key, {}):
+                for s2, params in raw[key][s1].items():
+                    if s1 in local and s2 in local:
+                        kinds = {local[s1][0]: local[s1][1], local[s2][0]: local[s2][1]}
+                        if 'c' in kinds and 'a' in kinds:
+                            add(key, (kinds['c'], kinds['a']), params)
+        for s1 in raw.get('THETA', {}):
+            for s2, params in raw['THETA'][s1].items():
+                if s1 in local and s2 in local and local[s1][0] == local[s2][0] != 'n':
+                    name = 'THETA_CC' if local[s1][0] == 'c' else 'THETA_AA'
+                    i, j = local[s1][1], local[s2][1]
+                    add(name, (i, j), params, (j, i))
+        for s1 in raw.get('LAMDA', {}):
+            for s2, params in raw['LAMDA'][s1].items():
+                if s1 in local and s2 in local:
+                    (k1, i), (k2, j) = local[s1], local[s2]
+                    if k1 != 'n':
+                        (k1, i), (k2, j) = (k2, j), (k1, i)
+                    if k1 == 'n':
+                        name = {'c': 'LAMDA_NC', 'a': 'LAMDA_NA', 'n': 'LAMDA_NN'}[k2]
+                        add(name, (i, j), params, (j, i) if k2 == 'n' else None)
+        for key in ('PSI', 'ZETA'):
+            for s1 in raw.get(key, {}):
+                for s2 in raw[key][s1]:
+                    for s3, params in raw[key][s1][s2].items():
+                        if not (s1 in local and s2 in local and s3 in local):
+                            continue
+                        by_kind = {'c': [], 'a': [], 'n': []}
+                        for s in (s1, s2, s3):
+                            by_kind[local[s][0]].append(local[s][1])
+                        c, a, n = by_kind['c'], by_kind['a'], by_kind['n']
+                        if key == 'ZETA' and (len(n), len(c), len(a)) == (1, 1, 1):
+                            add('ZETA', (n[0], c[0], a[0]), params)
+                        elif key == 'PSI' and (len(c), len(a)) == (2, 1):
+                            add('PSI_CCA', (c[0], c[1], a[0]), params, (c[1], c[0], a[0]))
+                        elif key == 'PSI' and (len(c), len(a)) == (1, 2):
+                            add('PSI_CAA', (c[0], a[0], a[1]), params, (c[0], a[1], a[0]))
+
+        n_poly = len(self.db.poly_form(298.15))
+        self.compiled = {}
+        for name, items in entries.items():
+            coefs = np.zeros((len(items), n_poly))
+            for k, (index, params) in enumerate(items):
+                coefs[k, :len(params)] = params
+            index = tuple(np.array([it[0][d] for it in items], dtype=int)
+                          for d in range(len(self.shapes[name])))
+            self.compiled[name] = (index, coefs)
+
+        # alpha_1 = 1.4, alpha_2 = 12 for 2-2 electrolytes, alpha_2 = 50 for higher ones,
+        # no beta_2 term if one of the ions is univalent
+        zc = np.abs(self.z_c)[:, None]
+        za = np.abs(self.z_a)[None, :]
+        uni = (zc == 1) | (za == 1)
+        two_two = (zc == 2) & (za == 2)
+        self.alpha1 = np.where(two_two & ~uni, 1.4, 2.0)
+        self.alpha2 = np.where(uni, 0.0, np.where(two_two, 12.0, 50.0))
+        self.C_factor = 1 / (2 * np.sqrt(zc * za))
+
+    def update_params(self, T):
+        """Evaluate compiled parameters at T
 
-    def grad(self, ph, s, dm=1e-8):
-        ph_b = {}
-        for i in ph:
-            ph_b[i] = ph[i]
+        Parameters
+        ----------
+        T : float
+            Temperature, [K]
+        """
+        if self.T_model == T:
+            return
+        poly = self.db.poly_form(T)
+        p = {}
+        for name, (index, coefs) in self.compiled.items():
+            value = np.zeros(self.shapes[name])
+            value[index] = coefs @ poly
+            p[name] = value
+        p['B2'] = np.where(self.alpha2 > 0, p['B2'], 0.0)
+        p['C'] = p['C0'] * self.C_factor
+        self.params = p
+        self.A = self.get_A(T)
+        self.T_model = T
+
+    def __get_e_theta(self, z, I, sqrt_I):
+        r"""Unsymmetrical mixing terms :math:`^E\theta_{ij}` and :math:`^E\theta'_{ij}` for ions of one sign
 
-        ph_b[s] = ph[s] - dm
-        y1 = self.get_G_nRT(ph_b)
-        ph_b[s] = ph[s] + dm
-        y2 = self.get_G_nRT(ph_b)
+        .. math::
+            ^E\theta_{ij}=\frac{z_i z_j}{4I}[J(x_{ij})- 0.5 J(x_{ii})- 0.5 J(x_{jj})]
+        """
+        zz = z[:, None] * z[None, :]
+        x = 6 * zz[None] * self.A * sqrt_I[:, None, None]
+        J, Jp = get_harvie_j(x)
+        J_d = np.diagonal(J, axis1=1, axis2=2)
+        xJp = x * Jp
+        xJp_d = np.diagonal(xJp, axis1=1, axis2=2)
+        I_safe = np.where(I > 0, I, 1.0)[:, None, None]
+        E = zz / (4 * I_safe) * (J - 0.5 * J_d[:, :, None] - 0.5 * J_d[:, None, :])
+        Ep = - E / I_safe + zz / (8 * I_safe ** 2) * (xJp - 0.5 * xJp_d[:, :, None] - 0.5 * xJp_d[:, None, :])
+        mask = (I > 0)[:, None, None]
+        return np.where(mask, E, 0.0), np.where(mask, Ep, 0.0)
+
+    def __get_terms(self, m, T):
+        """Ionic strength dependent terms shared by ln_y and G_nRT"""
+        self.update_params(T)
+        p = self.params
+        m_c, m_a, m_n = m[:, self.i_c], m[:, self.i_a], m[:, self.i_n]
+        I = get_I(m, self.charges)
+        sqrt_I = np.sqrt(I)
+        Z = m @ np.abs(self.charges)
+
+        x1 = self.alpha1[None] * sqrt_I[:, None, None]
+        x2 = self.alpha2[None] * sqrt_I[:, None, None]
+        B = p['B0'] + p['B1'] * _get_g(x1) + p['B2'] * _get_g(x2)
+        I_safe = np.where(I > 0, I, 1.0)[:, None, None]
+        Bp = (p['B1'] * _get_g_prime(x1) + p['B2'] * _get_g_prime(x2)) / I_safe
+
+        E_cc, Ep_cc = self.__get_e_theta(self.z_c, I, sqrt_I)
+        E_aa, Ep_aa = self.__get_e_theta(self.z_a, I, sqrt_I)
+        return m_c, m_a, m_n, I, sqrt_I, Z, B, Bp, E_cc, Ep_cc, E_aa, Ep_aa
+
+    def __as_array(self, ph):
+        if isinstance(ph, dict):
+            return np.array([ph[s] for s in self.substances], dtype=np.float64)
+        return np.asarray(ph, dtype=np.float64)
+
+    def get_lny(self, m, T=298.15):
+        r"""Calculate :math:`\ln\gamma` of all species analytically
 
-        return (y2 - y1) / (2 * dm)
+        .. math::
+            \ln\gamma_M = z_M^2 F + \sum_a m_a (2B_{Ma} + ZC_{Ma})
+            + \sum_c m_c (2\Phi_{Mc} + \sum_a m_a\psi_{Mca})
+            + \sum_{a<a'} m_a m_{a'}\psi_{Maa'} \\
+            + |z_M|\sum_c\sum_a m_c m_a C_{ca}
+            + 2\sum_n m_n\lambda_{nM} + \sum_n\sum_a m_n m_a\zeta_{nMa}
 
-    def get_G_nRT(self, ph:dict, T=298.15):
-        r"""Calculate :math:`G^{ex}/(w_{w}RT)`
+        anions are symmetrical, for neutral species
 
         .. math::
-
-            G^{ex}/(w_{w}RT) = f(I)
-            + 2 \sum_{c}\sum_{a}[B_{ca}
-            + (\sum_{c}m_c z_c)C_{ca}] \\
-            + \sum_{c}\sum_{c'} m_c m_{c'} [2\Phi_{cc'} + \sum_a m_a \psi_{cc'a}] 
-            + \sum_{a}\sum_{a'} m_a m_{a'} [2\Phi_{aa'} + \sum_c m_c \psi_{caa'}] \\
-            + 2 \sum_n\sum_c m_n m_c \lambda_{nc}
-            + 2 \sum_n\sum_a m_n m_a \lambda_{na} 
-            + 2 \sum_n\sum_{n'} m_n m_{n'} \lambda_{nn'} + ... 
+            \ln\gamma_N = 2\sum_c m_c\lambda_{Nc} + 2\sum_a m_a\lambda_{Na}
+            + 2\sum_n m_n\lambda_{Nn} + \sum_c\sum_a m_c m_a\zeta_{Nca}
 
         Parameters
         ----------
-        ph : _type_
-            _description_
+        m : np.ndarray | dict
+            Molalities [n_species] or [n_points, n_species] in the order of :attr:`substances`
+        T : float, optional
+            Temperature, [K], by default 298.15
+
+        Returns
+        -------
+        np.ndarray
+            :math:`\ln\gamma` with the shape of m
         """
-        def get_ca():
-            value_ca = 0
-            for c in self.cations:
-                m_c = ph[c]
-                for a in self.anions:
-                    if self.db.is_exist('CA', c, a):
-                        m_a = ph[a]
-                        B = self.get_B(c, a, I)
-                        C = self.get_C(c, a)
-                        value_ca += m_c * m_a * (2 * B + Z * C)
-            return value_ca
-
-        def get_cc():
-            value_cc = 0
-            for c1 in self.cations:
-                m_c1 = ph[c1]
-                for c2 in self.cations:
-                    if self.db.is_exist('THETA', c1, c2):
-                        m_c2 = ph[c2]
-                        fi = self.db['THETA'][c1][c2] \
-                            + self.get_theta_e(c1, c2, I, A)
-                        value_cc += m_c1 * m_c2 * 2 * fi
-            return value_cc
-
-        def get_aa():
-            value_aa = 0
-            for a1 in self.cations:
-                m_a1 = ph[a1]
-                for a2 in self.cations:
-                    if self.db.is_exist('THETA', a1, a2):
-                        m_a2 = ph[a2]
-                        fi = self.db['THETA'][a1][a2]  \
-                            + self.get_theta_e(a1, a2, I, A)
-                        value_aa += m_a1 * m_a2 * 2 * fi
-            return value_aa
-
-        def get_cca():
-            value_cca = 0
-            for c1 in self.cations:
-                m_c1 = ph[c1]
-                for c2 in self.cations:
-                    m_c2 = ph[c2]
-                    for a in self.anions:
-                        if self.db.is_exist('PSI', 'c1', 'c2', 'a'):
-                            m_a = ph[a]
-                            psi = self.db['PSI'][c1][c2][a]
-                            value_cca += m_c1 * m_c2 * m_a * psi
-            return value_cca
-
-        def get_caa():
-            value_caa = 0
-            for a1 in self.cations:
-                m_a1 = ph[a1]
-                for a2 in self.cations:
-                    m_a2 = ph[a2]
-                    for c in self.anions:
-                        if self.db.is_exist('PSI', c, a1, a2):
-                            m_c = ph[c]
-                            psi = self.db['PSI'][c][a1][a2]
-                            value_caa += m_a1 * m_a2 * m_c * psi
-            return value_caa
-
-        def get_nc():
-            value_nc = 0
-            for n in self.neutral:
-                m_n = ph[n]
-                for c in self.cations:
-                    m_c = ph[c]
-                    if self.db.is_exist('LAMDA', n, c):
-                        value_nc += 2 * m_n * m_c * self.db['LAMDA'][n][c]
-            return value_nc
-
-        def get_na():
-            value_na = 0
-            for n in self.neutral:
-                m_n = ph[n]
-                for a in self.anions:
-                    m_a = ph[a]
-                    if self.db.is_exist('LAMDA', n, a):
-                        value_na += 2 * m_n * m_a * self.db['LAMDA'][n][a]
-            return value_na
-
-        def get_nca():
-            value_nca = 0
-            for n in self.cations:
-                m_n = ph[n]
-                for c in self.cations:
-                    m_c = ph[c]
-                    for a in self.anions:
-                        if self.db.is_exist('ZETA', a, n, c):
-                            m_a = ph[a]
-                            value_nca += (m_n * m_c * m_a
-                                          * self.db['ZETA'][n][c][a])
-            return value_nca
-
-        if self.T_model != T:
-            self.db.update_params(T)
-            self.T_model = T
-
-        molalities = np.array(list(ph.values()))
-        I = get_I(molalities, self.charges)
-        A = self.get_A(T)
-        Z = molalities @ np.abs(self.charges)
-
-        G_nRT = self.get_f(I, A)
-        G_nRT += get_ca()
-        if len(self.cations) > 1:
-            G_nRT += get_cc()
-            G_nRT += get_cca()
-        if len(self.anions) > 1:
-            G_nRT += get_aa()
-            G_nRT += get_caa()
-        if len(self.neutral) > 0:
-            G_nRT += get_nc()
-            G_nRT += get_na()
-            G_nRT += get_nca()
-
-        return G_nRT
+        m = self.__as_array(m)
+        squeeze = m.ndim == 1
+        m = np.atleast_2d(m)
+        m_c, m_a, m_n, I, sqrt_I, Z, B, Bp, E_cc, Ep_cc, E_aa, Ep_aa = self.__get_terms(m, T)
+        p = self.params
+        b = self.b
+
+        F = (- self.A * (sqrt_I / (1 + b * sqrt_I) + 2 / b * np.log(1 + b * sqrt_I))
+             + np.einsum('pc,pa,pca->p', m_c, m_a, Bp)
+             + 0.5 * np.einsum('pi,pj,pij->p', m_c, m_c, Ep_cc)
+             + 0.5 * np.einsum('pi,pj,pij->p', m_a, m_a, Ep_aa))
+        C = p['C']
+        BZC = 2 * B + Z[:, None, None] * C
+        mmC = np.einsum('pc,pa,ca->p', m_c, m_a, C)
+        Phi_cc = p['THETA_CC'] + E_cc
+        Phi_aa = p['THETA_AA'] + E_aa
+
+        lny = np.zeros_like(m)
+        lny[:, self.i_c] = (
+            self.z_c ** 2 * F[:, None]
+            + np.einsum('pa,pca->pc', m_a, BZC)
+            + 2 * np.einsum('pj,pij->pi', m_c, Phi_cc)
+            + np.einsum('pj,pa,ija->pi', m_c, m_a, p['PSI_CCA'])
+            + 0.5 * np.einsum('pa,pb,iab->pi', m_a, m_a, p['PSI_CAA'])
+            + np.abs(self.z_c) * mmC[:, None]
+            + 2 * m_n @ p['LAMDA_NC']
+            + np.einsum('pn,pa,nia->pi', m_n, m_a, p['ZETA'])
+        )
+        lny[:, self.i_a] = (
+            self.z_a ** 2 * F[:, None]
+            + np.einsum('pc,pca->pa', m_c, BZC)
+            + 2 * np.einsum('pj,pij->pi', m_a, Phi_aa)
+            + np.einsum('pc,pb,cib->pi', m_c, m_a, p['PSI_CAA'])
+            + 0.5 * np.einsum('pc,pd,cdi->pi', m_c, m_c, p['PSI_CCA'])
+            + np.abs(self.z_a) * mmC[:, None]
+            + 2 * m_n @ p['LAMDA_NA']
+            + np.einsum('pn,pc,nci->pi', m_n, m_c, p['ZETA'])
+        )
+        lny[:, self.i_n] = (
+            2 * m_c @ p['LAMDA_NC'].T
+            + 2 * m_a @ p['LAMDA_NA'].T
+            + 2 * m_n @ p['LAMDA_NN']
+            + np.einsum('pc,pa,nca->pn', m_c, m_a, p['ZETA'])
+        )
+        return lny[0] if squeeze else lny
 
-    def get_f(self, I, A, b=1.2):
-        return - 4 * A * I * np.log(1 + b * np.sqrt(I)) / b
+    def get_y(self, ph, T=298.15):
+        """Calculate activity coefficients
+
+        Parameters
+        ----------
+        ph : dict | np.ndarray
+            Phase dict in dict mode, otherwise molalities [n_species] or [n_points, n_species]
+        T : float, optional
+            Temperature, [K], by default 298.15
+
+        Returns
+        -------
+        dict | np.ndarray
+            Activity coefficients
+        """
+        y = np.exp(self.get_lny(ph, T))
+        if self.dict_mode:
+            return {str(s): y.T[i] for i, s in enumerate(self.substances)}
+        return y
 
-    def get_B(self, s1: str, s2: str, I: float):
-        def get_g(x):
-            return 2 * (1 - (1 + x) * np.exp(-x)) / x ** 2
-
-        alpha = [0, 0]
-        if np.abs(self.charges_dict[s1]) == 1 or np.abs(self.charges_dict[s2]) == 1:
-            alpha = [2, 0]
-        elif np.abs(self.charges_dict[s1]) == 2 and np.abs(self.charges_dict[s2]) == 2:
-            alpha = [1.4, 12]
-        else:
-            alpha = [2, 50]
-
-        b0 = self.db['CA'][s1][s2][0]
-        b1 = self.db['CA'][s1][s2][1]
-        b2 = self.db['CA'][s1][s2][2]
-        g1 = get_g(alpha[0] * np.sqrt(I))
-        if alpha[1] == 0:
-            return b0 + b1 * g1
-        else:
-            g2 = get_g(alpha[1] * np.sqrt(I))
-            return b0 + b1 * g1 + b2 * g2
-
-    def get_C(self, s1: str, s2: str):
-        C_f = self.db['CA'][s1][s2][3]
-        z1 = self.charges_dict[s1]
-        z2 = self.charges_dict[s2]
-        return C_f / (2 * np.sqrt(np.abs(z1 * z2)))
-
-    def get_theta_e(self, s1: str, s2: str, I: float, A: float):
-        r"""Calculate excess term :math:`^E\theta_{ij}` for :math:`\Phi_{ij}` using
+    def get_G_nRT(self, ph, T=298.15):
+        r"""Calculate :math:`G^{ex}/(w_{w}RT)`
 
         .. math::
-            \theta_{MN}=\frac{z_M z_N}{4I}[J(x_{MN})- 0.5 J(x_{MM} )- 0.5 J(x_{NN})]
+
+            G^{ex}/(w_{w}RT) = f(I)
+            + \sum_{c}\sum_{a} m_c m_a [2B_{ca} + (\sum_{i}m_i |z_i|)C_{ca}] \\
+            + \sum_{c}\sum_{c'} m_c m_{c'} [\Phi_{cc'} + \frac{1}{2}\sum_a m_a \psi_{cc'a}]
+            + \sum_{a}\sum_{a'} m_a m_{a'} [\Phi_{aa'} + \frac{1}{2}\sum_c m_c \psi_{caa'}] \\
+            + 2 \sum_n\sum_c m_n m_c \lambda_{nc}
+            + 2 \sum_n\sum_a m_n m_a \lambda_{na}
+            + \sum_n\sum_{n'} m_n m_{n'} \lambda_{nn'}
+            + \sum_n\sum_c\sum_a m_n m_c m_a \zeta_{nca}
 
         Parameters
         ----------
-        s1 : _type_
-            _description_
-        s2 : _type_
-            _description_
-        I : _type_
-            _description_
+        ph : dict | np.ndarray
+            Phase dict or molalities [n_species] or [n_points, n_species]
+        T : float, optional
+            Temperature, [K], by default 298.15
 
         Returns
         -------
-        _type_
-            _description_
+        float | np.ndarray
+            :math:`G^{ex}/(w_{w}RT)` for every solution
         """
-        def get_x_ij(z1, z2, I, A):
-            return 6 * z1 * z2 * A * np.sqrt(I)
-
-        z_m = self.charges_dict[s1]
-        z_n = self.charges_dict[s2]
-
-        x_mn = get_x_ij(z_m, z_n, I, A)
-        x_mm = get_x_ij(z_m, z_m, I, A)
-        x_nn = get_x_ij(z_n, z_n, I, A)
-        J1, Jp1 = self.get_harvie_j(x_mn)
-        J2, Jp2 = self.get_harvie_j(x_mm)
-        J3, Jp3 = self.get_harvie_j(x_nn)
+        m = self.__as_array(ph)
+        squeeze = m.ndim == 1
+        m = np.atleast_2d(m)
+        m_c, m_a, m_n, I, sqrt_I, Z, B, Bp, E_cc, Ep_cc, E_aa, Ep_aa = self.__get_terms(m, T)
+        p = self.params
+
+        G_nRT = (
+            self.get_f(I, self.A, self.b)
+            + np.einsum('pc,pa,pca->p', m_c, m_a, 2 * B + Z[:, None, None] * p['C'])
+            + np.einsum('pi,pj,pij->p', m_c, m_c, p['THETA_CC'] + E_cc)
+            + 0.5 * np.einsum('pi,pj,pa,ija->p', m_c, m_c, m_a, p['PSI_CCA'])
+            + np.einsum('pi,pj,pij->p', m_a, m_a, p['THETA_AA'] + E_aa)
+            + 0.5 * np.einsum('pc,pi,pj,cij->p', m_c, m_a, m_a, p['PSI_CAA'])
+            + 2 * np.einsum('pn,pc,nc->p', m_n, m_c, p['LAMDA_NC'])
+            + 2 * np.einsum('pn,pa,na->p', m_n, m_a, p['LAMDA_NA'])
+            + np.einsum('pi,pj,ij->p', m_n, m_n, p['LAMDA_NN'])
+            + np.einsum('pn,pc,pa,nca->p', m_n, m_c, m_a, p['ZETA'])
+        )
+        return G_nRT[0] if squeeze else G_nRT
 
-        E = (z_m * z_n / (4 * I)) * (J1 - 0.5 * J2 - 0.5 * J3)
-        # Ep = (- E / I + (z_m * z_n / (8 * I ** 2))
-        #       * (x_mn * Jp1 - 0.5 * x_mm * Jp2 - 0.5 * x_nn * Jp3))
-        return E
+    def get_f(self, I, A, b=1.2):
+        return - 4 * A * I * np.log(1 + b * np.sqrt(I)) / b
 
     def get_harvie_j(self, x):
         """Calculate J using Chebyshev polynomial approximations
 
         Parameters
         ----------
-        x : _type_
-            _description_
+        x : float
+            :math:`x_{ij} = 6 z_i z_j A_\\phi \\sqrt{I}`
 
         Returns
         -------
-        _type_
-            _description_
+        tuple[float, float]
+            J(x) and J'(x)
         """
-        akI = (
-            -0.000000000010991,
-            -0.000000000002563,
-            0.000000000001943,
-            0.000000000046333,
-            -0.000000000050847,
-            -0.000000000821969,
-            0.000000001229405,
-            0.000000013522610,
-            -0.000000025267769,
-            -0.000000202099617,
-            0.000000396566462,
-            0.000002937706971,
-            -0.000004537895710,
-            -0.000045036975204,
-            0.000036583601823,
-            0.000636874599598,
-            0.000388260636404,
-            -0.007299499690937,
-            -0.029779077456514,
-            -0.060076477753119,
-            1.925154014814667
-        )
-        # Values from Table B-1, final column (akII)
-        akII = (
-            0.000000000237816,
-            -0.000000002849257,
-            -0.000000006944757,
-            0.000000004558555,
-            0.000000080779570,
-            0.000000216991779,
-            -0.000000250453880,
-            -0.000003548684306,
-            -0.000004583768938,
-            0.000034682122751,
-            0.000087294451594,
-            -0.000242107641309,
-            -0.000887171310131,
-            0.001130378079086,
-            0.006519840398744,
-            -0.001668087945272,
-            -0.036552745910311,
-            -0.028796057604906,
-            0.150044637187895,
-            0.462762985338493,
-            0.628023320520852,
-        )
-        x_vec = np.full_like(akI, x)
-        ak = np.where(x_vec < 1, akI, akII)
-        z = np.where(
-            x < 1, 4 * x ** 0.2 - 2,
-            40 / 9 * x ** -0.1 - 22 / 9
-        )
-        dz_dx = np.where(
-            x < 1, 4 * x ** -0.8 / 5,
-            -4 * x ** -1.1 / 9
-        )
-        b2, b1, b0 = 0.0, 0.0, 0.0
-        d2, d1, d0 = 0.0, 0.0, 0.0
-        for a in ak:
-            b2 = b1 * 1
-            b1 = b0 * 1
-            d2 = d1 * 1
-            d1 = d0 * 1
-            b0 = z * b1 - b2 + a  # Eq. (B-23/27)
-            d0 = b1 + z * d1 - d2  # Eq. (B-24/28)
-        J = 0.25 * x - 1 + 0.5 * (b0 - b2)  # Eq. (B-29)
-        Jp = 0.25 + 0.5 * dz_dx * (d0 - d2)  # Eq. (B-30)
-        return J, Jp
\ No newline at end of file
+        return get_harvie_j(x)
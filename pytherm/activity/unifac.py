@@ -24,15 +24,28 @@ load parameters with :obj:`.ParametersUNIFAC` and set-up the model:
 UNIFAC class
 ------------
 .. autoclass:: UNIFAC
-    :members: __init__, get_a, get_y
+    :members: __init__, get_a, get_y, get_y_batch, get_lny_and_jacobian, set_cache_size, cache_info, cache_clear, group_comp, res_params, get_psi, get_ln_gamma_pure
    
 UNIFAC_W class
 ---------------
 .. autoclass:: UNIFAC_W
-    :members: __init__, get_a, get_y
+    :members: __init__, get_a, get_y, get_y_batch, get_lny_and_jacobian, set_cache_size, cache_info, cache_clear
     :show-inheritance:
     :member-order: bysource
 
+Double precision
+----------------
+:obj:`.UNIFAC64`, :obj:`.UNIFAC_W64` and :obj:`.UNIFAC_VISCO64` have the same interface
+and keep parameters, intermediates and results in float64.
+They are slower, but stable enough for numerical derivatives.
+Arrays for :obj:`.UNIFAC64.get_y_batch` should be float64 to avoid copies.
+
+.. autoclass:: UNIFAC64
+    :show-inheritance:
+
+.. autoclass:: UNIFAC_W64
+    :show-inheritance:
+
 SubstancesUNIFAC class
 ----------------------
 Substances must be a special :obj:`.SubstancesUNIFAC` object
@@ -45,7 +58,12 @@ ParametersUNIFAC
 Parameters must be a special :obj:`.ParametersUNIFAC` object
 
 .. autoclass:: ParametersUNIFAC
-    :members: __init__
+    :members: __init__, save_binary, is_mapped
+
+Text .dat files are parsed on every load. For services starting many worker
+processes convert them once to the binary format, which is memory mapped:
+    >>> uf.ParametersUNIFAC("dor.dat").save_binary("dor.ufb")
+    >>> params = uf.ParametersUNIFAC("dor.ufb")
 
 Build-in parameters
 -------------------
@@ -83,7 +101,11 @@ from pytherm.cpp import (
     UNIFAC,
     UNIFAC_W,
     UNIFAC_VISCO,
+    UNIFAC64,
+    UNIFAC_W64,
+    UNIFAC_VISCO64,
     ActivityModel,
+    ActivityModel64,
 )
 
 import pytherm.parameters.unifac.datasets as datasets
@@ -94,6 +116,10 @@ __all__ = [
     "UNIFAC",
     "UNIFAC_W",
     "UNIFAC_VISCO",
+    "UNIFAC64",
+    "UNIFAC_W64",
+    "UNIFAC_VISCO64",
     "ActivityModel",
+    "ActivityModel64",
     "datasets",
 ]
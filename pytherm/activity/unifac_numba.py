@@ -8,14 +8,14 @@ calculations with the UNIFAC model.
 UNIFAC Class
 ------------
 .. autoclass:: UNIFAC
-    :members: get_y, get_y_array
+    :members: get_y, get_y_array, set_cache_size, cache_info, cache_clear
     :undoc-members:
     :member-order: bysource
 
 UNIFAC_W Class
 --------------
 .. autoclass:: UNIFAC_W
-    :members: get_y
+    :members: get_y, get_y_array
     :undoc-members:
     :member-order: bysource
 
@@ -59,7 +59,9 @@ References
 .. [6] Bessa2016, DOI: https://doi.org/10.1016/j.fluid.2016.05.020
 
 """
-from numba import njit
+from collections import OrderedDict
+import numba
+from numba import njit, prange
 import numpy as np
 from pytherm import constants
 from .db import unifac as datasets
@@ -114,6 +116,9 @@ class UNIFAC(ActivityModel):
     psi: np.ndarray[(np.any, np.any,)]  # psi matrix for current temperature
     ln_gamma_pure: np.ndarray[(np.any, np.any,)]  # matrix of groups ln_gamma for pure components
     modified_mode: bool  # if True use modified combinatorial part
+    cache_size: int  # maximum number of temperatures in psi and ln_gamma_pure LRU cache
+    cache_hits: int  # number of temperature changes served from cache
+    cache_misses: int  # number of temperature changes with psi and ln_gamma_pure calculation
 
     def __init__(self, dataset: ParametersUNIFAC, substances: SubstancesUNIFAC):
         ActivityModel.__init__(self)
@@ -182,6 +187,11 @@ class UNIFAC(ActivityModel):
         self.psi = np.zeros((n_main_gr, n_main_gr))
         self.ln_gamma_pure = np.zeros((self.n_comp, self.n_gr))
 
+        self.cache_size = 8
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.__cache = OrderedDict()
+
         self.unifac_mode = dataset['type']
         if self.unifac_mode == 'modified':
             self.modified_mode = True
@@ -214,11 +224,7 @@ class UNIFAC(ActivityModel):
         --------
         >>> UNIFAC.get_y([0.5, 0.5], T=298)
         """
-        if self.T != T:
-            self.T = T
-            self.psi = get_psi(T, self.matrix_id, self.res_matrix)
-            self.ln_gamma_pure = get_gamma_pure(conc, self.n_comp, self.n_gr, self.group_comp, self.group_Q,
-                                                self.gr_id_local, self.psi)
+        self.__set_temperature(T)
         y = get_y(conc, self.comp_r, self.comp_q, self.n_gr, self.group_comp, self.group_Q, self.gr_id_local,
                   self.n_comp, self.psi, self.ln_gamma_pure, self.modified_mode)
         return y
@@ -226,32 +232,49 @@ class UNIFAC(ActivityModel):
     def get_y_array(self, conc: np.ndarray[(np.any, np.any,)], T=298) -> np.ndarray[(np.any, np.any,)]:
         r"""Calculate activity coefficients for conc matrix
 
+        Rows are evaluated in parallel on all numba threads,
+        psi and ln_gamma_pure are calculated once for every distinct temperature
+
         .. math::
             \gamma_i =  \exp\left(\ln \gamma_i^c + \ln \gamma_i^r \right)
 
         Parameters
         ----------
         conc : np.ndarray
-            Input concentration matrix, [molar fraction]
-        T : float, optional
-            Temperature, [K], by default 298.0
+            Input concentration matrix [n_rows, n_comp], [molar fraction]
+        T : float | np.ndarray, optional
+            Temperature, [K], one for all rows or array [n_rows], by default 298.0
 
         Returns
         -------
         np.ndarray[(np.any, np.any,)]
-            Activity coefficients
+            Activity coefficients [n_rows, n_comp]
 
         Examples
         --------
-        >>> UNIFAC.get_y([[0.5, 0.5], [[0.6, 0.4]]])
+        >>> UNIFAC.get_y_array([[0.5, 0.5], [0.6, 0.4]], T=[298, 310])
         """
-        if self.T != T:
-            self.T = T
-            self.psi = get_psi(T, self.matrix_id, self.res_matrix)
-            self.ln_gamma_pure = get_gamma_pure(conc, self.n_comp, self.n_gr, self.group_comp, self.group_Q,
-                                                self.gr_id_local, self.psi)
-        y = get_y_array(conc, self.comp_r, self.comp_q, self.n_gr, self.group_comp, self.group_Q, self.gr_id_local,
-                        self.n_comp, self.psi, self.ln_gamma_pure, self.modified_mode)
+        conc = np.ascontiguousarray(conc, dtype=np.float64)
+        if conc.ndim != 2 or conc.shape[1] != self.n_comp:
+            raise ValueError(f"conc must have shape (n_rows, {self.n_comp})")
+        T = np.asarray(T, dtype=np.float64)
+        if T.ndim == 0:
+            T = np.full(len(conc), T)
+        if T.shape != (len(conc),):
+            raise ValueError("T must be a scalar or an array with one temperature per row")
+
+        T_unique, t_index = np.unique(T, return_inverse=True)
+        psi = np.empty((len(T_unique), self.n_gr, self.n_gr))
+        ln_gamma_pure = np.empty((len(T_unique), self.n_comp, self.n_gr))
+        group_id = np.ix_(self.gr_id_local, self.gr_id_local)
+        for i, T_i in enumerate(T_unique):
+            self.__set_temperature(T_i)
+            psi[i] = self.psi[group_id]
+            ln_gamma_pure[i] = self.ln_gamma_pure
+
+        y = get_y_array(conc, self.comp_r, self.comp_q, self.comp_r ** (3 / 4), self.group_comp.astype(np.float64),
+                        self.group_Q, psi, ln_gamma_pure, t_index.ravel(), self.modified_mode,
+                        4 * numba.get_num_threads())
         return y
 
     def get_ge(self, conc: np.ndarray, T=298.0) -> float:
@@ -273,6 +296,64 @@ class UNIFAC(ActivityModel):
         ge = np.sum(conc * np.log(y))
         return R * T * ge
 
+    def set_cache_size(self, maxsize: int):
+        """Set the maximum number of temperatures kept in the LRU cache
+        of psi and ln_gamma_pure, 0 disables caching
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of cached temperatures, by default 8
+        """
+        self.cache_size = maxsize
+        while len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+
+    def cache_info(self) -> dict:
+        """Temperature cache statistics
+
+        Only lookups on temperature change are counted,
+        repeated calls with the same temperature reuse the last state
+
+        Returns
+        -------
+        dict
+            {"hits": int, "misses": int, "maxsize": int, "currsize": int}
+        """
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "maxsize": self.cache_size,
+            "currsize": len(self.__cache),
+        }
+
+    def cache_clear(self):
+        """Clear the temperature cache and its statistics"""
+        self.__cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.T = -1
+
+    def __set_temperature(self, T: float):
+        """Set psi and ln_gamma_pure for T from cache or calculate them"""
+        if self.T == T:
+            return
+        self.T = T
+        if T in self.__cache:
+            self.cache_hits += 1
+            self.__cache.move_to_end(T)
+            self.psi, self.ln_gamma_pure = self.__cache[T]
+            return
+
+        self.cache_misses += 1
+        self.psi = get_psi(T, self.matrix_id, self.res_matrix)
+        self.ln_gamma_pure = get_gamma_pure(np.zeros(self.n_comp), self.n_comp, self.n_gr, self.group_comp,
+                                            self.group_Q, self.gr_id_local, self.psi)
+        if self.cache_size > 0:
+            self.__cache[T] = (self.psi, self.ln_gamma_pure)
+            while len(self.__cache) > self.cache_size:
+                self.__cache.popitem(last=False)
+
     def __get_vdw_params(self) -> (np.ndarray, np.ndarray):
         """Calculate r and q parameters
 
@@ -354,6 +435,29 @@ class UNIFAC_W(UNIFAC):
         y_w = y / (self.molar_weight * w_M)
         return y_w
 
+    def get_y_array(self, conc: np.ndarray[(np.any, np.any,)], T=298) -> np.ndarray[(np.any, np.any,)]:
+        r"""Calculate activity coefficients for conc matrix
+
+        Concentrations must be in weight fractions
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration matrix [n_rows, n_comp], [weight fraction]
+        T : float | np.ndarray, optional
+            Temperature, [K], one for all rows or array [n_rows], by default 298.0
+
+        Returns
+        -------
+        np.ndarray[(np.any, np.any,)]
+            Activity coefficients [n_rows, n_comp]
+        """
+        conc = np.asarray(conc, dtype=np.float64)
+        w_M = np.sum(conc / self.molar_weight, axis=1, keepdims=True)
+        x = (conc / self.molar_weight) / w_M
+        y = super().get_y_array(x, T)
+        return y / (self.molar_weight * w_M)
+
 
 @njit(cache=use_numba_cache)
 def get_y(conc: np.ndarray, comp_r: np.ndarray, comp_q: np.ndarray, n_gr: int,
@@ -372,24 +476,83 @@ def get_y(conc: np.ndarray, comp_r: np.ndarray, comp_q: np.ndarray, n_gr: int,
     return y
 
 
-@njit(cache=use_numba_cache)
-def get_y_array(conc_array: np.ndarray[(np.any, np.any,)], comp_r: np.ndarray, comp_q: np.ndarray, n_gr: int,
-                group_comp: np.ndarray[(np.any, np.any,)], group_Q: np.ndarray, gr_id_local: np.ndarray, n_comp: int,
-                psi: np.ndarray[(np.any, np.any,)], ln_gamma_pure: np.ndarray[(np.any, np.any,)],
-                modified_mode: bool):
-    y = np.zeros((len(conc_array), 2))
-    for i in range(len(conc_array)):
-        if modified_mode:
-            comb = get_comb_mod(conc_array[i], comp_r, comp_q)
-        else:
-            comb = get_comb_classic(conc_array[i], comp_r, comp_q)
-        res = get_res(conc_array[i], n_gr, group_comp, group_Q, gr_id_local, n_comp, psi, ln_gamma_pure)
-        lny = comb + res
-        y[i] = np.exp(lny)
+@njit(parallel=True, cache=use_numba_cache)
+def get_y_array(conc_array: np.ndarray[(np.any, np.any,)], comp_r: np.ndarray, comp_q: np.ndarray,
+                comp_r34: np.ndarray, group_comp: np.ndarray[(np.any, np.any,)], group_Q: np.ndarray,
+                psi: np.ndarray, ln_gamma_pure: np.ndarray, t_index: np.ndarray, modified_mode: bool,
+                n_blocks: int):
+    """Activity coefficients for every row of conc_array
 
+    psi [n_T, n_gr, n_gr] is expanded to groups, ln_gamma_pure is [n_T, n_comp, n_gr],
+    row i uses temperature t_index[i]. Rows are split in n_blocks blocks over numba threads,
+    every block allocates its scratch buffers once
+    """
+    n_rows, n_comp = conc_array.shape
+    n_gr = len(group_Q)
+    y = np.empty((n_rows, n_comp))
+    n_blocks = min(n_rows, n_blocks)
+    for b in prange(n_blocks):
+        theta = np.empty(n_gr)
+        theta_psi = np.empty(n_gr)
+        theta_s = np.empty(n_gr)
+        for r in range(b * n_rows // n_blocks, (b + 1) * n_rows // n_blocks):
+            get_lny_into(conc_array[r], comp_r, comp_q, comp_r34, group_comp, group_Q, psi[t_index[r]],
+                         ln_gamma_pure[t_index[r]], modified_mode, theta, theta_psi, theta_s, y[r])
+            for i in range(n_comp):
+                y[r, i] = np.exp(y[r, i])
     return y
 
 
+@njit(cache=use_numba_cache)
+def get_lny_into(x: np.ndarray, comp_r: np.ndarray, comp_q: np.ndarray, comp_r34: np.ndarray,
+                 group_comp: np.ndarray[(np.any, np.any,)], group_Q: np.ndarray, psi: np.ndarray[(np.any, np.any,)],
+                 ln_gamma_pure: np.ndarray[(np.any, np.any,)], modified_mode: bool,
+                 theta: np.ndarray, theta_psi: np.ndarray, theta_s: np.ndarray, out: np.ndarray):
+    """Write ln activity coefficients of one composition to out without allocations,
+    same equations as :func:`get_comb_mod`, :func:`get_comb_classic` and :func:`get_res`
+    with psi expanded to groups"""
+    n_comp = len(x)
+    n_gr = len(group_Q)
+
+    sum_r = 0.0
+    sum_q = 0.0
+    sum_r34 = 0.0
+    for i in range(n_comp):
+        sum_r += comp_r[i] * x[i]
+        sum_q += comp_q[i] * x[i]
+        sum_r34 += comp_r34[i] * x[i]
+    for i in range(n_comp):
+        phi = comp_r[i] / sum_r
+        phi_theta = phi * sum_q / comp_q[i]
+        phi_m = comp_r34[i] / sum_r34 if modified_mode else phi
+        out[i] = 1 - phi_m + np.log(phi_m) - 5 * comp_q[i] * (1 - phi_theta + np.log(phi_theta))
+
+    sum_theta = 0.0
+    for k in range(n_gr):
+        s = 0.0
+        for i in range(n_comp):
+            s += group_comp[i, k] * x[i]
+        theta[k] = s * group_Q[k]
+        sum_theta += theta[k]
+    for k in range(n_gr):
+        theta[k] /= sum_theta
+        theta_psi[k] = 0.0
+    for n in range(n_gr):
+        for m in range(n_gr):
+            theta_psi[m] += theta[n] * psi[n, m]
+    for m in range(n_gr):
+        theta_s[m] = theta[m] / theta_psi[m]
+
+    for k in range(n_gr):
+        s2 = 0.0
+        for m in range(n_gr):
+            s2 += psi[k, m] * theta_s[m]
+        # gamma_gr[k] - ln_gamma_pure is accumulated straight into every component
+        gamma_gr = group_Q[k] * (1 - np.log(theta_psi[k]) - s2)
+        for i in range(n_comp):
+            out[i] += group_comp[i, k] * (gamma_gr - ln_gamma_pure[i, k])
+
+
 @njit(cache=use_numba_cache)
 def get_comb_mod(conc: np.ndarray, comp_r: np.ndarray, comp_q: np.ndarray) -> np.ndarray:
     r"""Calculate combinatorial component :math:`\ln\gamma_i^c` using modified equation
@@ -482,20 +645,20 @@ def get_gamma_gr(conc: np.ndarray, n_gr: int, group_comp: np.ndarray[(np.any, np
     #     for j in range(n_main_gr):
     #         psi[i][j] = np.exp(np.sum(- res_matrix[i][j] * temps / T))
 
-    gamma_gr = np.zeros_like(theta)
-    for k in range(n_gr):
-        s1 = 0
+    # sum_n theta_n psi_nm does not depend on k, it is calculated once per composition, O(n_gr^2)
+    theta_psi = np.zeros(n_gr)
+    for n in range(n_gr):
         for m in range(n_gr):
-            s1 += theta[m] * psi[gr_id_local[m]][gr_id_local[k]]
+            theta_psi[m] += theta[n] * psi[gr_id_local[n]][gr_id_local[m]]
+    theta_s = theta / theta_psi
 
+    gamma_gr = np.zeros_like(theta)
+    for k in range(n_gr):
         s2 = 0
         for m in range(n_gr):
-            b = 0
-            for n in range(n_gr):
-                b += theta[n] * psi[gr_id_local[n]][gr_id_local[m]]
-            s2 += theta[m] * psi[gr_id_local[k]][gr_id_local[m]] / b
+            s2 += psi[gr_id_local[k]][gr_id_local[m]] * theta_s[m]
 
-        gamma_gr[k] = group_Q[k] * (1 - np.log(s1) - s2)
+        gamma_gr[k] = group_Q[k] * (1 - np.log(theta_psi[k]) - s2)
     return gamma_gr
 
 
@@ -23,7 +23,14 @@ To use UNIQUAC it's nessesary to set-up the model:
 UNIQUAC class
 ------------
 .. autoclass:: UNIQUAC
-    :members: __init__, get_a, get_y
+    :members: __init__, get_a, get_y, get_y_batch, get_lny_and_jacobian, set_cache_size, cache_info, cache_clear
+
+UNIQUAC64 class
+---------------
+Same interface as :obj:`.UNIQUAC` with float64 parameters, intermediates and results
+
+.. autoclass:: UNIQUAC64
+    :show-inheritance:
    
 """
 
@@ -31,10 +38,14 @@ from __future__ import annotations
 
 from pytherm.cpp import (
     ActivityModel,
+    ActivityModel64,
     UNIQUAC,
+    UNIQUAC64,
 )
 
 __all__ = [
     "ActivityModel",
+    "ActivityModel64",
     "UNIQUAC",
+    "UNIQUAC64",
 ]
@@ -1,3 +1,4 @@
 from .psrk import PSRK
 from .eos import EOS
 from .. import constants
+from pytherm.cpp import PSRK_UNIFAC
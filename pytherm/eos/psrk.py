@@ -1,13 +1,84 @@
-from math import exp, log, sqrt
+from collections import OrderedDict
+from math import acos, copysign, cos, log, pi, sqrt
 from pytherm import constants
-from pytherm.activity.activity_model import ActivityModel
+from pytherm.activity.activitymodel import ActivityModel
 import numpy as np
 from .eos import EOS
 R = constants.R
+A1 = -0.64663
+
+
+def mathias_copeman(T, Tc: np.ndarray, c: np.ndarray) -> np.ndarray:
+    r"""Mathias-Copeman alpha functions of all components
+
+    .. math::
+        \alpha_i = \left(1 + c_{1,i} d_i + c_{2,i} d_i^2 + c_{3,i} d_i^3\right)^2,
+        \quad d_i = 1 - \sqrt{T / T_{c,i}}
+
+    Above the critical temperature only the first term is used
+
+    Parameters
+    ----------
+    T : float | np.ndarray
+        Temperature, [K] or array of temperatures [n_T]
+    Tc : np.ndarray
+        Critical temperatures [n_comps], [K]
+    c : np.ndarray
+        Mathias-Copeman parameters [3, n_comps]
+
+    Returns
+    -------
+    np.ndarray
+        alpha [n_comps] or [n_T, n_comps]
+    """
+    T = np.asarray(T, dtype=np.float64)[..., None]
+    d = 1 - np.sqrt(T / Tc)
+    s = 1 + c[0] * d + np.where(T < Tc, (c[1] + c[2] * d) * d * d, 0)
+    return s * s
+
+
+def solve_cubic(a1: float, a2: float, a3: float) -> list[float]:
+    """Real roots of V^3 + a1 V^2 + a2 V + a3 = 0 in ascending order
+
+    Trigonometric form for three roots, Cardano otherwise,
+    every root is polished by Newton steps
+
+    Parameters
+    ----------
+    a1, a2, a3 : float
+        Coefficients
+
+    Returns
+    -------
+    list[float]
+        One or three roots
+    """
+    q = (a1 * a1 - 3 * a2) / 9
+    r = (2 * a1 ** 3 - 9 * a1 * a2 + 27 * a3) / 54
+    q3 = q ** 3
+    if r * r < q3:
+        theta = acos(r / sqrt(q3))
+        s = -2 * sqrt(q)
+        roots = sorted(s * cos((theta + k) / 3) - a1 / 3 for k in (0, 2 * pi, -2 * pi))
+    else:
+        u = -copysign((abs(r) + sqrt(r * r - q3)) ** (1 / 3), r)
+        roots = [u + (q / u if u != 0 else 0) - a1 / 3]
+    for i, v in enumerate(roots):
+        for _ in range(2):
+            df = (3 * v + 2 * a1) * v + a2
+            if df == 0:
+                break
+            v -= (((v + a1) * v + a2) * v + a3) / df
+        roots[i] = v
+    return roots
 
 
 class PSRK(EOS):
-    """Class for solving the Predictive Soave-Redlich-Kwong equation"""
+    """Class for solving the Predictive Soave-Redlich-Kwong equation
+
+    Component parameters are kept as arrays in the order of ``system``,
+    alpha and a_i are cached per temperature
+    """
 
     def __init__(self,
                  system: dict[str, float],
@@ -37,6 +108,17 @@ class PSRK(EOS):
         self.cr_params = cr_params
         self.omegas = omegas
 
+        self.names = list(system)
+        self.Tc = np.array([cr_params[i]['Tc'] for i in self.names], dtype=np.float64)
+        self.Pc = np.array([cr_params[i]['Pc'] for i in self.names], dtype=np.float64)
+        self.mc = np.array([[ms_params[i][k] for i in self.names] for k in ('c1', 'c2', 'c3')],
+                           dtype=np.float64)
+        self.b_i = 0.08664 * R * self.Tc / self.Pc
+        self.a_c = 0.42748 * R ** 2 * self.Tc ** 2 / self.Pc
+
+        self.cache_size = 8
+        self.__cache = OrderedDict()
+
         self.bi = self.get_bi()
 
     def get_p(self, system: dict[str, float], T: float, V: float) -> float:
@@ -56,14 +138,87 @@ class PSRK(EOS):
         float
             Pressure, [Pa]
         """
-        alphas = self.get_alphas(T)
-        ai = self.get_ai(alphas)
-        ge = self.get_ge(system, T)
-
-        b = self.get_b(system)
-        a = self.get_a(system, T, b, ai, ge)
+        x = self.to_array(system)
+        b = x @ self.b_i
+        a = self.__get_a(x, T, b, self.get_ge(system, T))
         return (R * T) / (V - b) - a / (V * (V + b))
 
+    def to_array(self, system: dict[str, float]) -> np.ndarray:
+        """Concentrations in the order of components of the model
+
+        Parameters
+        ----------
+        system : dict[str, float]
+            Dictionary with component concentrations
+
+        Returns
+        -------
+        np.ndarray
+            Concentrations [n_comps]
+        """
+        return np.array([system[i] for i in self.names], dtype=np.float64)
+
+    def get_alpha_array(self, T) -> np.ndarray:
+        """Mathias-Copeman alpha coefficients as an array
+
+        Parameters
+        ----------
+        T : float | np.ndarray
+            Temperature, [K] or array of temperatures [n_T]
+
+        Returns
+        -------
+        np.ndarray
+            alpha [n_comps] or [n_T, n_comps]
+        """
+        if np.ndim(T):
+            return mathias_copeman(T, self.Tc, self.mc)
+        return self.__get_state(T)[0]
+
+    def get_ai_array(self, T) -> np.ndarray:
+        """a_i coefficients as an array
+
+        Parameters
+        ----------
+        T : float | np.ndarray
+            Temperature, [K] or array of temperatures [n_T]
+
+        Returns
+        -------
+        np.ndarray
+            a_i [n_comps] or [n_T, n_comps]
+        """
+        if np.ndim(T):
+            return self.a_c * mathias_copeman(T, self.Tc, self.mc)
+        return self.__get_state(T)[1]
+
+    def set_cache_size(self, maxsize: int):
+        """Set the maximum number of temperatures with cached alpha and a_i
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of cached temperatures, by default 8
+        """
+        self.cache_size = maxsize
+        while len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+
+    def __get_state(self, T: float) -> tuple:
+        """alpha, a_i and a_i / (b_i R T) for T from cache or calculated"""
+        st = self.__cache.get(T)
+        if st is not None:
+            self.__cache.move_to_end(T)
+            return st
+        alpha = mathias_copeman(T, self.Tc, self.mc)
+        ai = self.a_c * alpha
+        st = (alpha, ai, ai / (self.b_i * R * T))
+        if self.cache_size > 0:
+            self.__cache[T] = st
+            if len(self.__cache) > self.cache_size:
+                self.__cache.popitem(last=False)
+        return st
+
     def get_alphas(self, T: float) -> dict[str, float]:
         """Calculate alpha coefficients using Mathias-Copeman equation
 
@@ -77,23 +232,7 @@ class PSRK(EOS):
         dict[str, float]
             alpha coefficients
         """
-        alphas = {}
-        for i in self.system:
-            Tr = T / self.cr_params[i]['Tc']
-            sqrt_T = sqrt(Tr)
-            if Tr < 1:
-                c1 = self.ms_params[i]['c1']
-                c2 = self.ms_params[i]['c2']
-                c3 = self.ms_params[i]['c3']
-                alphas[i] = (1
-                             + c1 * (1 - sqrt_T)
-                             + c2 * (1 - sqrt_T) ** 2
-                             + c3 * (1 - sqrt_T) ** 3) ** 2
-            else:
-                c1 = self.ms_params[i]['c1']
-                alphas[i] = (1
-                             + c1 * (1 - sqrt_T)) ** 2
-        return alphas
+        return dict(zip(self.names, self.__get_state(T)[0].tolist()))
 
     def get_ai(self, alphas: dict[str, float]) -> dict[str, float]:
         """Calculate a_i coefficient for each component in system
@@ -108,12 +247,8 @@ class PSRK(EOS):
         dict[str, float]
             a_i coefficient for each component in system
         """
-        ai = {}
-        for i in self.system:
-            Tc = self.cr_params[i]['Tc']
-            Pc = self.cr_params[i]['Pc']
-            ai[i] = 0.42748 * R ** 2 * Tc ** 2 * alphas[i] / Pc
-        return ai
+        ai = self.a_c * self.to_array(alphas)
+        return dict(zip(self.names, ai.tolist()))
 
     def get_bi(self) -> dict[str, float]:
         """Calculate b_i coefficient for each component in system.
@@ -124,19 +259,14 @@ class PSRK(EOS):
         dict[str, float]
             b_i coefficient for each component in system
         """
-        bi = {}
-        for i in self.system:
-            Tc = self.cr_params[i]['Tc']
-            Pc = self.cr_params[i]['Pc']
-            bi[i] = 0.08664 * R * Tc / Pc
-        return bi
+        return dict(zip(self.names, self.b_i.tolist()))
 
     def get_a(self, system: dict[str, float],
               T: float,
               b: float,
               ai: dict[str, float],
               ge: float,
-              A=-0.64663) -> float:
+              A=A1) -> float:
         """Calculate a parameter for SRK using modified Huron-Vidal mixing rule
 
         Parameters
@@ -159,15 +289,17 @@ class PSRK(EOS):
         float
             a parameter for SRK
         """
-        bi = self.bi
-        s1 = 0
-        s2 = 0
-        for i in self.system:
-            s1 += system[i] * ai[i] / bi[i]
-            s2 += system[i] * log(b / bi[i])
-
+        x = self.to_array(system)
+        s1 = x @ (self.to_array(ai) / self.b_i)
+        s2 = x @ np.log(b / self.b_i)
         return b * (ge / A + s1 + R * T / A * s2)
 
+    def __get_a(self, x: np.ndarray, T: float, b: float, ge: float) -> float:
+        """get_a with cached a_i and array concentrations"""
+        # sum x_i a_i / b_i = R T sum x_i alp_i
+        alp = self.__get_state(T)[2]
+        return b * (ge / A1 + R * T * (x @ (alp + np.log(b / self.b_i) / A1)))
+
     def get_b(self, system: dict[str, float]) -> float:
         """Calculate b parameter for SQR equation using linear mixing rule
 
@@ -181,11 +313,7 @@ class PSRK(EOS):
         float
             b parameter for SQR equation
         """
-        bi = self.bi
-        b = 0
-        for i in self.system:
-            b += system[i] * bi[i]
-        return b
+        return float(self.to_array(system) @ self.b_i)
 
     def get_ge(self, system: dict[str, float], T: float) -> float:
         """_summary_
@@ -221,12 +349,9 @@ class PSRK(EOS):
         tuple
             (a1, a2, a3)
         """
-        alphas = self.get_alphas(T)
-        ai = self.get_ai(alphas)
-        ge = self.get_ge(system, T)
-
-        b = self.get_b(system)
-        a = self.get_a(system, T, b, ai, ge)
+        x = self.to_array(system)
+        b = x @ self.b_i
+        a = self.__get_a(x, T, b, self.get_ge(system, T))
 
         return (1,
                 - R * T / P,
@@ -250,16 +375,11 @@ class PSRK(EOS):
         tuple
             One or two roots
         """
-        cs = self.get_cubic_coef(system=system, T=T, P=P)
-        r = np.roots(cs)
-        out = []
-        for i in r:
-            if i.imag == 0:
-                out.append(i)
-        if len(out) == 1:
-            return [float(out[0])]
-        else:
-            return [float(min(r)), float(max(r))]
+        _, a1, a2, a3 = self.get_cubic_coef(system=system, T=T, P=P)
+        r = solve_cubic(a1, a2, a3)
+        if len(r) == 1:
+            return r
+        return [r[0], r[-1]]
 
     def get_f(self,
               system: dict[str, float],
@@ -284,48 +404,22 @@ class PSRK(EOS):
         dict[str, float]
             Dictionary with fugacity coefficients for all components
         """
-        alphas = self.get_alphas(T)
-        ai = self.get_ai(alphas)
-        bi = self.get_bi()
-
-        alp = {}
-        for i in system:
-            alp[i] = ai[i] / (bi[i] * R * T)
-
-        b = self.get_b(system)
+        x = self.to_array(system)
+        bi = self.b_i
+        alp = self.__get_state(T)[2]
+        b = x @ bi
 
         yi = self.activity_model.get_y(system, T)
-        ge_RT = self.activity_model.get_ge_RT(system, T)
-        al = self.__get_al(system, ge_RT, b, bi, alp)
-
-        der_ai = self.__get_der_ai(yi, b, bi, alp)
-
-        def f(v):
-            lnf = {}
-            for i in system:
-                lnf[i] = (log(R * T / (P * (v - b)))
-                          + (1 / (v - b) - al/(v + b)) * bi[i]
-                          - der_ai[i] * log((v + b) / v))
-            fi = {}
-            for i in lnf:
-                fi[i] = exp(lnf[i])
-            return fi
-        return f(V)
-
-    def __get_der_ai(self, y, b, bi, alp, A=-0.64663):
-        der_ai = {}
-        for i in y:
-            der_ai[i] = 1 / A * (log(y[i]) + log(b / bi[i]) +
-                                 bi[i] / b - 1) + alp[i]
-        return der_ai
-
-    def __get_al(self, system, ge_RT, b, bi, alp, A=-0.64663):
-        s1 = 0
-        s2 = 0
-        for i in bi:
-            s1 += system[i] * log(b / bi[i])
-            s2 += system[i] * alp[i]
-        return 1 / A * (ge_RT + s1) + s2
+        lny = np.log(self.to_array(yi))
+        ln_b = np.log(b / bi)
+        # G^E / RT = sum x_i ln y_i, no second call to the activity model
+        al = x @ ((lny + ln_b) / A1 + alp)
+        der_ai = (lny + ln_b + bi / b - 1) / A1 + alp
+
+        lnf = (log(R * T / (P * (V - b)))
+               + (1 / (V - b) - al / (V + b)) * bi
+               - der_ai * log((V + b) / V))
+        return dict(zip(self.names, np.exp(lnf).tolist()))
 
     def get_system(self):
         return self.system
@@ -1,7 +1,42 @@
 import numpy as np
 
-
-def find_eq(n0, r_mat, K, T, P, ftol=1e-12, fabs=1e-4, k_lim=10):
+from .solver import Bisection, Solver
+
+
+def find_eq(n0, r_mat, K, T, P, ftol=1e-12, fabs=1e-4, k_lim=10, solver: Solver = None, full_output=False,
+            verbose=False):
+    """Equilibrium amounts of an ideal gas mixture
+
+    Parameters
+    ----------
+    n0 : np.ndarray
+        Initial amounts of substances
+    r_mat : np.ndarray
+        Reaction matrix [n_reactions, n_substances]
+    K : np.ndarray
+        Equilibrium constants of the reactions
+    T : float
+        Temperature, [K]
+    P : float
+        Pressure
+    ftol : float, optional
+        Relative change of the residual ending the bisection of one extent, by default 1e-12
+    fabs : float, optional
+        Tolerance on the sum of abs ln(product / K), by default 1e-4
+    k_lim : int, optional
+        Reactions with K below 10^-k_lim or above 10^k_lim are completed beforehand, by default 10
+    solver : Solver, optional
+        Backend of :mod:`pytherm.solver`, by default :class:`Bisection` with fabs and ftol
+    full_output : bool, optional
+        Also return the :class:`SolverResult`, by default False
+    verbose : bool, optional
+        Print the extents, residuals and amounts of the solution, by default False
+
+    Returns
+    -------
+    np.ndarray | tuple[np.ndarray, SolverResult]
+        Equilibrium amounts
+    """
     def get_n(ksi):
         n = np.full(len(n0), 0.0)
         for i in range(len(n0)):
@@ -73,61 +108,24 @@ def find_eq(n0, r_mat, K, T, P, ftol=1e-12, fabs=1e-4, k_lim=10):
     #     if abs(K[i]) > 10 ** k_lim or abs(K[i]) < 10 ** (- k_lim):
     #         is_optimize[i] = False
 
-    ksi = np.full(len(K), 0, dtype=float)
-    while (1):
-        f = fi(ksi)
-        print("F = ", f)
-        print("ksi = ", ksi)
-
-        if np.sum(f) < fabs:
-            break
-
-        # поиск реакции с мах f
-        v = 0
-        ri = 0
-        for i in range(len(f)):
-            if f[i] > v:
-                v = f[i]
-                ri = i
-
-        # расчет n при ksi[i] = 0
-        p_ksi = ksi
-        p_ksi[ri] = 0
-        r_l = get_rl(p_ksi, ri)
-        r_r = get_rr(p_ksi, ri)
-        rs = np.array((r_l, 0, r_r))
-
-        # начало оптимизации
-        vals_u = np.array((0.0, 0.0))
-        while (1):
-            rs[1] = (rs[0] + rs[2]) / 2
-            p_ksi[ri] = rs[1]
-            # print("F = ", fi(p_ksi))
-            # print("Ksi = ", p_ksi)
-            res = (K - get_pr(p_ksi))
-            vals_u[1] = vals_u[0]
-            vals_u[0] = fi(p_ksi)[ri]
-
-            if res[ri] < 0:
-                rs[2] = rs[1]
-            else:
-                rs[0] = rs[1]
-
-            if vals_u[0] == 0:
-                ksi[ri] = rs[1]
-                break
-            if vals_u[0] < fabs / 10:
-                ksi[ri] = rs[1]
-                break
-            tol = np.abs((vals_u[0] - vals_u[1]) / vals_u[0])
-            if tol < ftol:
-                ksi[ri] = rs[1]
-                break
-
-    print("________________DONE__________________________")
-    print("KSI =\n", ksi)
-    print("F final =\n", fi(ksi))
-    print("K =\n", K)
-    print("PR final =\n", get_pr(ksi))
-    print("Ns =\n", get_n(ksi))
+    def get_residuals(ksi):
+        return np.log(get_pr(ksi)) - np.log(K)
+
+    def get_bounds(ksi, ri):
+        return get_rl(ksi, ri), get_rr(ksi, ri)
+
+    if solver is None:
+        solver = Bisection(tol=fabs, ftol=ftol)
+    res = solver.solve(get_residuals, get_bounds, np.zeros(len(K)))
+    ksi = res.x
+
+    if verbose:
+        print("________________DONE__________________________")
+        print("KSI =\n", ksi)
+        print("F final =\n", fi(ksi))
+        print("K =\n", K)
+        print("PR final =\n", get_pr(ksi))
+        print("Ns =\n", get_n(ksi))
+    if full_output:
+        return get_n(ksi), res
     return get_n(ksi)
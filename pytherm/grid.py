@@ -0,0 +1,248 @@
+"""
+This module contains composition grids on the simplex and chunked
+evaluation of activity models over them.
+
+How to use
+----------
+Grid points are generated as arrays, chunk by chunk, and passed to
+:meth:`get_y_batch` of the model, so grids with millions of points
+are evaluated without per-point Python objects:
+    >>> import pytherm.activity.unifac as uf
+    >>> from pytherm import grid
+    >>> substances = uf.SubstancesUNIFAC()
+    >>> substances.get_from_dict({
+    ...    "hexane": "2*CH3 4*CH2",
+    ...    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    ...    "water": "1*H2O",
+    ... })
+    >>> am = uf.UNIFAC64(uf.datasets.DOR(), substances)
+    >>> x, y, a, ge_rt = grid.evaluate(am, n_comps=3, n_div=1000, T=298, n_threads=0)
+    >>> x.shape
+    (501501, 3)
+
+For grids that do not fit in memory the results can be consumed chunk by chunk:
+    >>> for x, y, a, ge_rt in grid.iter_evaluate(am, grid.iter_simplex_grid(4, 200), T=298):
+    ...     pass
+
+Grid
+----
+.. autofunction:: get_n_points
+.. autofunction:: simplex_grid
+.. autofunction:: iter_simplex_grid
+
+Evaluation
+----------
+.. autofunction:: evaluate
+.. autofunction:: iter_evaluate
+"""
+from __future__ import annotations
+
+from math import comb
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from pytherm.activity.activitymodel import ActivityModel, ActivityModel64
+
+__all__ = [
+    "get_n_points",
+    "simplex_grid",
+    "iter_simplex_grid",
+    "evaluate",
+    "iter_evaluate",
+]
+
+
+def get_n_points(n_comps: int, n_div: int) -> int:
+    """Number of points of the simplex grid
+
+    Parameters
+    ----------
+    n_comps : int
+        Number of components
+    n_div : int
+        Number of divisions of every composition axis
+
+    Returns
+    -------
+    int
+        Number of points
+    """
+    return comb(n_div + n_comps - 1, n_comps - 1)
+
+
+def _get_lattice(n_comps: int, total: int) -> np.ndarray:
+    """All non-negative integer vectors of length n_comps with the sum total,
+    in lexicographically descending order"""
+    k = np.array([[total]], dtype=np.int64)  # last column holds the remainder
+    for _ in range(n_comps - 1):
+        rest = k[:, -1]
+        counts = rest + 1
+        starts = np.cumsum(counts) - counts
+        row = np.repeat(np.arange(len(k)), counts)
+        first = rest[row] - (np.arange(counts.sum()) - starts[row])
+        k = np.column_stack((k[row, :-1], first, rest[row] - first))
+    return k
+
+
+def _to_fractions(k, n_div, eps, dtype):
+    x = k.astype(np.float64) / n_div
+    if eps:
+        x = eps + (1 - k.shape[1] * eps) * x
+    return x.astype(dtype)
+
+
+def simplex_grid(n_comps: int, n_div: int, eps: float = 0.0, dtype=np.float64) -> np.ndarray:
+    r"""Regular grid on the composition simplex
+
+    .. math::
+        x_i = \varepsilon + (1 - n\varepsilon) \frac{k_i}{n_{div}}, \quad \sum_i k_i = n_{div}
+
+    Parameters
+    ----------
+    n_comps : int
+        Number of components
+    n_div : int
+        Number of divisions of every composition axis
+    eps : float, optional
+        Minimal molar fraction to keep points off the simplex boundary, by default 0
+    dtype : optional
+        Array dtype, by default np.float64
+
+    Returns
+    -------
+    np.ndarray
+        Compositions [n_points, n_comps], [molar fraction]
+    """
+    return _to_fractions(_get_lattice(n_comps, n_div), n_div, eps, dtype)
+
+
+def iter_simplex_grid(n_comps: int, n_div: int, chunk_size: int = 65536,
+                      eps: float = 0.0, dtype=np.float64) -> Iterator[np.ndarray]:
+    """Same points as :func:`simplex_grid`, generated in chunks
+
+    Only one slice of the grid with a fixed first component is kept in memory at once
+
+    Parameters
+    ----------
+    n_comps : int
+        Number of components
+    n_div : int
+        Number of divisions of every composition axis
+    chunk_size : int, optional
+        Maximum number of points in a chunk, by default 65536
+    eps : float, optional
+        Minimal molar fraction, by default 0
+    dtype : optional
+        Array dtype, by default np.float64
+
+    Yields
+    ------
+    np.ndarray
+        Compositions [<= chunk_size, n_comps], [molar fraction]
+    """
+    if n_comps < 2:
+        yield _to_fractions(_get_lattice(n_comps, n_div), n_div, eps, dtype)
+        return
+    buffer = []
+    size = 0
+    for k1 in range(n_div, -1, -1):
+        rest = _get_lattice(n_comps - 1, n_div - k1)
+        k = np.column_stack((np.full(len(rest), k1), rest))
+        for start in range(0, len(k), chunk_size):
+            part = k[start:start + chunk_size]
+            buffer.append(part)
+            size += len(part)
+            if size >= chunk_size:
+                k_chunk = np.concatenate(buffer)
+                yield _to_fractions(k_chunk[:chunk_size], n_div, eps, dtype)
+                buffer = [k_chunk[chunk_size:]]
+                size = len(buffer[0])
+    if size:
+        yield _to_fractions(np.concatenate(buffer), n_div, eps, dtype)
+
+
+def _model_dtype(model):
+    return np.float64 if isinstance(model, ActivityModel64) else np.float32
+
+
+def iter_evaluate(model: ActivityModel | ActivityModel64, chunks: Iterable[np.ndarray], T: float,
+                  n_threads: int = 1) -> Iterator[tuple]:
+    r"""Evaluate an activity model over chunks of compositions
+
+    Every chunk is passed to :meth:`get_y_batch` of the model as one array
+
+    Parameters
+    ----------
+    model : ActivityModel | ActivityModel64
+        Activity model
+    chunks : Iterable[np.ndarray]
+        Compositions [n_points, n_comps], [molar fraction]
+    T : float
+        Temperature, [K]
+    n_threads : int, optional
+        Number of threads of :meth:`get_y_batch`, 0 to use all cores, by default 1
+
+    Yields
+    ------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        x, :math:`\gamma`, activities [n_points, n_comps] and :math:`G^E/RT` [n_points]
+    """
+    dtype = _model_dtype(model)
+    for x in chunks:
+        x = np.ascontiguousarray(x, dtype=dtype)
+        y = np.asarray(model.get_y_batch(x, T, n_threads))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_lny = np.where(x > 0, x * np.log(y, dtype=np.float64), 0.0)
+        yield x, y, x * y, x_lny.sum(axis=1)
+
+
+def evaluate(model: ActivityModel | ActivityModel64, n_comps: int, n_div: int, T: float,
+             eps: float = 0.0, chunk_size: int = 65536, n_threads: int = 1) -> tuple:
+    r"""Evaluate an activity model over the simplex grid
+
+    .. math::
+        a_i = x_i \gamma_i, \quad \frac{G^E}{RT} = \sum_i x_i \ln \gamma_i
+
+    Results are written to preallocated arrays chunk by chunk, intermediates
+    never exceed chunk_size points
+
+    Parameters
+    ----------
+    model : ActivityModel | ActivityModel64
+        Activity model with n_comps components
+    n_comps : int
+        Number of components
+    n_div : int
+        Number of divisions of every composition axis
+    T : float
+        Temperature, [K]
+    eps : float, optional
+        Minimal molar fraction, by default 0
+    chunk_size : int, optional
+        Number of points per :meth:`get_y_batch` call, by default 65536
+    n_threads : int, optional
+        Number of threads of :meth:`get_y_batch`, 0 to use all cores, by default 1
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        x, :math:`\gamma`, activities [n_points, n_comps] and :math:`G^E/RT` [n_points]
+    """
+    dtype = _model_dtype(model)
+    n_points = get_n_points(n_comps, n_div)
+    x = np.empty((n_points, n_comps), dtype=dtype)
+    y = np.empty((n_points, n_comps), dtype=dtype)
+    a = np.empty((n_points, n_comps), dtype=dtype)
+    ge_rt = np.empty(n_points, dtype=np.float64)
+
+    chunks = iter_simplex_grid(n_comps, n_div, chunk_size, eps, dtype)
+    start = 0
+    for x_c, y_c, a_c, ge_c in iter_evaluate(model, chunks, T, n_threads):
+        end = start + len(x_c)
+        x[start:end] = x_c
+        y[start:end] = y_c
+        a[start:end] = a_c
+        ge_rt[start:end] = ge_c
+        start = end
+    return x, y, a, ge_rt
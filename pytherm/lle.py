@@ -1,15 +1,23 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from math import log, log10
+from threading import Lock
+import numpy as np
 from pytherm import constants
-from .solver import minimize
-from pytherm.activity.activitymodel import ActivityModel
+from .solver import Bisection, Solver
+from pytherm.activity.activitymodel import ActivityModel, ActivityModel64
 
 R = constants.R
 
 
 def get_yinf(activity_model: ActivityModel,
              system: dict[str, float],
-             comp_name: str) -> float:
-    """Calculate activity coefficient at infinity dilution
+             comp_name: str,
+             T=298.0) -> float:
+    """Calculate activity coefficient at infinity dilution,
+    see :class:`pytherm.screening.Screening` for many solutes and solvents
 
     Parameters
     ----------
@@ -19,6 +27,8 @@ def get_yinf(activity_model: ActivityModel,
         Input dictionary {"Substance name": concentration}
     comp_name : str
         name of target component from ph
+    T : float, optional
+        Temperature, [K], by default 298.0
 
     Returns
     -------
@@ -34,14 +44,15 @@ def get_yinf(activity_model: ActivityModel,
     n[comp_name] = n_comp
     for i in system:
         x[i] = n[i] / n_ph
-    y = activity_model.get_y(x)
+    y = activity_model.get_y(x, T=T)
     return y[comp_name]
 
 
 def get_k_molar(activity_model: ActivityModel,
                 system1: dict[str, float],
                 system2: dict[str, float],
-                comp_name: str) -> float:
+                comp_name: str,
+                T=298.0) -> float:
     """Calculate partition coefficient using molar fraction
 
     Parameters
@@ -54,14 +65,16 @@ def get_k_molar(activity_model: ActivityModel,
         component dictionary for phase 2
     comp_name : str
         target component name
+    T : float, optional
+        Temperature, [K], by default 298.0
 
     Returns
     -------
     float
         partition coefficient
     """
-    phase1_y = get_yinf(activity_model, system1, comp_name)
-    phase2_y = get_yinf(activity_model, system2, comp_name)
+    phase1_y = get_yinf(activity_model, system1, comp_name, T)
+    phase2_y = get_yinf(activity_model, system2, comp_name, T)
     return phase2_y / phase1_y
 
 
@@ -69,7 +82,8 @@ def get_kp(activity_model: ActivityModel,
            system1: dict[str, float],
            system2: dict[str, float],
            molar_volumes: dict[str, float],
-           comp_name: str) -> float:
+           comp_name: str,
+           T=298.0) -> float:
     """Calculate partition coefficient
 
     Parameters
@@ -84,6 +98,8 @@ def get_kp(activity_model: ActivityModel,
         molar volume dictionary
     comp_name : str
         target component name
+    T : float, optional
+        Temperature, [K], by default 298.0
 
     Returns
     -------
@@ -96,9 +112,8 @@ def get_kp(activity_model: ActivityModel,
         if i != comp_name:
             v1 += system1[i] / molar_volumes[i]
             v2 += system2[i] / molar_volumes[i]
-    kexp = get_k_molar(activity_model, system1, system2, comp_name)
+    kexp = get_k_molar(activity_model, system1, system2, comp_name, T)
     rez = kexp * v2 / v1
-    print("V2/V1 = ", v2 / v1)
     return rez
 
 
@@ -127,7 +142,37 @@ def calculate_solubility(activity_model: ActivityModel,
                          H_m: float,
                          bounds=(1e-20, 0.99),
                          ftol=1e-18,
-                         fabs=1e-10):
+                         fabs=1e-10,
+                         max_iter=200):
+    """Solubility of a solid in a binary system by bisection,
+    see :func:`get_solubility` for arrays of temperatures and solvents
+
+    Parameters
+    ----------
+    activity_model : ActivityModel
+        Model with get_y(phase, T) of dicts
+    comp_name : list[str]
+        Names of the solvent and the solute
+    T : float
+        Temperature, [K]
+    T_m : float
+        Melting temperature of the solute, [K]
+    H_m : float
+        Enthalpy of melting of the solute, [J/mol]
+    bounds : tuple, optional
+        Range of the molar fraction of the solute, by default (1e-20, 0.99)
+    ftol : float, optional
+        Width of the range to stop, by default 1e-18
+    fabs : float, optional
+        Tolerance on ln(x y) of the solute, by default 1e-10
+    max_iter : int, optional
+        Maximum number of bisections, by default 200
+
+    Returns
+    -------
+    float
+        Molar fraction of the solute
+    """
     phase = {}
     phase[comp_name[0]] = 1
     phase[comp_name[1]] = 0
@@ -142,26 +187,218 @@ def calculate_solubility(activity_model: ActivityModel,
         y = activity_model.get_y(phase, T=T)
         return (log(phase[comp_name[1]] * y[comp_name[1]]) - lnx)
 
-    while (1):
+    # one evaluation per bisection, the value at a is kept
+    f_a = f(a)
+    for _ in range(max_iter):
         x = (a + b) / 2
-        if f(x) * f(a) < 0:
+        f_x = f(x)
+        if abs(f_x) < fabs:
+            break
+        if f_x * f_a < 0:
             b = x
-        elif f(x) * f(b) < 0:
-            a = x
-        if abs(b - a) < ftol or abs(f(x)) < fabs:
+        else:
+            a, f_a = x, f_x
+        if abs(b - a) < ftol:
             break
     return x
 
 
+def get_solubility(activity_model: ActivityModel | ActivityModel64,
+                   solutes,
+                   T,
+                   T_m,
+                   H_m,
+                   solvents,
+                   x_min=1e-20,
+                   x_max=1 - 1e-9,
+                   tol=1e-10,
+                   max_iter=100,
+                   warm_start=True,
+                   n_threads=1) -> dict:
+    r"""Solubility curves of solids in solvent mixtures
+
+    The molar fraction :math:`x_s` of every solute in every solvent satisfies
+
+    .. math::
+        \ln x_s + \ln \gamma_s(x) = \frac{\Delta H_m}{R} \left(\frac{1}{T_m} - \frac{1}{T}\right),
+        \quad x = (1 - x_s) w + x_s e_s
+
+    with the solute free solvent composition w. All pairs of solutes and solvents are
+    solved together, one :meth:`get_y_batch` call per iteration.
+    Secant iterations on :math:`\ln x_s` are kept within a bracket of the root and
+    fall back to bisection. The first temperature starts from infinite dilution to find
+    the smallest root, every next one from the previous root shifted by the change of
+    the ideal solubility, so a curve follows one branch of solutions
+
+    Parameters
+    ----------
+    activity_model : ActivityModel | ActivityModel64
+        Model with get_y_batch
+    solutes : list[int]
+        Indexes of the solutes [n_solutes]
+    T : np.ndarray
+        Temperatures [n_T], [K], ordered for warm start
+    T_m : np.ndarray
+        Melting temperatures of the solutes [n_solutes], [K]
+    H_m : np.ndarray
+        Enthalpies of melting of the solutes [n_solutes], [J/mol]
+    solvents : np.ndarray
+        Solvent compositions [n_solvents, n_comps] or [n_comps], the fraction
+        of the solute itself is dropped
+    x_min : float, optional
+        Lower bound of the solubility, by default 1e-20
+    x_max : float, optional
+        Upper bound of the solubility, by default 1 - 1e-9
+    tol : float, optional
+        Tolerance on the equation above, by default 1e-10,
+        models in single precision converge to about 1e-5
+    max_iter : int, optional
+        Maximum number of iterations at one temperature, by default 100
+    warm_start : bool, optional
+        Start from the previous temperature, by default True
+    n_threads : int, optional
+        Number of threads of :meth:`get_y_batch`, by default 1
+
+    Returns
+    -------
+    dict
+        "T" [n_T], "x" solubilities [n_solutes, n_solvents, n_T] in molar fractions,
+        NaN above the melting temperature, "converged" and "n_iter" of the same shape,
+        "n_eval" number of :meth:`get_y_batch` calls
+    """
+    solutes = np.atleast_1d(np.asarray(solutes, dtype=np.int64))
+    T = np.atleast_1d(np.asarray(T, dtype=np.float64))
+    T_m = np.broadcast_to(np.asarray(T_m, dtype=np.float64), solutes.shape)
+    H_m = np.broadcast_to(np.asarray(H_m, dtype=np.float64), solutes.shape)
+    solvents = np.atleast_2d(np.asarray(solvents, dtype=np.float64))
+    n_solutes, n_solvents, n_T = len(solutes), len(solvents), len(T)
+    n_comps = solvents.shape[1]
+    dtype = np.float64 if isinstance(activity_model, ActivityModel64) else np.float32
+    if dtype == np.float32:
+        tol = max(tol, 1e-5)
+
+    # every point is a pair of a solute and a solvent
+    s = np.repeat(solutes, n_solvents)
+    w = np.tile(solvents, (n_solutes, 1))
+    w[np.arange(len(s)), s] = 0
+    w_sum = w.sum(axis=1)
+    if np.any(w_sum <= 0):
+        raise ValueError("solvent of a solute must contain other components")
+    w /= w_sum[:, None]
+    e = np.zeros_like(w)
+    e[np.arange(len(s)), s] = 1
+    n_points = len(s)
+    points = np.arange(n_points)
+
+    x = np.full((n_points, n_T), np.nan)
+    converged = np.zeros((n_points, n_T), dtype=bool)
+    n_iter = np.zeros((n_points, n_T), dtype=np.int64)
+    n_eval = 0
+    u_lo, u_hi = log(x_min), log(x_max)
+    u_prev = None
+    slope = np.ones(n_points)
+    lnx_prev = None
+
+    for k in range(n_T):
+        lnx_ideal = np.repeat(H_m / R * (1 / T_m - 1 / T[k]), n_solvents)
+        solid = lnx_ideal < 0
+        if warm_start and u_prev is not None:
+            u = np.where(np.isfinite(u_prev), u_prev + lnx_ideal - lnx_prev, lnx_ideal)
+        else:
+            # the first step from infinite dilution goes to ln x_ideal - ln y_inf,
+            # below the solubility if the solute demixes from the solvent
+            u = np.full(n_points, u_lo)
+            slope = np.ones(n_points)
+        u = np.clip(u, u_lo, u_hi)
+        a = np.full(n_points, u_lo)
+        b = np.full(n_points, u_hi)
+        g_old = np.full(n_points, np.nan)
+        u_old = np.full(n_points, np.nan)
+        active = solid.copy()
+        for it in range(1, max_iter + 1):
+            idx = points[active]
+            if not len(idx):
+                break
+            x_s = np.exp(u[idx])
+            conc = (1 - x_s)[:, None] * w[idx] + x_s[:, None] * e[idx]
+            y = np.asarray(activity_model.get_y_batch(np.ascontiguousarray(conc, dtype=dtype), T[k], n_threads))
+            n_eval += 1
+            g = u[idx] + np.log(y[np.arange(len(idx)), s[idx]], dtype=np.float64) - lnx_ideal[idx]
+            n_iter[idx, k] = it
+            done = np.abs(g) < tol
+            converged[idx[done], k] = True
+
+            # the root stays between a (g < 0) and b (g > 0)
+            neg = g < 0
+            a[idx[neg]] = u[idx[neg]]
+            b[idx[~neg]] = u[idx[~neg]]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                secant = (g - g_old[idx]) / (u[idx] - u_old[idx])
+            ok = np.isfinite(secant) & (secant > 0)
+            slope[idx[ok]] = secant[ok]
+            g_old[idx] = g
+            u_old[idx] = u[idx]
+            u_new = u[idx] - g / slope[idx]
+            out = ~((a[idx] < u_new) & (u_new < b[idx]))
+            u_new[out] = (a[idx] + b[idx])[out] / 2
+            narrow = b[idx] - a[idx] < 1e-14
+            # a root at the bounds is not a solution
+            converged[idx[narrow & (a[idx] > u_lo) & (b[idx] < u_hi)], k] = True
+            u[idx[~done]] = u_new[~done]
+            active[idx[done | narrow]] = False
+        x[solid, k] = np.exp(u[solid])
+        u_prev = np.where(converged[:, k], u, np.nan)
+        lnx_prev = lnx_ideal
+
+    shape = (n_solutes, n_solvents, n_T)
+    return {
+        "T": T,
+        "x": x.reshape(shape),
+        "converged": converged.reshape(shape),
+        "n_iter": n_iter.reshape(shape),
+        "n_eval": n_eval,
+    }
+
+
 def find_lle(
         phase1: dict[str, float],
         phase2,
         activity_model,
-        solver=minimize,
+        solver: Solver = None,
         T=298.0,
         min_ksi=1e-8,
-        notifier=lle_notifier
+        notifier=lle_notifier,
+        full_output=False,
 ):
+    """Equilibrium of two liquid phases by transfer of components ph1 -> ph2
+
+    Parameters
+    ----------
+    phase1 : dict[str, float]
+        Amounts of components in the first phase, {"Substance name": n}
+    phase2 : dict[str, float] | None
+        Amounts in the second phase, None to start from the second most
+        abundant component of phase1
+    activity_model : ActivityModel
+        Model with get_y(phase, T) of dicts
+    solver : Solver, optional
+        Backend of :mod:`pytherm.solver`, by default :class:`Bisection` with tol 1e-5
+    T : float, optional
+        Temperature, [K], by default 298.0
+    min_ksi : float, optional
+        Smallest amount of a component left in a phase, by default 1e-8
+    notifier : Callable, optional
+        notifier(error, phase1, phase2) of the converged solution, by default prints it
+    full_output : bool, optional
+        Also return the :class:`SolverResult`, by default False
+
+    Returns
+    -------
+    tuple[dict, dict] | tuple[dict, dict, SolverResult]
+        Molar fractions of the phases, None if the solver did not converge
+    """
+    if solver is None:
+        solver = Bisection(tol=1e-5)
     # ph1 -> ph2
     components = list(phase1.keys())  # components list
     comp_number = len(components)  # number of components
@@ -229,10 +466,407 @@ def find_lle(
             lg[i] = log(a2[i] / a1[i])
         return lg
 
-    f = solver(get_loga, bounds)
-    if f[0]:
+    res = solver.solve(get_loga, bounds)
+    if res.converged:
+        # phases of the solution, the last evaluation may be a trial point
+        get_loga(res.x)
         if notifier is not None:
-            lle_notifier(f[2], phase1, phase2)
-        return phase1, phase2
+            notifier(res.error, phase1, phase2)
+        phases = phase1, phase2
+    else:
+        phases = None, None
+    if full_output:
+        return phases + (res,)
+    return phases
+
+
+def rachford_rice(z: np.ndarray, K: np.ndarray, tol=1e-14, max_iter=100):
+    r"""Fraction of the second phase from the Rachford-Rice equation
+
+    .. math::
+        \sum_i \frac{z_i (K_i - 1)}{1 + \beta (K_i - 1)} = 0
+
+    Newton iterations safeguarded by bisection inside the asymptotes
+    :math:`1 / (1 - K_{max}) < \beta < 1 / (1 - K_{min})`
+
+    Parameters
+    ----------
+    z : np.ndarray
+        Feed composition [n_comps], [molar fraction]
+    K : np.ndarray
+        Distribution coefficients x2 / x1 [n_comps]
+    tol : float, optional
+        Tolerance on beta, by default 1e-14
+    max_iter : int, optional
+        Maximum number of iterations, by default 100
+
+    Returns
+    -------
+    float | None
+        beta, may be outside [0, 1] (negative flash),
+        None if all K are on one side of 1
+    """
+    k = K - 1
+    if k.max() <= 0 or k.min() >= 0:
+        return None
+    lo, hi = -1 / k.max(), -1 / k.min()
+    beta = (lo + hi) / 2
+    for _ in range(max_iter):
+        d = 1 + beta * k
+        f = np.sum(z * k / d)
+        df = -np.sum(z * k * k / (d * d))
+        # f decreases in beta, keep the bracket
+        if f > 0:
+            lo = beta
+        else:
+            hi = beta
+        step = beta - f / df
+        if not lo < step < hi:
+            step = (lo + hi) / 2
+        if abs(step - beta) < tol:
+            return step
+        beta = step
+    return beta
+
+
+def _get_lny(activity_model, x, T, jacobian):
+    if jacobian:
+        lny, J, _ = activity_model.get_lny_and_jacobian(x, T)
+        return np.asarray(lny, dtype=np.float64), np.asarray(J, dtype=np.float64)
+    return np.log(np.asarray(activity_model.get_y(x, T), dtype=np.float64)), None
+
+
+def _get_phase_hessian(x: np.ndarray, N: float, J: np.ndarray) -> np.ndarray:
+    """d ln(x_i y_i) / dn_j of a phase with N moles"""
+    return (np.diag(1 / x) - 1 + J - (J @ x)[:, None]) / N
+
+
+def flash_lle(activity_model,
+              z,
+              T=298.0,
+              x1=None,
+              x2=None,
+              tol=1e-10,
+              max_iter=100,
+              n_ss=3,
+              newton=None) -> dict:
+    r"""Isothermal liquid-liquid flash
+
+    Successive substitution :math:`K_i = \gamma_i^{(1)} / \gamma_i^{(2)}` with the
+    Rachford-Rice equation, then Newton iterations on the moles of the second phase with
+
+    .. math::
+        H_{ij} = \frac{\partial \ln a_i^{(1)}}{\partial n_j^{(1)}} + \frac{\partial \ln a_i^{(2)}}{\partial n_j^{(2)}}
+
+    built from ``get_lny_and_jacobian`` of the model. Models without it use substitution only.
+    Without initial phases the second one comes from a tangent plane test
+    with nearly pure trial phases
+
+    Parameters
+    ----------
+    activity_model : ActivityModel
+        Model in molar fractions with get_y(conc, T) for arrays
+    z : np.ndarray
+        Feed composition [n_comps], [molar fraction], all components must be present
+    T : float, optional
+        Temperature, [K], by default 298.0
+    x1, x2 : np.ndarray, optional
+        Initial compositions of the phases, e.g. the previous tie line
+    tol : float, optional
+        Tolerance on :math:`\max_i |\ln a_i^{(2)} - \ln a_i^{(1)}|`, by default 1e-10
+    max_iter : int, optional
+        Maximum number of iterations, by default 100
+    n_ss : int, optional
+        Number of substitution iterations before Newton, by default 3
+    newton : bool, optional
+        Use Newton iterations, by default if the model has get_lny_and_jacobian
+
+    Returns
+    -------
+    dict
+        "x1", "x2" compositions, "beta" molar fraction of the second phase,
+        "converged", "stable" (the feed does not split), "error" - the largest
+        difference of ln a, "n_iter" iterations and "n_eval" model evaluations
+    """
+    z = np.asarray(z, dtype=np.float64)
+    z = z / z.sum()
+    if np.any(z <= 0):
+        raise ValueError("all components must be present in the feed")
+    if newton is None:
+        newton = hasattr(activity_model, "get_lny_and_jacobian")
+    n = len(z)
+    n_eval = 0
+    res = {"x1": z, "x2": z, "beta": 0.0, "converged": False, "stable": False,
+           "error": np.inf, "n_iter": 0, "n_eval": 0}
+
+    if x1 is None or x2 is None:
+        lny_z, _ = _get_lny(activity_model, z, T, False)
+        n_eval += 1
+        d = np.log(z) + lny_z
+        tm_min, K = 0.0, None
+        for j in range(n):
+            W = np.where(np.arange(n) == j, 1.0, 1e-3)
+            for _ in range(3):
+                lny_w, _ = _get_lny(activity_model, W / W.sum(), T, False)
+                n_eval += 1
+                tm = 1 + np.sum(W * (np.log(W) + lny_w - d - 1))
+                W = np.exp(d - lny_w)
+            if tm < tm_min:
+                # K-values of the trial phase against the feed
+                tm_min, K = tm, np.exp(lny_z - lny_w)
+        if K is None:
+            res.update(converged=True, stable=True, error=0.0, n_eval=n_eval)
+            return res
     else:
-        return None, None
+        K = np.asarray(x2, dtype=np.float64) / np.asarray(x1, dtype=np.float64)
+
+    n2 = None
+    for it in range(1, max_iter + 1):
+        res["n_iter"] = it
+        if n2 is not None:
+            beta = n2.sum()
+            x1, x2 = (z - n2) / (1 - beta), n2 / beta
+        else:
+            beta = rachford_rice(z, K)
+            if beta is None or not 0 < beta < 1:
+                # the feed is outside of the two-phase region for these K-values
+                res.update(x1=z, x2=z, beta=0.0, stable=True)
+                break
+            x1 = z / (1 + beta * (K - 1))
+            x2 = K * x1
+            x1, x2 = x1 / x1.sum(), x2 / x2.sum()
+        if np.max(np.abs(x1 - x2)) < 1e-8:
+            # collapsed to the trivial solution
+            res.update(x1=x1, x2=x2, beta=float(beta))
+            break
+
+        use_newton = newton and it > n_ss
+        lny1, J1 = _get_lny(activity_model, x1, T, use_newton)
+        lny2, J2 = _get_lny(activity_model, x2, T, use_newton)
+        n_eval += 2
+        g = np.log(x2) + lny2 - np.log(x1) - lny1
+        res.update(x1=x1, x2=x2, beta=float(beta), error=float(np.max(np.abs(g))))
+        if res["error"] < tol:
+            res["converged"] = np.max(np.abs(x1 - x2)) > 1e-6
+            break
+
+        dn = None
+        if use_newton:
+            H = _get_phase_hessian(x1, 1 - beta, J1) + _get_phase_hessian(x2, beta, J2)
+            try:
+                dn = np.linalg.solve(H, -g)
+            except np.linalg.LinAlgError:
+                # singular at the plait point, substitution step instead
+                pass
+        if dn is not None:
+            n2 = beta * x2
+            # both phases keep positive amounts of every component
+            step = 1.0
+            neg, pos = dn < 0, dn > 0
+            if neg.any():
+                step = min(step, 0.9 * np.min(n2[neg] / -dn[neg]))
+            if pos.any():
+                step = min(step, 0.9 * np.min((z - n2)[pos] / dn[pos]))
+            n2 = n2 + step * dn
+        else:
+            K = np.exp(lny1 - lny2)
+            n2 = None
+    res["n_eval"] = n_eval
+    return res
+
+
+def _trace_branch(activity_model, x1, x2, T, sign, step, min_step, plait_tol, z_min, max_points, tol):
+    """Tie lines from (x1, x2) to the plait point or to the edge of the triangle"""
+    points = []
+    n_eval = 0
+    plait_point = None
+    h = step
+    previous = None
+    while len(points) < max_points:
+        d = x2 - x1
+        length = np.linalg.norm(d)
+        mid = (x1 + x2) / 2
+        if length < plait_tol:
+            plait_point = mid
+            break
+        # direction across tie lines in the plane sum x = 1
+        normal = sign * np.cross(d, np.ones(3))
+        normal /= np.linalg.norm(normal)
+        # tie lines shrink as the square root of the distance to the plait point
+        h = min(h, step, length / 4)
+        edge = False
+        out = normal < 0
+        if out.any():
+            h_edge = np.min((mid[out] - z_min) / -normal[out])
+            if h_edge <= h:
+                h, edge = h_edge, True
+        if h <= 0:
+            break
+        z = mid + h * normal
+        res = flash_lle(activity_model, z, T, x1=x1, x2=x2, tol=tol, max_iter=20, n_ss=1)
+        n_eval += res["n_eval"]
+        if not res["converged"]:
+            if h / 2 < min_step:
+                # no split beyond the last tie line inside the triangle,
+                # the squared length of tie lines is extrapolated to zero
+                plait_point = mid
+                if previous is not None and previous[1] > length:
+                    mid_0, length_0 = previous
+                    plait_point = mid + (mid - mid_0) * length ** 2 / (length_0 ** 2 - length ** 2)
+                break
+            h /= 2
+            continue
+        x1_new, x2_new = res["x1"], res["x2"]
+        beta = res["beta"]
+        if np.dot(x2_new - x1_new, d) < 0:
+            x1_new, x2_new, beta = x2_new, x1_new, 1 - beta
+        previous = (mid, length)
+        x1, x2 = x1_new, x2_new
+        points.append((z, x1, x2, beta))
+        if edge:
+            break
+        h *= 2
+    return points, plait_point, n_eval
+
+
+def trace_binodal(activity_model,
+                  z,
+                  T=298.0,
+                  step=0.02,
+                  min_step=1e-5,
+                  plait_tol=1e-3,
+                  z_min=1e-6,
+                  max_points=500,
+                  tol=1e-10) -> dict:
+    """Tie lines of a ternary system through the two-phase feed z
+
+    Starting from the tie line of z the feed moves across tie lines in both
+    directions, every feed is the middle of the previous tie line shifted by
+    the step, and :func:`flash_lle` starts from the previous phases.
+    A branch ends at the edge of the triangle, or at the plait point when the
+    tie line becomes shorter than plait_tol or no split is found within min_step
+
+    Parameters
+    ----------
+    activity_model : ActivityModel
+        Model of three components with get_y(conc, T) for arrays
+    z : np.ndarray
+        Feed inside the two-phase region [3], [molar fraction]
+    T : float, optional
+        Temperature, [K], by default 298.0
+    step : float, optional
+        Largest distance between consecutive feeds, by default 0.02
+    min_step : float, optional
+        Smallest distance before a failed branch ends, by default 1e-5
+    plait_tol : float, optional
+        Tie line length taken as the plait point, by default 1e-3
+    z_min : float, optional
+        Smallest molar fraction of the feed at the edge, by default 1e-6
+    max_points : int, optional
+        Maximum number of tie lines of each branch, by default 500
+    tol : float, optional
+        Tolerance of :func:`flash_lle`, by default 1e-10
+
+    Returns
+    -------
+    dict
+        "z", "x1", "x2" [n_tie_lines, 3] feeds and phases ordered along the binodal,
+        "beta" [n_tie_lines] fractions of the second phase,
+        "plait_point" [3] or None if both branches end at the edges,
+        "n_eval" number of model evaluations
+    """
+    z = np.asarray(z, dtype=np.float64)
+    if z.shape != (3,):
+        raise ValueError("binodal tracing needs a ternary system")
+    res = flash_lle(activity_model, z, T, tol=tol)
+    n_eval = res["n_eval"]
+    points = []
+    plait_point = None
+    if res["converged"]:
+        seed = [(z / z.sum(), res["x1"], res["x2"], res["beta"])]
+        branches = []
+        for sign in (-1.0, 1.0):
+            branch, plait, n = _trace_branch(activity_model, res["x1"], res["x2"], T, sign, step,
+                                             min_step, plait_tol, z_min, max_points, tol)
+            branches.append(branch)
+            n_eval += n
+            if plait is not None:
+                plait_point = plait
+        points = branches[0][::-1] + seed + branches[1]
+    empty = np.empty((0, 3))
+    return {
+        "z": np.array([p[0] for p in points]) if points else empty,
+        "x1": np.array([p[1] for p in points]) if points else empty,
+        "x2": np.array([p[2] for p in points]) if points else empty,
+        "beta": np.array([p[3] for p in points]),
+        "plait_point": plait_point,
+        "n_eval": n_eval,
+    }
+
+
+class _ModelCache:
+    """Models of the systems of one trace_binodals call, built on first use"""
+
+    def __init__(self, model_factory):
+        self.model_factory = model_factory
+        self.models = {}
+        self.lock = Lock()
+
+    def get(self, system):
+        with self.lock:
+            if system not in self.models:
+                self.models[system] = self.model_factory(system)
+            return self.models[system]
+
+
+# cache of a worker process, set by the pool initializer
+_worker_cache = None
+
+
+def _init_worker(model_factory):
+    global _worker_cache
+    _worker_cache = _ModelCache(model_factory)
+
+
+def _trace_seed(args, cache=None):
+    system, z, T, kwargs = args
+    model = (_worker_cache if cache is None else cache).get(system)
+    return trace_binodal(model, z, T, **kwargs)
+
+
+def trace_binodals(model_factory, seeds, T=298.0, n_workers=None, processes=True, **kwargs) -> list:
+    """Binodals of independent seeds in a pool of workers
+
+    Native models can not be pickled, so models are built with model_factory(system)
+    once per system and call: by every worker process, or once for all threads.
+    With processes model_factory must be a module-level function
+
+    Parameters
+    ----------
+    model_factory : Callable
+        Function of a system returning its activity model
+    seeds : Iterable[tuple]
+        Pairs (system, z) of a hashable system, e.g. a tuple of component names,
+        and a two-phase feed of the system
+    T : float, optional
+        Temperature, [K], by default 298.0
+    n_workers : int, optional
+        Number of workers, by default the number of cores
+    processes : bool, optional
+        Use a process pool instead of a thread pool, by default True
+    **kwargs
+        Options of :func:`trace_binodal`
+
+    Returns
+    -------
+    list[dict]
+        Results of :func:`trace_binodal` in the order of seeds
+    """
+    tasks = [(system, z, T, kwargs) for system, z in seeds]
+    if processes:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(model_factory,)) as pool:
+            return list(pool.map(_trace_seed, tasks))
+    cache = _ModelCache(model_factory)
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        return list(pool.map(partial(_trace_seed, cache=cache), tasks))
@@ -1,5 +1,13 @@
 """This module contain built-in datasets for UNIFAC
 
+Built-in datasets are loaded lazily by a process-wide :obj:`DatasetRegistry`:
+the file is parsed on the first call, later calls return the same
+:obj:`ParametersUNIFAC` object. Parameters are read-only, so the object is
+safely shared between models and threads.
+
+.. autoclass:: DatasetRegistry
+    :members: register, get, path, load_times, clear
+
 .. autofunction:: BIO2016_1
 .. autofunction:: BIO2016_2
 .. autofunction:: DOR
@@ -10,10 +18,15 @@
 .. autofunction:: VLE
 """
 
+import threading
+from datetime import datetime
+from importlib.resources import as_file, files
+
 from pytherm.activity.unifac import ParametersUNIFAC
-from os.path import abspath
 
 __all__ = [
+    "DatasetRegistry",
+    "registry",
     "BIO2016_1",
     "BIO2016_2",
     "DOR",
@@ -25,6 +38,127 @@ __all__ = [
 ]
 
 
+class DatasetRegistry:
+    """Thread-safe registry of UNIFAC datasets shipped in the package data directory
+
+    Every dataset is loaded once on the first :meth:`get`, concurrent first calls
+    for one dataset wait for a single load, other datasets are not blocked.
+
+    Parameters
+    ----------
+    package : str, optional
+        Package containing the data directory, by default this package
+    loader : callable, optional
+        Dataset constructor taking a file path, by default :obj:`ParametersUNIFAC`
+    """
+
+    def __init__(self, package: str = __package__, loader=ParametersUNIFAC):
+        self._package = package
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._files = {}
+        self._locks = {}
+        self._datasets = {}
+        self._load_times = {}
+
+    def register(self, name: str, filename: str):
+        """Register a dataset file from the data directory under a name
+
+        Parameters
+        ----------
+        name : str
+            Dataset name
+        filename : str
+            File name in the data directory
+        """
+        with self._lock:
+            self._files[name] = filename
+            self._locks.setdefault(name, threading.Lock())
+            self._datasets.pop(name, None)
+            self._load_times.pop(name, None)
+
+    def path(self, name: str):
+        """Returns the resource of the dataset file
+
+        Parameters
+        ----------
+        name : str
+            Dataset name
+
+        Returns
+        -------
+        importlib.resources.abc.Traversable
+            Dataset file
+        """
+        try:
+            filename = self._files[name]
+        except KeyError:
+            raise KeyError(f"unknown UNIFAC dataset: {name}") from None
+        return files(self._package) / "data" / filename
+
+    def get(self, name: str) -> ParametersUNIFAC:
+        """Returns the shared dataset, loading it on the first call
+
+        Parameters
+        ----------
+        name : str
+            Dataset name
+
+        Returns
+        -------
+        ParametersUNIFAC
+            Shared dataset object
+        """
+        params = self._datasets.get(name)
+        if params is not None:
+            return params
+
+        resource = self.path(name)
+        with self._locks[name]:
+            params = self._datasets.get(name)
+            if params is None:
+                start_time = datetime.now()
+                with as_file(resource) as path:
+                    params = self._loader(str(path))
+                load_time = (datetime.now() - start_time).total_seconds()
+                with self._lock:
+                    self._datasets[name] = params
+                    self._load_times[name] = load_time
+        return params
+
+    def load_times(self) -> dict:
+        """Returns load times of already loaded datasets
+
+        Returns
+        -------
+        dict
+            Dataset name: load time, [s]
+        """
+        with self._lock:
+            return dict(self._load_times)
+
+    def clear(self):
+        """Drop loaded datasets, they are loaded again on the next :meth:`get`
+        """
+        with self._lock:
+            self._datasets.clear()
+            self._load_times.clear()
+
+
+registry = DatasetRegistry()
+for _name, _filename in (
+    ("BIO2016_1", "bio2016_1.dat"),
+    ("BIO2016_2", "bio2016_2.dat"),
+    ("DOR", "dor.dat"),
+    ("INF", "inf.dat"),
+    ("LLE", "lle.dat"),
+    ("NIST2015", "nist2015.dat"),
+    ("PSRK", "psrk.dat"),
+    ("VLE", "vle.dat"),
+):
+    registry.register(_name, _filename)
+
+
 def BIO2016_1() -> ParametersUNIFAC:
     """Returns BIO2016_01 :obj:`SubstancesUNIFAC` object
 
@@ -35,10 +169,7 @@ def BIO2016_1() -> ParametersUNIFAC:
     -----------
     Bessa2016, DOI: https://doi.org/10.1016/j.fluid.2016.05.020
     """
-    params = ParametersUNIFAC(
-        abspath(__file__).removesuffix("datasets.py") + "\\data\\bio2016_1.dat"
-    )
-    return params
+    return registry.get("BIO2016_1")
 
 
 def BIO2016_2() -> ParametersUNIFAC:
@@ -51,10 +182,7 @@ def BIO2016_2() -> ParametersUNIFAC:
     -----------
     Bessa2016, DOI: https://doi.org/10.1016/j.fluid.2016.05.020
     """
-    params = ParametersUNIFAC(
-        abspath(__file__).removesuffix("datasets.py") + "\\data\\bio2016_2.dat"
-    )
-    return params
+    return registry.get("BIO2016_2")
 
 
 def DOR() -> ParametersUNIFAC:
@@ -68,10 +196,7 @@ def DOR() -> ParametersUNIFAC:
     Published DDB parameters,
     https://www.ddbst.com/PublishedParametersUNIFACDO.html
     """
-    params = ParametersUNIFAC(
-        abspath(__file__).removesuffix("datasets.py") + "\\data\\dor.dat"
-    )
-    return params
+    return registry.get("DOR")
 
 
 def INF() -> ParametersUNIFAC:
@@ -84,10 +209,7 @@ def INF() -> ParametersUNIFAC:
     -----------
     Bastos1988, DOI: https://doi.org/10.1021/i200013a024
     """
-    params = ParametersUNIFAC(
-        abspath(__file__).removesuffix("datasets.py") + "\\data\\inf.dat"
-    )
-    return params
+    return registry.get("INF")
 
 
 def LLE() -> ParametersUNIFAC:
@@ -100,10 +222,7 @@ def LLE() -> ParametersUNIFAC:
     -----------
     Magnussen1981, DOI: https://doi.org/10.1021/i200013a024
     """
-    params = ParametersUNIFAC(
-        abspath(__file__).removesuffix("datasets.py") + "\\data\\lle.dat"
-    )
-    return params
+    return registry.get("LLE")
 
 
 def NIST2015() -> ParametersUNIFAC:
@@ -116,10 +235,7 @@ def NIST2015() -> ParametersUNIFAC:
     -----------
     Kang2015, DOI: https://doi.org/10.1016/j.fluid.2014.12.042
     """
-    params = ParametersUNIFAC(
-        abspath(__file__).removesuffix("datasets.py") + "\\data\\nist2015.dat"
-    )
-    return params
+    return registry.get("NIST2015")
 
 
 def PSRK() -> ParametersUNIFAC:
@@ -133,10 +249,7 @@ def PSRK() -> ParametersUNIFAC:
     Published DDB parameters,
     https://www.ddbst.com/psrk.html
     """
-    params = ParametersUNIFAC(
-        abspath(__file__).removesuffix("datasets.py") + "\\data\\psrk.dat"
-    )
-    return params
+    return registry.get("PSRK")
 
 
 def VLE() -> ParametersUNIFAC:
@@ -150,7 +263,4 @@ def VLE() -> ParametersUNIFAC:
     Published DDB parameters,
     https://www.ddbst.com/published-parameters-unifac.html
     """
-    params = ParametersUNIFAC(
-        abspath(__file__).removesuffix("datasets.py") + "\\data\\vle.dat"
-    )
-    return params
+    return registry.get("VLE")
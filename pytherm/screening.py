@@ -0,0 +1,308 @@
+r"""
+This module contains screening of solvents by activity coefficients at
+infinite dilution and partition coefficients of many solutes.
+
+How to use
+----------
+One UNIFAC model is built over the union of solutes and solvents. Solutes are
+absent from the blends, so a row of :meth:`get_y_batch` over the blend
+compositions gives :math:`\gamma^\infty` of every solute at true infinite dilution:
+    >>> import numpy as np
+    >>> import pytherm.activity.unifac as uf
+    >>> from pytherm import screening
+    >>> groups = {
+    ...     "naphthalene": "8*ACH 2*AC",
+    ...     "phenol": "5*ACH 1*ACOH",
+    ...     "hexane": "2*CH3 4*CH2",
+    ...     "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    ...     "water": "1*H2O",
+    ... }
+    >>> screen = screening.Screening(uf.datasets.DOR(), groups,
+    ...                              solutes=["naphthalene", "phenol"],
+    ...                              solvents=["hexane", "ethanol", "water"])
+    >>> blends = np.array([[1, 0, 0], [0, 0.5, 0.5], [0, 0, 1]])
+    >>> y_inf = screen.get_yinf(blends, T=298)  # [n_blends, n_solutes]
+
+Ranked results are written chunk by chunk:
+    >>> k = screen.get_k_molar(blends[2], blends, T=298)
+    >>> screening.write_csv("k.csv", screening.iter_ranked(k, screen.solutes, top=10))
+
+Screening
+---------
+.. autoclass:: Screening
+
+Results
+-------
+.. autofunction:: iter_ranked
+.. autofunction:: rank
+.. autofunction:: write_csv
+"""
+from __future__ import annotations
+
+import csv
+import os
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from pytherm.activity.activitymodel import ActivityModel64
+import pytherm.activity.unifac as uf
+
+__all__ = [
+    "Screening",
+    "iter_ranked",
+    "rank",
+    "write_csv",
+]
+
+
+class Screening:
+    """Activity coefficients at infinite dilution of solutes in solvent blends
+
+    Parameters
+    ----------
+    dataset : UNIFAC dataset
+        Parameters, e.g. uf.datasets.DOR()
+    groups : dict[str, str]
+        Groups of every component, {"Substance name": "2*CH3 4*CH2"}
+    solutes : list[str]
+        Names of the solutes
+    solvents : list[str]
+        Names of the solvents, a component may be both a solute and a solvent
+    model_class : optional
+        UNIFAC model in molar fractions, by default uf.UNIFAC64
+
+    Notes
+    -----
+    The model checks interaction parameters of all pairs of main groups in the union,
+    including pairs of groups of different solutes that do not change the results
+    """
+
+    def __init__(self, dataset, groups: dict[str, str], solutes: list[str], solvents: list[str],
+                 model_class=uf.UNIFAC64):
+        self.solutes = list(solutes)
+        self.solvents = list(solvents)
+        self.names = list(dict.fromkeys(self.solutes + self.solvents))
+        substances = uf.SubstancesUNIFAC()
+        substances.get_from_dict({name: groups[name] for name in self.names})
+        self.model = model_class(dataset, substances)
+        self.dtype = np.float64 if isinstance(self.model, ActivityModel64) else np.float32
+        index = {name: i for i, name in enumerate(self.names)}
+        self.solute_index = np.array([index[name] for name in self.solutes], dtype=np.int64)
+        self.solvent_index = np.array([index[name] for name in self.solvents], dtype=np.int64)
+        # position of every solute among the solvents, -1 if it is not a solvent
+        solvent_position = {name: i for i, name in enumerate(self.solvents)}
+        self.solute_in_solvents = np.array([solvent_position.get(name, -1) for name in self.solutes])
+
+    def _to_blends(self, blends) -> np.ndarray:
+        blends = np.atleast_2d(np.asarray(blends, dtype=np.float64))
+        if blends.shape[1] != len(self.solvents):
+            raise ValueError("blends must have a fraction for every solvent")
+        return blends / blends.sum(axis=1, keepdims=True)
+
+    def get_yinf(self, blends, T: float, chunk_size=4096, n_threads=1) -> np.ndarray:
+        r""":math:`\gamma^\infty` of every solute in every blend
+
+        Solutes that are also solvents of a blend are not at infinite dilution, their values are NaN
+
+        Parameters
+        ----------
+        blends : np.ndarray
+            Fractions of the solvents [n_blends, n_solvents] or [n_solvents], normalized to 1
+        T : float
+            Temperature, [K]
+        chunk_size : int, optional
+            Number of blends per :meth:`get_y_batch` call, by default 4096
+        n_threads : int, optional
+            Number of threads of :meth:`get_y_batch`, 0 to use all cores, by default 1
+
+        Returns
+        -------
+        np.ndarray
+            :math:`\gamma^\infty` [n_blends, n_solutes]
+        """
+        blends = self._to_blends(blends)
+        y_inf = np.empty((len(blends), len(self.solutes)))
+        conc = np.zeros((min(chunk_size, len(blends)), len(self.names)), dtype=self.dtype)
+        for start in range(0, len(blends), chunk_size):
+            chunk = blends[start:start + chunk_size]
+            conc[:len(chunk), self.solvent_index] = chunk
+            y = np.asarray(self.model.get_y_batch(conc[:len(chunk)], T, n_threads))
+            y_inf[start:start + len(chunk)] = y[:, self.solute_index]
+        solvent = self.solute_in_solvents >= 0
+        present = blends[:, self.solute_in_solvents[solvent]] > 0
+        y_inf[:, solvent] = np.where(present, np.nan, y_inf[:, solvent])
+        return y_inf
+
+    def get_k_molar(self, blends1, blends2, T: float, chunk_size=4096, n_threads=1) -> np.ndarray:
+        r"""Partition coefficients in molar fractions, as :func:`pytherm.lle.get_k_molar`
+
+        .. math::
+            K_i = \frac{\gamma_i^{\infty(2)}}{\gamma_i^{\infty(1)}}
+
+        Parameters
+        ----------
+        blends1 : np.ndarray
+            Fractions of the solvents of phase 1 [n_pairs, n_solvents] or [n_solvents]
+        blends2 : np.ndarray
+            Fractions of the solvents of phase 2 [n_pairs, n_solvents] or [n_solvents]
+        T : float
+            Temperature, [K]
+        chunk_size : int, optional
+            Number of blends per :meth:`get_y_batch` call, by default 4096
+        n_threads : int, optional
+            Number of threads of :meth:`get_y_batch`, by default 1
+
+        Returns
+        -------
+        np.ndarray
+            Partition coefficients [n_pairs, n_solutes], a single blend is broadcast over pairs
+        """
+        y1 = self.get_yinf(blends1, T, chunk_size, n_threads)
+        y2 = self.get_yinf(blends2, T, chunk_size, n_threads)
+        return y2 / y1
+
+    def get_kp(self, blends1, blends2, molar_volumes, T: float, chunk_size=4096, n_threads=1) -> np.ndarray:
+        r"""Partition coefficients in molarities, as :func:`pytherm.lle.get_kp`
+
+        .. math::
+            K_{p,i} = K_i \frac{\sum_j x_j^{(2)} / V_j}{\sum_j x_j^{(1)} / V_j}
+
+        Parameters
+        ----------
+        blends1 : np.ndarray
+            Fractions of the solvents of phase 1 [n_pairs, n_solvents] or [n_solvents]
+        blends2 : np.ndarray
+            Fractions of the solvents of phase 2 [n_pairs, n_solvents] or [n_solvents]
+        molar_volumes : dict[str, float] | np.ndarray
+            Molar volumes of the solvents
+        T : float
+            Temperature, [K]
+        chunk_size : int, optional
+            Number of blends per :meth:`get_y_batch` call, by default 4096
+        n_threads : int, optional
+            Number of threads of :meth:`get_y_batch`, by default 1
+
+        Returns
+        -------
+        np.ndarray
+            Partition coefficients [n_pairs, n_solutes]
+        """
+        if isinstance(molar_volumes, dict):
+            molar_volumes = [molar_volumes[name] for name in self.solvents]
+        molar_volumes = np.asarray(molar_volumes, dtype=np.float64)
+        v1 = self._to_blends(blends1) @ (1 / molar_volumes)
+        v2 = self._to_blends(blends2) @ (1 / molar_volumes)
+        k = self.get_k_molar(blends1, blends2, T, chunk_size, n_threads)
+        return k * (v2 / v1)[:, None]
+
+
+def _record_dtype(solutes):
+    width = max((len(name) for name in solutes), default=1)
+    return np.dtype([("solute", f"U{width}"), ("blend", np.int64), ("value", np.float64), ("rank", np.int64)])
+
+
+def iter_ranked(values: np.ndarray, solutes: list[str], top: int = None, descending=True,
+                chunk_size=256) -> Iterator[np.ndarray]:
+    """Blends of every solute ordered by value, chunk by chunk of solutes
+
+    NaN values are left out
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Values [n_blends, n_solutes], e.g. from :meth:`Screening.get_k_molar`
+    solutes : list[str]
+        Names of the solutes
+    top : int, optional
+        Number of best blends of every solute, by default all
+    descending : bool, optional
+        Largest values first, by default True
+    chunk_size : int, optional
+        Number of solutes per chunk, by default 256
+
+    Yields
+    ------
+    np.ndarray
+        Structured array with fields "solute", "blend" (row of values), "value" and "rank" from 1
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    dtype = _record_dtype(solutes)
+    n_blends = len(values)
+    n_top = n_blends if top is None else min(top, n_blends)
+    for start in range(0, values.shape[1], chunk_size):
+        block = values[:, start:start + chunk_size]
+        # NaN go last in both orders
+        key = np.where(np.isnan(block), np.inf, -block if descending else block)
+        order = np.argsort(key, axis=0, kind="stable")[:n_top]
+        chunk_values = np.take_along_axis(block, order, axis=0)
+        keep = ~np.isnan(chunk_values.T).ravel()
+        records = np.empty(order.size, dtype=dtype)
+        records["solute"] = np.repeat(np.asarray(solutes[start:start + block.shape[1]]), n_top)
+        records["blend"] = order.T.ravel()
+        records["value"] = chunk_values.T.ravel()
+        records["rank"] = np.tile(np.arange(1, n_top + 1), block.shape[1])
+        yield records[keep]
+
+
+def rank(values: np.ndarray, solutes: list[str], top: int = None, descending=True) -> np.ndarray:
+    """All chunks of :func:`iter_ranked` in one structured array
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Values [n_blends, n_solutes]
+    solutes : list[str]
+        Names of the solutes
+    top : int, optional
+        Number of best blends of every solute, by default all
+    descending : bool, optional
+        Largest values first, by default True
+
+    Returns
+    -------
+    np.ndarray
+        Structured array with fields "solute", "blend", "value" and "rank"
+    """
+    chunks = list(iter_ranked(values, solutes, top, descending))
+    if not chunks:
+        return np.empty(0, dtype=_record_dtype(solutes))
+    return np.concatenate(chunks)
+
+
+def write_csv(file, chunks: Iterable[np.ndarray], delimiter=",") -> int:
+    """Write chunks of structured arrays to a CSV file as they come
+
+    Fields with the delimiter or quotes are quoted by :func:`csv.writer`
+
+    Parameters
+    ----------
+    file : str | os.PathLike | file object
+        Path or text file, opened with newline=""
+    chunks : Iterable[np.ndarray]
+        Structured arrays with the same fields, e.g. from :func:`iter_ranked`
+    delimiter : str, optional
+        Column delimiter, by default ","
+
+    Returns
+    -------
+    int
+        Number of rows written
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "w", newline="") as f:
+            return write_csv(f, chunks, delimiter)
+    writer = csv.writer(file, delimiter=delimiter, lineterminator="\n")
+    n_rows = 0
+    header = True
+    for chunk in chunks:
+        names = chunk.dtype.names
+        if header:
+            writer.writerow(names)
+            header = False
+        columns = [chunk[name].astype(str) if chunk[name].dtype.kind == "U" else
+                   np.char.mod("%.10g" if chunk[name].dtype.kind == "f" else "%d", chunk[name])
+                   for name in names]
+        writer.writerows(zip(*columns))
+        n_rows += len(chunk)
+    return n_rows
@@ -1,57 +1,387 @@
-def minimize(min_f, bounds, fabs=1e-5, n_iter=10000, n_iter2=5000):
+r"""
+This module contains solvers of the equilibrium conditions in extents of
+reactions (or phase transfers) :math:`\xi` with interchangeable backends.
+
+How to use
+----------
+The residuals :math:`f_i(\xi)` increase with their own extent :math:`\xi_i`,
+e.g. :math:`\ln(a_i^{(2)} / a_i^{(1)})` of the transfer of component i from
+phase 1 to phase 2. Bounds are pairs [low, high] for every extent or a function
+bounds(ksi, i) returning the range of extent i with others fixed:
+    >>> from pytherm import solver
+    >>> res = solver.DampedNewton(tol=1e-10).solve(func, bounds)
+    >>> res.converged, res.reason, res.n_eval, res.time
+    (True, 'converged', 12, 0.0004)
+
+Every solve returns a :class:`SolverResult` with counters of function
+evaluations, wall time and the history of the error :math:`\sum_i |f_i|`.
+Converged means the error is below tol for every backend
+
+Backends
+--------
+.. autoclass:: Bisection
+.. autoclass:: DampedNewton
+.. autoclass:: Broyden
+
+Results
+-------
+.. autoclass:: SolverResult
+.. autofunction:: minimize
+"""
+from abc import ABC, abstractmethod
+from time import perf_counter
+
+import numpy as np
+
+__all__ = [
+    "SolverResult",
+    "Solver",
+    "Bisection",
+    "DampedNewton",
+    "Broyden",
+    "minimize",
+]
+
+
+class SolverResult:
+    r"""Result of one solve
+
+    Attributes
+    ----------
+    x : np.ndarray
+        Extents
+    f : np.ndarray
+        Residuals at x
+    error : float
+        :math:`\sum_i |f_i|`
+    converged : bool
+        error < tol
+    reason : str
+        "converged", "max_iter", "max_inner" (bisection of one extent did not end),
+        "singular" (Jacobian) or "line_search" (no decrease along the step)
+    n_eval : int
+        Number of function evaluations
+    n_iter : int
+        Number of outer iterations
+    time : float
+        Wall time, [s]
+    history : list[float]
+        Error at the start of every iteration and at the end
     """
 
-    :param function min_f:
-    :param list bounds: bounds for each reaction
-    :param float fabs: absolute value of sum abs min_f to complete the optimization
-    :return:
+    def __init__(self, x):
+        self.x = x
+        self.f = None
+        self.error = np.inf
+        self.converged = False
+        self.reason = "max_iter"
+        self.n_eval = 0
+        self.n_iter = 0
+        self.time = 0.0
+        self.history = []
+
+    def __repr__(self) -> str:
+        return "SolverResult(converged={}, reason={!r}, error={:.3g}, n_iter={}, n_eval={}, time={:.3g} s)".format(
+            self.converged, self.reason, self.error, self.n_iter, self.n_eval, self.time)
+
+
+def _get_bounds(bounds, x, i):
+    if callable(bounds):
+        return bounds(x.copy(), i)
+    return bounds[i][0], bounds[i][1]
+
+
+def _get_all_bounds(bounds, x):
+    lo = np.empty(len(x))
+    hi = np.empty(len(x))
+    for i in range(len(x)):
+        lo[i], hi[i] = _get_bounds(bounds, x, i)
+    return lo, hi
+
+
+class Solver(ABC):
+    r"""Base class of the backends
+
+    Parameters
+    ----------
+    tol : float, optional
+        Tolerance on :math:`\sum_i |f_i|`, by default 1e-5
+    max_iter : int, optional
+        Maximum number of outer iterations, by default 10000
+    """
+
+    def __init__(self, tol=1e-5, max_iter=10000):
+        self.tol = tol
+        self.max_iter = max_iter
+
+    def solve(self, func, bounds, x0=None) -> SolverResult:
+        """Solve f(x) = 0
+
+        Parameters
+        ----------
+        func : Callable
+            Residuals f(x) of the extents x [n]
+        bounds : list | Callable
+            [n, 2] ranges of the extents or bounds(x, i) -> (low, high) of extent i with others fixed
+        x0 : np.ndarray, optional
+            Initial extents, by default the bound closest to zero,
+            required with a bounds function
+
+        Returns
+        -------
+        SolverResult
+            Solution and counters
+        """
+        start_time = perf_counter()
+        if x0 is not None:
+            x = np.array(x0, dtype=np.float64)
+        elif callable(bounds):
+            raise ValueError("x0 is required with a bounds function")
+        else:
+            x = np.array([min(b, key=abs) for b in bounds], dtype=np.float64)
+        res = SolverResult(x)
+
+        def evaluate(x):
+            res.n_eval += 1
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                return np.asarray(func(x.copy()), dtype=np.float64)
+
+        self._solve(evaluate, bounds, res)
+        res.converged = res.reason == "converged"
+        res.time = perf_counter() - start_time
+        return res
+
+    def _check(self, res, f) -> bool:
+        """Records the error of f, returns True if the solve is over"""
+        res.f = f
+        res.error = float(np.sum(np.abs(f)))
+        res.history.append(res.error)
+        if res.error < self.tol:
+            res.reason = "converged"
+            return True
+        if res.n_iter >= self.max_iter:
+            res.reason = "max_iter"
+            return True
+        return False
+
+    @abstractmethod
+    def _solve(self, evaluate, bounds, res):
+        """Iterates from res.x, updates res and sets res.reason"""
+
+
+class Bisection(Solver):
+    r"""Bisection of one extent at a time
+
+    Every iteration takes the component with the largest :math:`|f_i|` and bisects
+    its extent within the bounds until :math:`|f_i| <` tol / 10
+    or :math:`|f_i|` changes by less than ftol relative
+
+    Parameters
+    ----------
+    tol : float, optional
+        Tolerance on :math:`\sum_i |f_i|`, by default 1e-5
+    max_iter : int, optional
+        Maximum number of extents bisected, by default 10000
+    max_inner : int, optional
+        Maximum number of bisections of one extent, by default 5000
+    ftol : float, optional
+        Relative change of :math:`|f_i|` ending the bisection of one extent, by default 0 (off)
     """
 
-    ksi = [0] * len(bounds)
-    # задание начальных кси наиболее близких к 0 из границ оптимазции
-    for i in range(len(bounds)):
-        m = bounds[i][0]
-        for j in bounds[i]:
-            if abs(j) < abs(m):
-                m = j
-        ksi[i] = m
-    iter = 0
-    while (1):
-        lga = min_f(ksi)
-        max_i = 0
-        # поиск наиболее далеких от равновесия компонентов
-        for i in range(len(lga)):
-            if abs(lga[i]) > abs(lga[max_i]):
-                max_i = i
-
-        cur_bound = bounds[max_i].copy()
-        iter_2 = 0
-        while (1):
-            # если > 0 то нужно уменьшать
-            if lga[max_i] > 0:
-                buf = ksi[max_i]
-                ksi[max_i] = (cur_bound[0] + ksi[max_i]) / 2
-                cur_bound[1] = buf
+    def __init__(self, tol=1e-5, max_iter=10000, max_inner=5000, ftol=0.0):
+        super().__init__(tol, max_iter)
+        self.max_inner = max_inner
+        self.ftol = ftol
+
+    def _solve(self, evaluate, bounds, res):
+        x = res.x
+        f = evaluate(x)
+        while not self._check(res, f):
+            i = int(np.argmax(np.abs(f)))
+            lo, hi = _get_bounds(bounds, x, i)
+            for _ in range(self.max_inner):
+                if f[i] > 0:
+                    x[i], hi = (lo + x[i]) / 2, x[i]
+                else:
+                    x[i], lo = (x[i] + hi) / 2, x[i]
+                f_i = abs(f[i])
+                f = evaluate(x)
+                if abs(f[i]) < self.tol / 10 or f[i] == 0:
+                    break
+                if self.ftol and abs((abs(f[i]) - f_i) / f[i]) < self.ftol:
+                    break
             else:
-                buf = ksi[max_i]
-                ksi[max_i] = (ksi[max_i] + cur_bound[1]) / 2
-                cur_bound[0] = buf
-            lga = min_f(ksi)
-            if abs(lga[max_i]) < fabs / 10:
-                break
-
-            iter_2 += 1
-            if iter_2 > n_iter2:
-                s = 0
-                for i in lga:
-                    s += abs(i)
-                return False, ksi, s
-        s = 0
-        for i in lga:
-            s += abs(i)
-        if s < fabs:
-            break
-        iter += 1
-        if iter > n_iter:
-            return False, ksi, s
-    return True, ksi, s
+                res.f = f
+                res.error = float(np.sum(np.abs(f)))
+                res.history.append(res.error)
+                res.reason = "max_inner"
+                return
+            res.n_iter += 1
+
+
+class DampedNewton(Solver):
+    r"""Newton iterations with backtracking
+
+    Steps are projected on the bounds and halved until
+    :math:`\|f\|_2` decreases by the Armijo condition.
+    If the residuals at x0 are not finite, iterations start from the nearest point
+    with finite residuals towards the middle of the bounds
+
+    Parameters
+    ----------
+    tol : float, optional
+        Tolerance on :math:`\sum_i |f_i|`, by default 1e-5
+    max_iter : int, optional
+        Maximum number of iterations, by default 100
+    jac : Callable, optional
+        Jacobian jac(x) -> [n, n] :math:`\partial f_i / \partial x_j`,
+        by default forward differences
+    rel_step : float, optional
+        Relative step of the differences, by default 1e-7
+    abs_step : float, optional
+        Smallest step of the differences, by default 1e-10
+    max_backtrack : int, optional
+        Maximum number of step halvings, by default 30
+    """
+
+    def __init__(self, tol=1e-5, max_iter=100, jac=None, rel_step=1e-7, abs_step=1e-10, max_backtrack=30):
+        super().__init__(tol, max_iter)
+        self.jac = jac
+        self.rel_step = rel_step
+        self.abs_step = abs_step
+        self.max_backtrack = max_backtrack
+
+    def _get_jacobian(self, evaluate, x, f, hi):
+        if self.jac is not None:
+            return np.asarray(self.jac(x.copy()), dtype=np.float64)
+        J = np.empty((len(f), len(x)))
+        for j in range(len(x)):
+            h = self.rel_step * max(abs(x[j]), self.abs_step / self.rel_step)
+            if x[j] + h > hi[j]:
+                h = -h
+            x_h = x.copy()
+            x_h[j] += h
+            J[:, j] = (evaluate(x_h) - f) / h
+        return J
+
+    def _line_search(self, evaluate, x, f, dx, lo, hi):
+        """Returns the accepted point and its residuals or None"""
+        norm = f @ f
+        t = 1.0
+        for _ in range(self.max_backtrack):
+            x_new = np.clip(x + t * dx, lo, hi)
+            f_new = evaluate(x_new)
+            if np.all(np.isfinite(f_new)) and f_new @ f_new <= (1 - 1e-4 * t) * norm:
+                return x_new, f_new
+            t /= 2
+        return None
+
+    def _start(self, evaluate, bounds, res):
+        """Initial point with finite residuals, moved from a singular x0 towards the middle of the bounds"""
+        x0 = res.x
+        f = evaluate(x0)
+        x = x0
+        if not np.all(np.isfinite(f)):
+            lo, hi = _get_all_bounds(bounds, x0)
+            dx = (lo + hi) / 2 - x0
+            t = 1.0
+            for _ in range(self.max_backtrack):
+                x = x0 + t * dx
+                f = evaluate(x)
+                if np.all(np.isfinite(f)):
+                    break
+                t /= 2
+            res.x = x
+        return x, f
+
+    def _solve(self, evaluate, bounds, res):
+        x, f = self._start(evaluate, bounds, res)
+        while not self._check(res, f):
+            lo, hi = _get_all_bounds(bounds, x)
+            J = self._get_jacobian(evaluate, x, f, hi)
+            try:
+                dx = np.linalg.solve(J, -f)
+            except np.linalg.LinAlgError:
+                res.reason = "singular"
+                return
+            step = self._line_search(evaluate, x, f, dx, lo, hi)
+            if step is None:
+                res.reason = "line_search"
+                return
+            x, f = step
+            res.x = x
+            res.n_iter += 1
+
+
+class Broyden(DampedNewton):
+    r"""Quasi-Newton iterations with the Broyden update of the Jacobian
+
+    The Jacobian is computed once and updated by rank-one corrections,
+    it is recomputed when the step gives no decrease
+
+    Parameters
+    ----------
+    tol : float, optional
+        Tolerance on :math:`\sum_i |f_i|`, by default 1e-5
+    max_iter : int, optional
+        Maximum number of iterations, by default 100
+    jac : Callable, optional
+        Initial Jacobian jac(x) -> [n, n], by default forward differences
+    rel_step : float, optional
+        Relative step of the differences, by default 1e-7
+    abs_step : float, optional
+        Smallest step of the differences, by default 1e-10
+    max_backtrack : int, optional
+        Maximum number of step halvings, by default 30
+    """
+
+    def _solve(self, evaluate, bounds, res):
+        x, f = self._start(evaluate, bounds, res)
+        J = None
+        while not self._check(res, f):
+            lo, hi = _get_all_bounds(bounds, x)
+            fresh = J is None
+            if fresh:
+                J = self._get_jacobian(evaluate, x, f, hi)
+            try:
+                dx = np.linalg.solve(J, -f)
+                step = self._line_search(evaluate, x, f, dx, lo, hi)
+            except np.linalg.LinAlgError:
+                step = None
+            if step is None:
+                if fresh:
+                    res.reason = "line_search"
+                    return
+                J = None
+                continue
+            x_new, f_new = step
+            s = x_new - x
+            J += np.outer(f_new - f - J @ s, s) / (s @ s)
+            x, f = x_new, f_new
+            res.x = x
+            res.n_iter += 1
+
+
+def minimize(min_f, bounds, fabs=1e-5, n_iter=10000, n_iter2=5000):
+    """Bisection of extents, see :class:`Bisection`
+
+    Parameters
+    ----------
+    min_f : Callable
+        Residuals of the extents
+    bounds : list
+        Bounds for each extent
+    fabs : float, optional
+        Tolerance on the sum of abs min_f, by default 1e-5
+    n_iter : int, optional
+        Maximum number of extents bisected, by default 10000
+    n_iter2 : int, optional
+        Maximum number of bisections of one extent, by default 5000
+
+    Returns
+    -------
+    tuple[bool, list, float]
+        Converged, extents and the sum of abs min_f
+    """
+    res = Bisection(fabs, n_iter, n_iter2).solve(min_f, bounds)
+    return res.converged, list(res.x), res.error
@@ -2,6 +2,7 @@
 """
 
 import numpy as np
+from .solver import Bisection, Solver
 from .stoichiometry import str_to_reaction
 
 
@@ -149,75 +150,35 @@ class EquilibriumSolver:
     fabs: float
     ftol: float
     ksi: list[float]
+    solver: Solver
+    result = None
 
     def __init__(self,
                  eq_sys: EquilibriumSystem,
                  k_lim=10,
                  fabs=1e-5,
                  ftol=1e-12,
+                 solver: Solver = None,
                  ):
         self.eq_sys = eq_sys
         self.k_lim = k_lim
         self.fabs = fabs
         self.ftol = ftol
+        if solver is None:
+            solver = Bisection(tol=fabs, ftol=ftol)
+        self.solver = solver
+
+    def get_residuals(self, ksi):
+        """log10 of the reaction products over the constants, increase with ksi"""
+        return np.log10(self.eq_sys.get_pr(ksi)) - self.eq_sys.log_k
 
     def equilibrate(self):
+        """Solve for the extents of reactions, the :class:`SolverResult` is kept in result"""
         n_reactions = len(self.eq_sys.log_k)
-        for i in range(n_reactions):
-            pass
-
-        ksi = np.full(n_reactions, 0, dtype=float)
-        while (1):
-            f = self.eq_sys.fi(ksi)
-            print("F = ", f)
-            print("ksi = ", ksi)
-
-            if np.sum(f) < self.fabs:
-                self.ksi = ksi
-                break
-
-            # поиск реакции с мах f
-            v = 0
-            ri = 0
-            for i in range(len(f)):
-                if f[i] > v:
-                    v = f[i]
-                    ri = i
-
-            p_ksi = ksi
-            p_ksi[ri] = 0
-            left_bound, right_bound = self.eq_sys.get_bounds(p_ksi, ri)
-            rs = np.array((left_bound, 0, right_bound))
-
-            # начало оптимизации
-            vals_u = np.array((0.0, 0.0))
-            while (1):
-                rs[1] = (rs[0] + rs[2]) / 2
-                p_ksi[ri] = rs[1]
-                # print("F = ", fi(p_ksi))
-                # print("Ksi = ", p_ksi)
-                pr = self.eq_sys.get_pr(p_ksi)
-                K = self.eq_sys.log_k
-
-                res = (K - np.log10(pr))
-                vals_u[1] = vals_u[0]
-                vals_u[0] = self.eq_sys.fi(p_ksi)[ri]
-
-                if res[ri] < 0:
-                    rs[2] = rs[1]
-                else:
-                    rs[0] = rs[1]
-
-                if vals_u[0] == 0:
-                    ksi[ri] = rs[1]
-                    break
-                if vals_u[0] < self.fabs / 10:
-                    ksi[ri] = rs[1]
-                    break
-                tol = np.abs((vals_u[0] - vals_u[1]) / vals_u[0])
-                if tol < self.ftol:
-                    ksi[ri] = rs[1]
-                    break
+        self.result = self.solver.solve(self.get_residuals, self.eq_sys.get_bounds,
+                                        np.zeros(n_reactions))
+        self.ksi = self.result.x
+        return self.result
 
 
 def make_reaction_matrix(reactions: list[ChemicalReaction]):
@@ -1,21 +1,30 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from math import exp, log
+
 import pytherm.eos as eos
 import numpy as np
+from pytherm import constants
 
 
 def fit_Pxy(model: eos.EOS, T: float, points=50):
-    system = model.get_system()
+    # the system of the model is left untouched
+    system = dict(model.get_system())
     subs = list(system.keys())
     pxy = []
     bubble_curve = [[], []]
     dew_curve = [[], []]
 
     xi = np.linspace(0.001, 0.999, num=points)
+    P_prev, y_prev = None, None
     for x in xi:
         system[subs[0]] = x
         system[subs[1]] = 1 - x
         unst = is_unstable(system, model, T)
         if unst > 0:
-            P, rez = find_xy(model=model, T=T, phase_l=system, P_s=unst)
+            # continuation from the previous point of the curve
+            P_s = P_prev if P_prev is not None else unst
+            P, rez = find_xy(model=model, T=T, phase_l=system, P_s=P_s, phase_v=y_prev)
+            P_prev, y_prev = P, rez
             bubble_curve[0].append(system[subs[0]])
             bubble_curve[1].append(P)
 
@@ -36,25 +45,155 @@ def fit_Pxy(model: eos.EOS, T: float, points=50):
 #         return True
 
 
-def is_unstable(system, model: eos.EOS, T: float, P=1E5, points=1000):
-    p = []
+def get_spinodal(system, model: eos.EOS, T: float) -> list:
+    r"""Molar volumes of the spinodal of an SRK type isotherm
+
+    The attraction parameter is recovered from one pressure evaluation,
+    :math:`dP/dV = 0` is the quartic
+
+    .. math::
+        RT V^4 + 2(bRT - a) V^3 + b(bRT + 3a) V^2 - a b^3 = 0
+
+    Parameters
+    ----------
+    system : dict[str, float]
+        Composition, [molar fraction]
+    model : eos.EOS
+        Equation of state :math:`P = \frac{RT}{V - b} - \frac{a}{V(V + b)}` with get_b
+    T : float
+        Temperature, [K]
+
+    Returns
+    -------
+    list[float]
+        Volumes of the local minimum and maximum of P, [m^3/mol],
+        empty without a van der Waals loop
+    """
+    RT = constants.R * T
     b = model.get_b(system)
-    vi = np.linspace(b * 1.4, 1600 / 1000000, num=points)
-    for i in vi:
-        p.append(model.get_p(system=system, T=T, V=i))
-    p = np.array(p)
-    grad_p = np.gradient(p)
-    # i_max = grad_p.argmax()
-    if grad_p.max() > 0:
-        zeros_index = find_zeros_index(grad_p)
-        max_v = p[zeros_index[1]]
-        min_v = p[zeros_index[0]]
-        if min_v > 0:
-            return (max_v + min_v)/2
-        else:
-            return max_v/2
-    else:
+    V = 2 * b
+    a = (RT / (V - b) - model.get_p(system=system, T=T, V=V)) * V * (V + b)
+    r = np.roots([RT, 2 * (b * RT - a), b * (b * RT + 3 * a), 0, -a * b ** 3])
+    return sorted(float(v.real) for v in r if v.imag == 0 and v.real > b)
+
+
+def is_unstable(system, model: eos.EOS, T: float, P=1E5, points=None):
+    """Initial pressure for bubble points from the spinodal of the isotherm
+
+    Parameters
+    ----------
+    system : dict[str, float]
+        Composition, [molar fraction]
+    model : eos.EOS
+        Equation of state of SRK type
+    T : float
+        Temperature, [K]
+    P : float, optional
+        Not used, by default 1E5
+    points : int, optional
+        Not used, the spinodal is found analytically by :func:`get_spinodal`
+
+    Returns
+    -------
+    float
+        Mean of the spinodal pressures (half of the maximum one if the minimum is negative),
+        [Pa], or -1 if the isotherm has no van der Waals loop
+    """
+    V = get_spinodal(system, model, T)
+    if len(V) < 2:
         return -1
+    min_v = model.get_p(system=system, T=T, V=V[0])
+    max_v = model.get_p(system=system, T=T, V=V[1])
+    if min_v > 0:
+        return (max_v + min_v)/2
+    else:
+        return max_v/2
+
+
+def get_lnphi(model: eos.EOS, system, T: float, P: float) -> tuple:
+    """ln of fugacity coefficients in the stable root of the cubic
+
+    Of two roots the one with the lower Gibbs energy is taken
+
+    Parameters
+    ----------
+    model : eos.EOS
+        Equation of state with get_roots and get_f
+    system : dict[str, float]
+        Composition, [molar fraction]
+    T : float
+        Temperature, [K]
+    P : float
+        Pressure, [Pa]
+
+    Returns
+    -------
+    tuple[np.ndarray, float]
+        ln phi in the order of system and the molar volume, [m^3/mol]
+    """
+    best = None
+    for V in model.get_roots(system=system, T=T, P=P):
+        f = model.get_f(system, P=P, V=V, T=T)
+        lnphi = np.log([f[i] for i in system])
+        g = sum(x * l for x, l in zip(system.values(), lnphi))
+        if best is None or g < best[0]:
+            best = (g, lnphi, V)
+    return best[1], best[2]
+
+
+def check_stability(model: eos.EOS, system, T: float, P: float, tol=1e-10, max_iter=100) -> tuple:
+    r"""Tangent plane stability test of a mixture
+
+    .. math::
+        tm(W) = 1 + \sum_i W_i \left(\ln W_i + \ln \varphi_i(w) - \ln z_i - \ln \varphi_i(z) - 1\right)
+
+    is minimized by substitution :math:`\ln W_i = \ln z_i + \ln \varphi_i(z) - \ln \varphi_i(w)`
+    from a vapor-like trial phase and from every nearly pure component.
+    The mixture is unstable if any trial reaches :math:`tm < 0`
+
+    Parameters
+    ----------
+    model : eos.EOS
+        Equation of state with get_roots and get_f
+    system : dict[str, float]
+        Composition z, [molar fraction]
+    T : float
+        Temperature, [K]
+    P : float
+        Pressure, [Pa]
+    tol : float, optional
+        Tolerance on ln W, by default 1e-10
+    max_iter : int, optional
+        Maximum number of iterations per trial phase, by default 100
+
+    Returns
+    -------
+    tuple[bool, float, dict[str, float]]
+        Stability, the smallest tm and the composition of its trial phase
+    """
+    names = list(system)
+    z = np.array([system[i] for i in names])
+    lnphi_z, _ = get_lnphi(model, system, T, P)
+    with np.errstate(divide="ignore"):
+        d = np.log(z) + lnphi_z
+
+    n = len(z)
+    trials = [np.exp(d)] + [np.where(np.arange(n) == j, 1.0, 1e-6) for j in range(n)]
+    tm_min, w_min = np.inf, z
+    for W in trials:
+        for _ in range(max_iter):
+            lnphi_w, _ = get_lnphi(model, dict(zip(names, W / W.sum())), T, P)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ln_W = np.log(W)
+                tm = 1 + np.sum(np.where(W > 0, W * (ln_W + lnphi_w - d - 1), 0))
+                ln_W_new = d - lnphi_w
+                converged = np.max(np.where(W > 0, np.abs(ln_W_new - ln_W), 0)) < tol
+            W = np.exp(ln_W_new)
+            if converged:
+                break
+        if tm < tm_min:
+            tm_min, w_min = tm, W / W.sum()
+    return tm_min > -tol, float(tm_min), dict(zip(names, w_min))
 
 
 def find_zeros_index(y):
@@ -66,16 +205,51 @@ def find_zeros_index(y):
             zeros.append(i)
     return zeros
 
-def find_xy(model: eos.EOS, T: float, phase_l, abs_err=1e-4, P_s=1E5):
-    phase_v = {}
-    for i in phase_l:
-        phase_v[i] = phase_l[i]
+def find_xy(model: eos.EOS, T: float, phase_l, abs_err=1e-4, P_s=1E5, phase_v=None, max_iter=100,
+            full_output=False):
+    r"""Bubble pressure and vapor composition of a liquid
+
+    Secant iterations on ln P for :math:`F = \ln \sum_i x_i K_i`, the vapor composition
+    is updated by substitution at every iteration. The first step assumes that
+    the liquid fugacities do not depend on P. For :class:`pytherm.eos.PSRK_UNIFAC`
+    use its ``bubble_p`` method with analytic derivatives instead
+
+    Parameters
+    ----------
+    model : eos.EOS
+        Equation of state
+    T : float
+        Temperature, [K]
+    phase_l : dict[str, float]
+        Liquid composition, [molar fraction]
+    abs_err : float, optional
+        Tolerance on the sum of the vapor molar fractions, by default 1e-4
+    P_s : float, optional
+        Initial pressure, [Pa], by default 1E5
+    phase_v : dict[str, float], optional
+        Initial vapor composition, by default the liquid one
+    max_iter : int, optional
+        Maximum number of iterations, by default 100
+    full_output : bool, optional
+        Also return whether the iterations converged instead of raising, by default False
 
-    P = P_s
-    step = P_s / 4
-    err = 2
-    prev_err = 3
-    while True:
+    Returns
+    -------
+    tuple[float, dict[str, float]] | tuple[float, dict[str, float], bool]
+        Bubble pressure, [Pa] and vapor composition
+
+    Raises
+    ------
+    RuntimeError
+        If the sum of the vapor molar fractions is not within abs_err of 1 after max_iter
+        iterations and full_output is False
+    """
+    phase_v = dict(phase_l if phase_v is None else phase_v)
+    ln_p = log(P_s)
+    prev = None
+    converged = False
+    for _ in range(max_iter):
+        P = exp(ln_p)
         r = model.get_roots(system=phase_l, T=T, P=P)
         f_l = model.get_f(phase_l, P=P, V=r[0], T=T)
 
@@ -85,26 +259,175 @@ def find_xy(model: eos.EOS, T: float, phase_l, abs_err=1e-4, P_s=1E5):
         yi = {}
         for i in phase_l:
             yi[i] = phase_l[i] * f_l[i] / f_v[i]
-
-        s = 0
-        for i in yi:
-            s += yi[i]
-
+        s = sum(yi.values())
         for i in yi:
             phase_v[i] = yi[i] / s
 
-        prev_err = err
-        err = s - 1
-        if abs(err) < abs_err:
+        if abs(s - 1) < abs_err:
+            converged = True
             break
-        if err / prev_err < 0:
-            step /= 2
-
-        if err > 0:
-            P += step
-        if err < 0:
-            if P - step < 0:
-                step /= 2
-            P -= step
+        err = log(s)
+        # d F / d ln P, -1 for an incompressible liquid and an ideal vapor
+        slope = -1
+        if prev is not None and ln_p != prev[0]:
+            slope = (err - prev[1]) / (ln_p - prev[0])
+            if slope >= 0:
+                slope = -1
+        prev = (ln_p, err)
+        ln_p -= max(-1, min(1, err / slope))
 
+    if full_output:
+        return P, phase_v, converged
+    if not converged:
+        raise RuntimeError(f"bubble pressure did not converge in {max_iter} iterations, P = {P:.6g} Pa")
     return P, phase_v
+
+
+def _binary_grid(n_points: int, x_min: float) -> np.ndarray:
+    x1 = np.linspace(x_min, 1 - x_min, n_points)
+    return np.stack((x1, 1 - x1), axis=-1)
+
+
+def _repeat_curves(x: np.ndarray, n_curves: int) -> np.ndarray:
+    return np.ascontiguousarray(np.broadcast_to(x, (n_curves,) + x.shape))
+
+
+def get_Pxy(model: eos.PSRK_UNIFAC, T, n_points=101, x_min=1e-3, n_threads=1) -> dict:
+    """Pxy diagram of a binary system
+
+    Bubble pressures are solved along the liquid composition, every point
+    starts from the previous one. The bubble curve is (x, P) and the dew curve
+    is (y, P). Isotherms are independent and are distributed over threads
+
+    Parameters
+    ----------
+    model : eos.PSRK_UNIFAC
+        Equation of state of a binary system
+    T : float | np.ndarray
+        Temperature, [K] or array of temperatures [n_T]
+    n_points : int, optional
+        Number of liquid compositions, by default 101
+    x_min : float, optional
+        Minimal molar fraction of a component, by default 1e-3
+    n_threads : int, optional
+        Number of threads over isotherms, 0 to use all cores, by default 1
+
+    Returns
+    -------
+    dict
+        Result of :meth:`PSRK_UNIFAC.bubble_p`, "P", "converged" etc. are
+        arrays [n_points] or [n_T, n_points], "x" and "y" have one more axis of components
+    """
+    T = np.asarray(T, dtype=np.float64)
+    x = _binary_grid(n_points, x_min)
+    if T.ndim:
+        x = _repeat_curves(x, len(T))
+    return model.bubble_p(x, T, n_threads=n_threads)
+
+
+def get_Txy(model: eos.PSRK_UNIFAC, P, n_points=101, x_min=1e-3, n_threads=1) -> dict:
+    """Txy diagram of a binary system
+
+    Same as :func:`get_Pxy` with bubble temperatures at fixed pressures
+
+    Parameters
+    ----------
+    model : eos.PSRK_UNIFAC
+        Equation of state of a binary system
+    P : float | np.ndarray
+        Pressure, [Pa] or array of pressures [n_P]
+    n_points : int, optional
+        Number of liquid compositions, by default 101
+    x_min : float, optional
+        Minimal molar fraction of a component, by default 1e-3
+    n_threads : int, optional
+        Number of threads over isobars, 0 to use all cores, by default 1
+
+    Returns
+    -------
+    dict
+        Result of :meth:`PSRK_UNIFAC.bubble_t`
+    """
+    P = np.asarray(P, dtype=np.float64)
+    x = _binary_grid(n_points, x_min)
+    if P.ndim:
+        x = _repeat_curves(x, len(P))
+    return model.bubble_t(x, P, n_threads=n_threads)
+
+
+def get_envelope(model: eos.PSRK_UNIFAC, z, P, n_threads=1) -> dict:
+    """P-T phase envelope of mixtures with fixed compositions
+
+    Bubble and dew temperatures are traced along increasing pressures with
+    continuation. The envelope is not traced through the critical region: near the
+    critical point the bubble and dew branches are not solved and are NaN, as are
+    points without a solution, e.g. above the cricondenbar
+
+    Parameters
+    ----------
+    model : eos.PSRK_UNIFAC
+        Equation of state
+    z : np.ndarray
+        Composition [n_comps] or compositions [n_z, n_comps], [molar fraction]
+    P : float | np.ndarray
+        Pressure or pressures [n_points], [Pa]
+    n_threads : int, optional
+        Number of threads over compositions, 0 to use all cores, by default 1
+
+    Returns
+    -------
+    dict
+        "P" [n_points], "T_bubble", "T_dew" [n_points] or [n_z, n_points], [K],
+        incipient vapor "y_bubble" and liquid "x_dew" compositions
+    """
+    z = np.asarray(z, dtype=np.float64)
+    P = np.atleast_1d(np.asarray(P, dtype=np.float64))
+    if P.ndim != 1:
+        raise ValueError("P must be a float or a 1-D array [n_points]")
+    single = z.ndim == 1
+    z = np.atleast_2d(z)
+    # curve k holds the composition z[k] at every pressure
+    feed = np.ascontiguousarray(np.broadcast_to(z[:, None, :], (len(z), len(P), z.shape[1])))
+    spec = _repeat_curves(P, len(z))
+    bubble = model.bubble_t(feed, spec, n_threads=n_threads)
+    dew = model.dew_t(feed, spec, n_threads=n_threads)
+
+    res = {
+        "P": P,
+        "T_bubble": np.where(bubble["converged"], bubble["T"], np.nan),
+        "T_dew": np.where(dew["converged"], dew["T"], np.nan),
+        "y_bubble": np.where(bubble["converged"][..., None], bubble["y"], np.nan),
+        "x_dew": np.where(dew["converged"][..., None], dew["x"], np.nan),
+    }
+    if single:
+        res = {k: v if k == "P" else v[0] for k, v in res.items()}
+    return res
+
+
+def map_systems(func, systems, n_workers=None, processes=False) -> list:
+    """Apply func to every system in a pool of workers
+
+    Solvers of :class:`pytherm.eos.PSRK_UNIFAC` release the GIL, so threads
+    scale over cores. With processes func must be a module-level function
+    that builds its own models, since native models can not be pickled
+
+    Parameters
+    ----------
+    func : Callable
+        Function of one system, e.g. building the model of a binary pair and
+        calling :func:`get_Pxy`
+    systems : Iterable
+        Systems
+    n_workers : int, optional
+        Number of workers, by default the number of cores
+    processes : bool, optional
+        Use a process pool instead of a thread pool, by default False
+
+    Returns
+    -------
+    list
+        Results in the order of systems
+    """
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=n_workers) as pool:
+        return list(pool.map(func, systems))
@@ -1,39 +1,176 @@
 #pragma once
 
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
 #include <pytherm/activity/activitymodel.h>
+#include <pytherm/matrix.h>
 
 namespace py = pybind11;
 
-class PyActivityModel : public ActivityModel  {
+template <typename Real>
+class PyActivityModel : public BasicActivityModel<Real>  {
 public:
     /* Inherit the constructors */
-    using ActivityModel::ActivityModel;
+    using BasicActivityModel<Real>::BasicActivityModel;
 
     /* Trampoline (need one for each virtual function) */
-    std::vector<float> get_y(const std::vector<float> &conc, float T) override {
+    std::vector<Real> get_y(const std::vector<Real> &conc, Real T) override {
         PYBIND11_OVERRIDE_PURE(
-            std::vector<float>, /* Return type */
-            ActivityModel,      /* Parent class */
+            std::vector<Real>,  /* Return type */
+            BasicActivityModel<Real>, /* Parent class */
             get_y,          /* Name of function in C++ (must match Python name) */
             conc, T      /* Argument(s) */
         );
     }
 
-    std::vector<float> get_a(const std::vector<float> &conc, float T) override {
+    std::vector<Real> get_a(const std::vector<Real> &conc, Real T) override {
         PYBIND11_OVERRIDE_PURE(
-            std::vector<float>, /* Return type */
-            ActivityModel,      /* Parent class */
+            std::vector<Real>,  /* Return type */
+            BasicActivityModel<Real>, /* Parent class */
             get_a,          /* Name of function in C++ (must match Python name) */
             conc, T      /* Argument(s) */
         );
     }
 };
 
-void linkActivityModel(py::module& m)
+template <typename Real>
+using ndarray_t = py::array_t<Real, py::array::c_style | py::array::forcecast>;
+
+/* Shared binding for ActivityModel::get_y_batch, C-contiguous input of the model dtype is used without copying.
+   The GIL is released while the batch is evaluated */
+template <typename Real>
+py::array_t<Real> get_y_batch(BasicActivityModel<Real> &self, ndarray_t<Real> conc, ndarray_t<Real> T, int n_threads)
+{
+    if (conc.ndim() != 2)
+    {
+        throw std::invalid_argument("conc must be a 2-D array [n_points, n_comps]");
+    }
+    size_t n_points = conc.shape(0);
+    size_t n_comps = conc.shape(1);
+
+    size_t T_stride;
+    if (T.ndim() == 0)
+    {
+        T_stride = 0;
+    }
+    else if (T.ndim() == 1 && (size_t)T.shape(0) == n_points)
+    {
+        T_stride = 1;
+    }
+    else
+    {
+        throw std::invalid_argument("T must be a float or a 1-D array [n_points]");
+    }
+
+    py::array_t<Real> y({n_points, n_comps});
+    const Real *conc_ptr = conc.data();
+    const Real *T_ptr = T.data();
+    Real *y_ptr = y.mutable_data();
+    {
+        py::gil_scoped_release release;
+        self.get_y_batch(conc_ptr, T_ptr, n_points, n_comps, T_stride, y_ptr, n_threads);
+    }
+    return y;
+}
+
+/* Shared binding for get_y(conc, T, out=...) of models with get_y_into.
+   out must be a writable C-contiguous array of the model dtype with n_comps elements, it is filled in place
+   and returned. It is never converted, other arrays raise instead of filling a temporary copy */
+template <typename Model, typename Real = typename Model::real_type>
+py::array get_y_out(Model &self, ndarray_t<Real> conc, Real T, py::array out)
 {
-    py::class_<ActivityModel, PyActivityModel>(m, "ActivityModel")
+    size_t n_comps = self.get_n_comps();
+    if (conc.ndim() != 1 || (size_t)conc.shape(0) != n_comps)
+    {
+        throw std::invalid_argument("conc must be a 1-D array of " + std::to_string(n_comps) + " components");
+    }
+    if (out.ndim() != 1 || (size_t)out.shape(0) != n_comps)
+    {
+        throw std::invalid_argument("out must be a 1-D array of " + std::to_string(n_comps) + " components");
+    }
+    if (!py::isinstance<py::array_t<Real>>(out))
+    {
+        throw std::invalid_argument("out must have the model dtype " + std::string(py::str(py::dtype::of<Real>())));
+    }
+    if (!(out.flags() & py::array::c_style))
+    {
+        throw std::invalid_argument("out must be C-contiguous");
+    }
+    if (!out.writeable())
+    {
+        throw std::invalid_argument("out must be writeable");
+    }
+    self.get_y_into(conc.data(), T, static_cast<Real *>(out.mutable_data()));
+    return out;
+}
+
+/* Shared binding for get_lny_and_jacobian of models with analytic derivatives.
+   Returns (ln_y [n_comps], d ln_y_i / d x_j [n_comps, n_comps], d ln_y_i / dT [n_comps]) */
+template <typename Model, typename Real = typename Model::real_type>
+py::tuple get_lny_and_jacobian(Model &self, ndarray_t<Real> conc, Real T)
+{
+    size_t n_comps = self.get_n_comps();
+    if (conc.ndim() != 1 || (size_t)conc.shape(0) != n_comps)
+    {
+        throw std::invalid_argument("conc must be a 1-D array of " + std::to_string(n_comps) + " components");
+    }
+    py::array_t<Real> lny(n_comps);
+    py::array_t<Real> dlny_dx({n_comps, n_comps});
+    py::array_t<Real> dlny_dT(n_comps);
+    self.get_lny_and_jacobian(conc.data(), T, lny.mutable_data(), dlny_dx.mutable_data(), dlny_dT.mutable_data());
+    return py::make_tuple(lny, dlny_dx, dlny_dT);
+}
+
+/* Read-only zero-copy NumPy view of a Matrix split into blocks of rows, base keeps the owner alive.
+   blocks == 1 gives a [rows, cols] array, otherwise [blocks, rows / blocks, cols] */
+template <typename T>
+py::array_t<T> matrix_view(const Matrix<T> &m, py::handle base, size_t blocks = 1)
+{
+    size_t rows = blocks ? m.rows / blocks : 0;
+    std::vector<size_t> shape {rows, m.cols};
+    std::vector<size_t> strides {m.ld * sizeof(T), sizeof(T)};
+    if (blocks != 1)
+    {
+        shape.insert(shape.begin(), blocks);
+        strides.insert(strides.begin(), rows * m.ld * sizeof(T));
+    }
+    py::array_t<T> view(shape, strides, m.data.data(), base);
+    py::detail::array_proxy(view.ptr())->flags &= ~py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+    return view;
+}
+
+/* Capsule that keeps a shared_ptr alive for the lifetime of NumPy views */
+template <typename T>
+py::capsule shared_owner(const std::shared_ptr<T> &ptr)
+{
+    return py::capsule(new std::shared_ptr<T>(ptr), [](void *p) { delete reinterpret_cast<std::shared_ptr<T> *>(p); });
+}
+
+/* Shared binding for models with a TemperatureCache */
+template <typename Model>
+py::dict cache_info(const Model &self)
+{
+    const auto &cache = self.get_cache();
+    return py::dict(
+        "hits"_a = cache.get_hits(),
+        "misses"_a = cache.get_misses(),
+        "maxsize"_a = cache.get_max_size(),
+        "currsize"_a = cache.get_size()
+    );
+}
+
+template <typename Real>
+void linkBasicActivityModel(py::module& m, const char *name)
+{
+    py::class_<BasicActivityModel<Real>, PyActivityModel<Real>>(m, name)
         .def(py::init<>())
-        .def("get_y", &ActivityModel::get_y)
-        .def("get_a", &ActivityModel::get_a);
+        .def("get_y", &BasicActivityModel<Real>::get_y)
+        .def("get_a", &BasicActivityModel<Real>::get_a)
+        .def("get_y_batch", &get_y_batch<Real>, "conc"_a, "T"_a, "n_threads"_a = 1);
+}
+
+void linkActivityModel(py::module& m)
+{
+    linkBasicActivityModel<float>(m, "ActivityModel");
+    linkBasicActivityModel<double>(m, "ActivityModel64");
 }
\ No newline at end of file
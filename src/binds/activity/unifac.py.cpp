@@ -6,18 +6,20 @@
 
 using namespace pybind11::literals;
 
-class PyUNIFAC : public UNIFAC
+template <typename Real>
+class PyUNIFAC : public BasicUNIFAC<Real>
 {
 public:
-    using UNIFAC::UNIFAC; // Inherit constructors
-    vector<float> get_y(const vector<float> &conc, float T) override { PYBIND11_OVERRIDE_PURE(vector<float>, UNIFAC, get_y, conc, T); }
+    using BasicUNIFAC<Real>::BasicUNIFAC; // Inherit constructors
+    vector<Real> get_y(const vector<Real> &conc, Real T) override { PYBIND11_OVERRIDE_PURE(vector<Real>, BasicUNIFAC<Real>, get_y, conc, T); }
 };
 
-class PyUNIFAC_W : public UNIFAC_W
+template <typename Real>
+class PyUNIFAC_W : public BasicUNIFAC_W<Real>
 {
 public:
-    using UNIFAC_W::UNIFAC_W; // Inherit constructors
-    vector<float> get_y(const vector<float> &conc, float T) override { PYBIND11_OVERRIDE(vector<float>, UNIFAC_W, get_y, conc, T); }
+    using BasicUNIFAC_W<Real>::BasicUNIFAC_W; // Inherit constructors
+    vector<Real> get_y(const vector<Real> &conc, Real T) override { PYBIND11_OVERRIDE(vector<Real>, BasicUNIFAC_W<Real>, get_y, conc, T); }
 };
 
 // class PyUNIFAC_VISCO : public UNIFAC_VISCO
@@ -28,13 +30,32 @@ public:
 // };
 
 
+template <typename Real>
+void linkBasicUNIFAC(py::module& m, const std::string &suffix);
+
 void linkUNIFAC(py::module& m)
 {
     py::class_<ParametersUNIFAC>(m, "ParametersUNIFAC")
         .def(py::init<std::string>(), R"pbdoc(
-            Load parameters form .dat file
+            Load parameters form .dat file or binary .ufb file
+
+            The format is detected by the file header. Binary files are memory mapped,
+            the interaction table is used in place and shared by all processes loading the same file
             )pbdoc",
             "path"_a)
+
+        .def("save_binary", &ParametersUNIFAC::save_binary, R"pbdoc(
+        Save parameters in the binary .ufb format
+
+        Parameters
+        ----------
+        path : str
+            Output file path
+        )pbdoc",
+            "path"_a)
+
+        .def_property_readonly("is_mapped", &ParametersUNIFAC::is_mapped,
+            "True if parameters were loaded from a memory mapped binary file")
         
         .doc() = "A special class that holds UNIFAC parameters";
 
@@ -62,10 +83,21 @@ void linkUNIFAC(py::module& m)
 
         .doc() = "A special class that holds UNIFAC substances";
 
-    py::class_<UNIFAC, ActivityModel, PyUNIFAC>(m, "UNIFAC")
+    linkBasicUNIFAC<float>(m, "");
+    linkBasicUNIFAC<double>(m, "64");
+}
+
+/* Registers UNIFAC, UNIFAC_W and UNIFAC_VISCO in Real precision, suffix is appended to class names */
+template <typename Real>
+void linkBasicUNIFAC(py::module& m, const std::string &suffix)
+{
+    const std::string precision = std::is_same<Real, double>::value
+        ? "Double precision (float64) model" : "Single precision (float32) model";
+
+    py::class_<BasicUNIFAC<Real>, BasicActivityModel<Real>, PyUNIFAC<Real>>(m, ("UNIFAC" + suffix).c_str())
         .def(py::init<ParametersUNIFAC &, SubstancesUNIFAC &>())
 
-        .def("get_a", &UNIFAC::get_a, R"pbdoc(
+        .def("get_a", &BasicUNIFAC<Real>::get_a, R"pbdoc(
         Calculate activities for conc array
 
         Concentrations must be in molar fractions
@@ -88,7 +120,35 @@ void linkUNIFAC(py::module& m)
         )pbdoc",
              "conc"_a, "T"_a)
 
-        .def("get_y", &UNIFAC::get_y, R"pbdoc(
+        .def("get_y", &get_y_out<BasicUNIFAC<Real>>, R"pbdoc(
+        Calculate activity coefficients for conc array and write them to out
+
+        Concentrations must be in molar fractions.
+        Nothing is allocated when conc has the model dtype and T is cached
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration array [n_comps], [molar fraction]
+        T : float
+            Temperature, [K]
+        out : np.ndarray
+            Writable C-contiguous array of the model dtype [n_comps],
+            other arrays raise ValueError instead of being copied
+
+        Returns
+        -------
+        np.ndarray
+            out filled with activity coefficients
+
+        Examples
+        --------
+        >>> y = np.empty(2, dtype=np.float32)
+        >>> UNIFAC.get_y(np.array([0.5, 0.5], dtype=np.float32), T=298, out=y)
+        )pbdoc",
+             "conc"_a, "T"_a, py::kw_only(), "out"_a)
+
+        .def("get_y", &BasicUNIFAC<Real>::get_y, R"pbdoc(
         Calculate activity coefficients for conc array
 
         Concentrations must be in molar fractions
@@ -114,7 +174,122 @@ void linkUNIFAC(py::module& m)
         )pbdoc",
              "conc"_a, "T"_a)
 
-        .doc() = R"pbdoc(
+        .def("get_lny_and_jacobian", &get_lny_and_jacobian<BasicUNIFAC<Real>>, R"pbdoc(
+        Calculate ln of activity coefficients with analytical derivatives
+
+        Concentrations must be in molar fractions.
+        Derivatives are taken with respect to every concentration
+        with the others fixed, the sum constraint is not applied
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration array [n_comps], [molar fraction]
+        T : float
+            Temperature, [K]
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]
+            ln_y [n_comps], d ln_y_i / d conc_j [n_comps, n_comps] and d ln_y_i / dT [n_comps]
+
+        Examples
+        --------
+        >>> lny, dlny_dx, dlny_dT = UNIFAC.get_lny_and_jacobian([0.5, 0.5], T=298)
+        )pbdoc",
+             "conc"_a, "T"_a)
+
+        .def("get_y_batch", &get_y_batch<Real>, R"pbdoc(
+        Calculate activity coefficients for every row of conc matrix
+
+        Concentrations must be in molar fractions.
+        C-contiguous arrays of the model dtype are used without copying.
+        The GIL is released and the points are split over n_threads native threads
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration matrix [n_points, n_comps], [molar fraction]
+        T : float | np.ndarray
+            Temperature, [K], one for all points or array [n_points]
+        n_threads : int, optional
+            Number of threads, 0 to use all cores, by default 1
+
+        Returns
+        -------
+        np.ndarray
+            Activity coefficients matrix [n_points, n_comps]
+
+        Examples
+        --------
+        >>> UNIFAC.get_y_batch(np.array([[0.5, 0.5], [0.6, 0.4]]), T=298)
+        )pbdoc",
+             "conc"_a, "T"_a, "n_threads"_a = 1)
+
+        .def("set_cache_size", &BasicUNIFAC<Real>::set_cache_size, R"pbdoc(
+        Set the maximum number of temperatures kept in the LRU cache
+        of temperature dependent parameters, 0 disables caching
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of cached temperatures, by default 8
+        )pbdoc",
+             "maxsize"_a)
+
+        .def("cache_info", &cache_info<BasicUNIFAC<Real>>, R"pbdoc(
+        Temperature cache statistics
+
+        Only lookups on temperature change are counted,
+        repeated calls with the same temperature reuse the last state
+
+        Returns
+        -------
+        dict
+            {"hits": int, "misses": int, "maxsize": int, "currsize": int}
+        )pbdoc")
+
+        .def("cache_clear", &BasicUNIFAC<Real>::cache_clear, "Clear the temperature cache and its statistics")
+
+        .def_property_readonly("group_comp", [](py::object self)
+        {
+            return matrix_view(self.cast<BasicUNIFAC<Real> &>().get_group_comp(), self);
+        }, "Read-only view of groups matrix [n_comps, n_groups]")
+
+        .def_property_readonly("res_params", [](py::object self)
+        {
+            return matrix_view(self.cast<BasicUNIFAC<Real> &>().get_res_params(), self, 3);
+        }, "Read-only view of interaction parameters a, b, c [3, n_groups, n_groups]")
+
+        .def("get_psi", [](BasicUNIFAC<Real> &self, Real T)
+        {
+            auto st = self.get_cached_state(T);
+            return matrix_view(st->psi, shared_owner(st));
+        }, R"pbdoc(
+        Read-only view of psi matrix [n_groups, n_groups] for temperature T
+
+        Parameters
+        ----------
+        T : float
+            Temperature, [K]
+        )pbdoc",
+             "T"_a)
+
+        .def("get_ln_gamma_pure", [](BasicUNIFAC<Real> &self, Real T)
+        {
+            auto st = self.get_cached_state(T);
+            return matrix_view(st->ln_gamma_pure, shared_owner(st));
+        }, R"pbdoc(
+        Read-only view of groups ln_gamma for pure components [n_comps, n_groups] for temperature T
+
+        Parameters
+        ----------
+        T : float
+            Temperature, [K]
+        )pbdoc",
+             "T"_a)
+
+        .doc() = precision + R"pbdoc(
         Implementation of the UNIFAC model to work with molar fractions
 
         UNIFAC type (classic or modified) depends on :obj:`.ParametersUNIFAC`
@@ -125,12 +300,19 @@ void linkUNIFAC(py::module& m)
             ParametersUNIFAC object with interaction parameters
         substances : SubstancesUNIFAC
             Substances UNIFAC object with substance's group representation
+
+        Raises
+        ------
+        KeyError
+            A subgroup of substances is not in the dataset
+        ValueError
+            The dataset has no interaction parameters for a pair of main groups
         )pbdoc";
 
-    py::class_<UNIFAC_W, UNIFAC, PyUNIFAC_W>(m, "UNIFAC_W")
-        .def(py::init<ParametersUNIFAC &, SubstancesUNIFAC &, vector<float> &>())
+    py::class_<BasicUNIFAC_W<Real>, BasicUNIFAC<Real>, PyUNIFAC_W<Real>>(m, ("UNIFAC_W" + suffix).c_str())
+        .def(py::init<ParametersUNIFAC &, SubstancesUNIFAC &, vector<Real> &>())
 
-        .def("get_a", &UNIFAC::get_a, R"pbdoc(
+        .def("get_a", &BasicUNIFAC<Real>::get_a, R"pbdoc(
         Calculate activities for conc array
 
         Concentrations must be in weight fractions
@@ -153,7 +335,30 @@ void linkUNIFAC(py::module& m)
         )pbdoc",
              "conc"_a, "T"_a)
 
-        .def("get_y", &UNIFAC_W::get_y, R"pbdoc(
+        .def("get_y", &get_y_out<BasicUNIFAC_W<Real>>, R"pbdoc(
+        Calculate activity coefficients for conc array and write them to out
+
+        Concentrations must be in weight fractions.
+        Nothing is allocated when conc has the model dtype and T is cached
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration array [n_comps], [weight fraction]
+        T : float
+            Temperature, [K]
+        out : np.ndarray
+            Writable C-contiguous array of the model dtype [n_comps],
+            other arrays raise ValueError instead of being copied
+
+        Returns
+        -------
+        np.ndarray
+            out filled with activity coefficients
+        )pbdoc",
+             "conc"_a, "T"_a, py::kw_only(), "out"_a)
+
+        .def("get_y", &BasicUNIFAC_W<Real>::get_y, R"pbdoc(
         Calculate activity coefficients for conc array
 
         Concentrations must be in weight fractions
@@ -174,8 +379,57 @@ void linkUNIFAC(py::module& m)
             Activity coefficients
       )pbdoc",
              "conc"_a, "T"_a)
-             
-        .doc() = R"pbdoc(
+
+        .def("get_lny_and_jacobian", &get_lny_and_jacobian<BasicUNIFAC_W<Real>>, R"pbdoc(
+        Calculate ln of activity coefficients with analytical derivatives
+
+        Concentrations must be in weight fractions.
+        Derivatives are taken with respect to every concentration
+        with the others fixed, the sum constraint is not applied
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration array [n_comps], [weight fraction]
+        T : float
+            Temperature, [K]
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]
+            ln_y [n_comps], d ln_y_i / d conc_j [n_comps, n_comps] and d ln_y_i / dT [n_comps]
+
+        Examples
+        --------
+        >>> lny, dlny_dx, dlny_dT = UNIFAC_W.get_lny_and_jacobian([0.5, 0.5], T=298)
+        )pbdoc",
+             "conc"_a, "T"_a)
+
+        .def("get_y_batch", &get_y_batch<Real>, R"pbdoc(
+        Calculate activity coefficients for every row of conc matrix
+
+        Concentrations must be in weight fractions.
+        C-contiguous arrays of the model dtype are used without copying.
+        The GIL is released and the points are split over n_threads native threads
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration matrix [n_points, n_comps], [weight fraction]
+        T : float | np.ndarray
+            Temperature, [K], one for all points or array [n_points]
+        n_threads : int, optional
+            Number of threads, 0 to use all cores, by default 1
+
+        Returns
+        -------
+        np.ndarray
+            Activity coefficients matrix [n_points, n_comps]
+        )pbdoc",
+             "conc"_a, "T"_a, "n_threads"_a = 1)
+
+
+        .doc() = precision + R"pbdoc(
         Implementation of the UNIFAC model to work with weight fractions
 
         UNIFAC type (classic or modified) depends on :obj:`.ParametersUNIFAC`
@@ -188,8 +442,7 @@ void linkUNIFAC(py::module& m)
             Substances UNIFAC object with substance's group representation
         )pbdoc";
 
-    py::class_<UNIFAC_VISCO, UNIFAC>(m, "UNIFAC_VISCO")
+    py::class_<BasicUNIFAC_VISCO<Real>, BasicUNIFAC<Real>>(m, ("UNIFAC_VISCO" + suffix).c_str())
         .def(py::init<ParametersUNIFAC &, SubstancesUNIFAC &>())
-        .def("get_GE_RT", &UNIFAC_VISCO::get_GE_RT, "Get GE_RT", "conc"_a, "T"_a);
-
-}
\ No newline at end of file
+        .def("get_GE_RT", &BasicUNIFAC_VISCO<Real>::get_GE_RT, "Get GE_RT", "conc"_a, "T"_a);
+}
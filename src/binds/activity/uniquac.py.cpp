@@ -4,12 +4,17 @@
 #include <pytherm/activity/uniquac.cpp>
 
 
-void linkUNIQUAC(py::module& m)
+/* Registers UNIQUAC in Real precision, suffix is appended to the class name */
+template <typename Real>
+void linkBasicUNIQUAC(py::module& m, const std::string &suffix)
 {
-    py::class_<UNIQUAC, ActivityModel>(m, "UNIQUAC")
-        .def(py::init<std::vector<float> &, std::vector<float> &, std::vector<std::vector<std::vector<float>>> &>(), "r"_a, "q"_a, "res_matrix"_a)
+    const std::string precision = std::is_same<Real, double>::value
+        ? "Double precision (float64) model" : "Single precision (float32) model";
+
+    py::class_<BasicUNIQUAC<Real>, BasicActivityModel<Real>>(m, ("UNIQUAC" + suffix).c_str())
+        .def(py::init<std::vector<Real> &, std::vector<Real> &, std::vector<std::vector<std::vector<Real>>> &>(), "r"_a, "q"_a, "res_matrix"_a)
         
-        .def("get_y", &UNIQUAC::get_y, "conc"_a, "T"_a, R"pbdoc(
+        .def("get_y", &BasicUNIQUAC<Real>::get_y, "conc"_a, "T"_a, R"pbdoc(
         Calculate activity coefficients for conc array
 
         Concentrations must be in molar fractions
@@ -33,7 +38,7 @@ void linkUNIQUAC(py::module& m)
         --------
         >>> UNIFAC.get_y([0.5, 0.5], T=298)
         )pbdoc")
-        .def("get_a", &UNIQUAC::get_a, "conc"_a, "T"_a, R"pbdoc(
+        .def("get_a", &BasicUNIQUAC<Real>::get_a, "conc"_a, "T"_a, R"pbdoc(
         Calculate activities for conc array
 
         Concentrations must be in molar fractions
@@ -54,7 +59,77 @@ void linkUNIQUAC(py::module& m)
         --------
         >>> UNIQUAC.get_a([0.5, 0.5], T=298)
         )pbdoc")
-        .doc() = R"pbdoc(
+        .def("get_lny_and_jacobian", &get_lny_and_jacobian<BasicUNIQUAC<Real>>, "conc"_a, "T"_a, R"pbdoc(
+        Calculate ln of activity coefficients with analytical derivatives
+
+        Concentrations must be in molar fractions.
+        Derivatives are taken with respect to every concentration
+        with the others fixed, the sum constraint is not applied
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration array [n_comps], [molar fraction]
+        T : float
+            Temperature, [K]
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]
+            ln_y [n_comps], d ln_y_i / d conc_j [n_comps, n_comps] and d ln_y_i / dT [n_comps]
+
+        Examples
+        --------
+        >>> lny, dlny_dx, dlny_dT = UNIQUAC.get_lny_and_jacobian([0.5, 0.5], T=298)
+        )pbdoc")
+        .def("get_y_batch", &get_y_batch<Real>, "conc"_a, "T"_a, "n_threads"_a = 1, R"pbdoc(
+        Calculate activity coefficients for every row of conc matrix
+
+        Concentrations must be in molar fractions.
+        C-contiguous arrays of the model dtype are used without copying.
+        The GIL is released and the points are split over n_threads native threads
+
+        Parameters
+        ----------
+        conc : np.ndarray
+            Input concentration matrix [n_points, n_comps], [molar fraction]
+        T : float | np.ndarray
+            Temperature, [K], one for all points or array [n_points]
+        n_threads : int, optional
+            Number of threads, 0 to use all cores, by default 1
+
+        Returns
+        -------
+        np.ndarray
+            Activity coefficients matrix [n_points, n_comps]
+
+        Examples
+        --------
+        >>> UNIQUAC.get_y_batch(np.array([[0.5, 0.5], [0.6, 0.4]]), T=298)
+        )pbdoc")
+        .def("set_cache_size", &BasicUNIQUAC<Real>::set_cache_size, R"pbdoc(
+        Set the maximum number of temperatures kept in the LRU cache
+        of temperature dependent parameters, 0 disables caching
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of cached temperatures, by default 8
+        )pbdoc",
+             "maxsize"_a)
+        .def("cache_info", &cache_info<BasicUNIQUAC<Real>>, R"pbdoc(
+        Temperature cache statistics
+
+        Only lookups on temperature change are counted,
+        repeated calls with the same temperature reuse the last state
+
+        Returns
+        -------
+        dict
+            {"hits": int, "misses": int, "maxsize": int, "currsize": int}
+        )pbdoc")
+        .def("cache_clear", &BasicUNIQUAC<Real>::cache_clear, "Clear the temperature cache and its statistics")
+        .doc() = precision + R"pbdoc(
         Implementation of the UNIQUAC model
 
         Parameters
@@ -66,4 +141,10 @@ void linkUNIQUAC(py::module& m)
         res_matrix
             interaction parameters matrix
         )pbdoc";
-}
\ No newline at end of file
+}
+
+void linkUNIQUAC(py::module& m)
+{
+    linkBasicUNIQUAC<float>(m, "");
+    linkBasicUNIQUAC<double>(m, "64");
+}
@@ -0,0 +1,13 @@
+#pragma once
+
+#include <binds/pybind11.h>
+
+#include "eos/psrk.py.cpp"
+
+
+void linkPSRK(py::module& m);
+
+void linkEOS(py::module& m)
+{
+    linkPSRK(m);
+}
@@ -0,0 +1,388 @@
+#pragma once
+
+#include <binds/activity/activitymodel.py.cpp>
+#include <pytherm/eos/psrk.cpp>
+
+using namespace pybind11::literals;
+
+/* Number of points of a batch, x is [n_comps] for one point or [n_points, n_comps] */
+size_t get_n_points(const ndarray_t<double> &x, size_t n_comps)
+{
+    if ((x.ndim() != 1 && x.ndim() != 2) || (size_t)x.shape(x.ndim() - 1) != n_comps)
+    {
+        throw std::invalid_argument("x must be an array [n_comps] or [n_points, n_comps] with "
+                                    + std::to_string(n_comps) + " components");
+    }
+    return x.ndim() == 1 ? 1 : x.shape(0);
+}
+
+/* Stride of a per-point argument, 0 for a scalar and 1 for an array [n_points] */
+size_t get_stride(const ndarray_t<double> &v, size_t n_points, const char *name)
+{
+    if (v.ndim() == 0) return 0;
+    if (v.ndim() == 1 && (size_t)v.shape(0) == n_points) return 1;
+    throw std::invalid_argument(std::string(name) + " must be a float or a 1-D array [n_points]");
+}
+
+/* Scalar for a single point, array [n_points] otherwise */
+py::object squeeze_points(py::array_t<double> a, const ndarray_t<double> &x)
+{
+    if (x.ndim() == 1) return py::float_(a.data()[0]);
+    return std::move(a);
+}
+
+py::object psrk_get_Z(PSRK &self, ndarray_t<double> x, ndarray_t<double> T, ndarray_t<double> P,
+                      const std::string &phase, int n_threads)
+{
+    size_t n = get_n_points(x, self.get_n_comps());
+    size_t T_stride = get_stride(T, n, "T");
+    size_t P_stride = get_stride(P, n, "P");
+    Phase ph = parse_phase(phase);
+    py::array_t<double> Z(n);
+    const double *x_ptr = x.data(), *T_ptr = T.data(), *P_ptr = P.data();
+    double *Z_ptr = Z.mutable_data();
+    {
+        py::gil_scoped_release release;
+        self.get_Z_batch(x_ptr, T_ptr, P_ptr, n, T_stride, P_stride, ph, Z_ptr, n_threads);
+    }
+    return squeeze_points(Z, x);
+}
+
+py::tuple psrk_get_lnphi(PSRK &self, ndarray_t<double> x, ndarray_t<double> T, ndarray_t<double> P,
+                         const std::string &phase, int n_threads)
+{
+    size_t n_comps = self.get_n_comps();
+    size_t n = get_n_points(x, n_comps);
+    size_t T_stride = get_stride(T, n, "T");
+    size_t P_stride = get_stride(P, n, "P");
+    Phase ph = parse_phase(phase);
+    py::array_t<double> lnphi(std::vector<size_t>(x.shape(), x.shape() + x.ndim()));
+    py::array_t<double> Z(n);
+    const double *x_ptr = x.data(), *T_ptr = T.data(), *P_ptr = P.data();
+    double *lnphi_ptr = lnphi.mutable_data(), *Z_ptr = Z.mutable_data();
+    {
+        py::gil_scoped_release release;
+        self.get_lnphi_batch(x_ptr, T_ptr, P_ptr, n, T_stride, P_stride, ph, lnphi_ptr, Z_ptr, n_threads);
+    }
+    return py::make_tuple(lnphi, squeeze_points(Z, x));
+}
+
+py::object psrk_get_p(PSRK &self, ndarray_t<double> x, ndarray_t<double> T, ndarray_t<double> V, int n_threads)
+{
+    size_t n = get_n_points(x, self.get_n_comps());
+    size_t T_stride = get_stride(T, n, "T");
+    size_t V_stride = get_stride(V, n, "V");
+    py::array_t<double> P(n);
+    const double *x_ptr = x.data(), *T_ptr = T.data(), *V_ptr = V.data();
+    double *P_ptr = P.mutable_data();
+    {
+        py::gil_scoped_release release;
+        self.get_p_batch(x_ptr, T_ptr, V_ptr, n, T_stride, V_stride, P_ptr, n_threads);
+    }
+    return squeeze_points(P, x);
+}
+
+py::dict psrk_saturation(const PSRK &self, Saturation kind, ndarray_t<double> z, ndarray_t<double> spec,
+                         py::object guess, bool warm_start, double tol, int max_iter, int n_threads)
+{
+    size_t n_comps = self.get_n_comps();
+    if (z.ndim() < 1 || z.ndim() > 3 || (size_t)z.shape(z.ndim() - 1) != n_comps)
+    {
+        throw std::invalid_argument("z must be an array [n_comps], [n_points, n_comps] or "
+                                    "[n_curves, n_points, n_comps] with " + std::to_string(n_comps) + " components");
+    }
+    bool p_kind = kind == Saturation::bubble_p || kind == Saturation::dew_p;
+    const char *spec_name = p_kind ? "T" : "P";
+    size_t n_curves = z.ndim() == 3 ? z.shape(0) : 1;
+    size_t n_points = z.ndim() == 1 ? 1 : z.shape(z.ndim() - 2);
+    size_t curve_stride = 0, point_stride = 0;
+    if (z.ndim() < 3)
+    {
+        point_stride = get_stride(spec, n_points, spec_name);
+    }
+    else if (spec.ndim() == 1 && (size_t)spec.shape(0) == n_curves)
+    {
+        curve_stride = 1;
+    }
+    else if (spec.ndim() == 2 && (size_t)spec.shape(0) == n_curves && (size_t)spec.shape(1) == n_points)
+    {
+        curve_stride = n_points;
+        point_stride = 1;
+    }
+    else if (spec.ndim() != 0)
+    {
+        throw std::invalid_argument(std::string(spec_name) + " must be a float, an array [n_curves] "
+                                    "or [n_curves, n_points]");
+    }
+    double guess_v = guess.is_none() ? std::numeric_limits<double>::quiet_NaN() : guess.cast<double>();
+
+    std::vector<size_t> shape(z.shape(), z.shape() + z.ndim() - 1);
+    py::array_t<double> T(shape), P(shape), w(std::vector<size_t>(z.shape(), z.shape() + z.ndim())), time(shape);
+    py::array_t<int> n_iter(shape);
+    py::array_t<bool> converged(shape);
+    const double *z_ptr = z.data(), *spec_ptr = spec.data();
+    double *T_ptr = T.mutable_data(), *P_ptr = P.mutable_data(), *w_ptr = w.mutable_data();
+    double *time_ptr = time.mutable_data();
+    int *n_iter_ptr = n_iter.mutable_data();
+    uint8_t *conv_ptr = reinterpret_cast<uint8_t *>(converged.mutable_data());
+    {
+        py::gil_scoped_release release;
+        self.saturation_curves(kind, z_ptr, spec_ptr, n_curves, n_points, curve_stride, point_stride, guess_v,
+                               warm_start, tol, max_iter, T_ptr, P_ptr, w_ptr, n_iter_ptr, conv_ptr, time_ptr,
+                               n_threads);
+    }
+    bool bubble = kind == Saturation::bubble_p || kind == Saturation::bubble_t;
+    py::dict res;
+    res["T"] = squeeze_points(T, z);
+    res["P"] = squeeze_points(P, z);
+    res["x"] = bubble ? py::object(z) : py::object(w);
+    res["y"] = bubble ? py::object(w) : py::object(z);
+    if (z.ndim() == 1)
+    {
+        res["n_iter"] = py::int_(n_iter.data()[0]);
+        res["converged"] = py::bool_(converged.data()[0]);
+    }
+    else
+    {
+        res["n_iter"] = n_iter;
+        res["converged"] = converged;
+    }
+    res["time"] = squeeze_points(time, z);
+    return res;
+}
+
+const char *saturation_doc = R"pbdoc(
+        Parameters
+        ----------
+        {feed} : np.ndarray
+            {phase} compositions [n_comps], one curve [n_points, n_comps]
+            or independent curves [n_curves, n_points, n_comps], [molar fraction]
+        {spec} : float | np.ndarray
+            {spec_name}, one for all points, array [n_points] for one curve,
+            [n_curves] or [n_curves, n_points] for several curves
+        {unknown}0 : float, optional
+            Initial {unknown_name} of the first point, by default estimated with an ideal vapor
+        warm_start : bool, optional
+            Start every point from the linear extrapolation of the two previous converged points
+            of its curve, by default True
+        tol : float, optional
+            Tolerance on max |g| over the equilibrium residuals and sum w - 1, by default 1e-10
+        max_iter : int, optional
+            Maximum number of Newton iterations per point, by default 50
+        n_threads : int, optional
+            Number of threads over curves, 0 to use all cores, by default 1.
+            Points of one curve are solved in sequence, results do not depend on n_threads
+
+        Returns
+        -------
+        dict
+            "T", "P", liquid "x" and vapor "y" compositions, "n_iter", "converged" and
+            wall "time" in seconds of every point
+        )pbdoc";
+
+std::string saturation_docstring(const std::string &head, bool bubble, bool p_kind)
+{
+    std::string doc = head + saturation_doc;
+    auto replace = [&doc](const std::string &key, const std::string &value)
+    {
+        for (size_t pos = doc.find(key); pos != std::string::npos; pos = doc.find(key))
+        {
+            doc.replace(pos, key.size(), value);
+        }
+    };
+    replace("{feed}", bubble ? "x" : "y");
+    replace("{phase}", bubble ? "Liquid" : "Vapor");
+    replace("{spec_name}", p_kind ? "Temperature, [K]" : "Pressure, [Pa]");
+    replace("{spec}", p_kind ? "T" : "P");
+    replace("{unknown_name}", p_kind ? "pressure, [Pa]" : "temperature, [K]");
+    replace("{unknown}", p_kind ? "P" : "T");
+    return doc;
+}
+
+void linkPSRK(py::module& m)
+{
+    py::class_<PSRK>(m, "PSRK_UNIFAC")
+        .def(py::init<PSRK::Model &, const vector<double> &, const vector<double> &, const vector<vector<double>> &>(),
+             "model"_a, "Tc"_a, "Pc"_a, "mc"_a, py::keep_alive<1, 2>())
+
+        .def("get_Z", &psrk_get_Z, R"pbdoc(
+        Calculate compressibility factors
+
+        The cubic equation is solved analytically for every point
+
+        Parameters
+        ----------
+        x : np.ndarray
+            Compositions [n_comps] or [n_points, n_comps], [molar fraction]
+        T : float | np.ndarray
+            Temperature, [K], one for all points or array [n_points]
+        P : float | np.ndarray
+            Pressure, [Pa], one for all points or array [n_points]
+        phase : str, optional
+            "liquid" for the smallest root with Z > B, "vapor" for the largest one, by default "liquid"
+        n_threads : int, optional
+            Number of threads, 0 to use all cores, by default 1
+
+        Returns
+        -------
+        float | np.ndarray
+            Z for one point or array [n_points]
+        )pbdoc",
+             "x"_a, "T"_a, "P"_a, "phase"_a = "liquid", "n_threads"_a = 1)
+
+        .def("get_lnphi", &psrk_get_lnphi, R"pbdoc(
+        Calculate ln of fugacity coefficients
+
+        .. math::
+            \ln\varphi_i = \frac{b_i}{b}(Z - 1) - \ln(Z - B) - \bar\alpha_i \ln\left(1 + \frac{B}{Z}\right)
+
+        .. math::
+            \bar\alpha_i = \frac{a_i}{b_i RT} + \frac{1}{A_1}\left(\ln\gamma_i + \ln\frac{b}{b_i} + \frac{b_i}{b} - 1\right)
+
+        Parameters
+        ----------
+        x : np.ndarray
+            Compositions [n_comps] or [n_points, n_comps], [molar fraction]
+        T : float | np.ndarray
+            Temperature, [K], one for all points or array [n_points]
+        P : float | np.ndarray
+            Pressure, [Pa], one for all points or array [n_points]
+        phase : str, optional
+            "liquid" or "vapor", by default "liquid"
+        n_threads : int, optional
+            Number of threads, 0 to use all cores, by default 1
+
+        Returns
+        -------
+        tuple[np.ndarray, float | np.ndarray]
+            ln phi with the shape of x and Z
+        )pbdoc",
+             "x"_a, "T"_a, "P"_a, "phase"_a = "liquid", "n_threads"_a = 1)
+
+        .def("get_p", &psrk_get_p, R"pbdoc(
+        Calculate pressure
+
+        .. math::
+            P = \frac{RT}{V - b} - \frac{a}{V(V + b)}
+
+        Parameters
+        ----------
+        x : np.ndarray
+            Compositions [n_comps] or [n_points, n_comps], [molar fraction]
+        T : float | np.ndarray
+            Temperature, [K], one for all points or array [n_points]
+        V : float | np.ndarray
+            Molar volume, [m^3/mol], one for all points or array [n_points]
+        n_threads : int, optional
+            Number of threads, 0 to use all cores, by default 1
+
+        Returns
+        -------
+        float | np.ndarray
+            Pressure, [Pa]
+        )pbdoc",
+             "x"_a, "T"_a, "V"_a, "n_threads"_a = 1)
+
+        .def("bubble_p", [](const PSRK &self, ndarray_t<double> x, ndarray_t<double> T, py::object P0,
+                            bool warm_start, double tol, int max_iter, int n_threads)
+            {
+                return psrk_saturation(self, Saturation::bubble_p, x, T, P0, warm_start, tol, max_iter, n_threads);
+            }, saturation_docstring(R"pbdoc(
+        Bubble pressures
+
+        Newton iterations on the vapor composition y and ln P with analytic d ln phi / dP
+        and d ln phi / dy, including d ln gamma / dx of UNIFAC
+
+        .. math::
+            g_i = \ln y_i + \ln \varphi_i^V(y) - \ln x_i - \ln \varphi_i^L(x) = 0, \quad \sum_i y_i - 1 = 0
+        )pbdoc", true, true).c_str(),
+             "x"_a, "T"_a, "P0"_a = py::none(), "warm_start"_a = true, "tol"_a = 1e-10, "max_iter"_a = 50,
+             "n_threads"_a = 1)
+
+        .def("dew_p", [](const PSRK &self, ndarray_t<double> y, ndarray_t<double> T, py::object P0,
+                         bool warm_start, double tol, int max_iter, int n_threads)
+            {
+                return psrk_saturation(self, Saturation::dew_p, y, T, P0, warm_start, tol, max_iter, n_threads);
+            }, saturation_docstring(R"pbdoc(
+        Dew pressures
+
+        Newton iterations on the liquid composition x and ln P with analytic d ln phi / dP
+        and d ln phi / dx, including d ln gamma / dx of UNIFAC
+
+        .. math::
+            g_i = \ln x_i + \ln \varphi_i^L(x) - \ln y_i - \ln \varphi_i^V(y) = 0, \quad \sum_i x_i - 1 = 0
+        )pbdoc", false, true).c_str(),
+             "y"_a, "T"_a, "P0"_a = py::none(), "warm_start"_a = true, "tol"_a = 1e-10, "max_iter"_a = 50,
+             "n_threads"_a = 1)
+
+        .def("bubble_t", [](const PSRK &self, ndarray_t<double> x, ndarray_t<double> P, py::object T0,
+                            bool warm_start, double tol, int max_iter, int n_threads)
+            {
+                return psrk_saturation(self, Saturation::bubble_t, x, P, T0, warm_start, tol, max_iter, n_threads);
+            }, saturation_docstring(R"pbdoc(
+        Bubble temperatures
+
+        Newton iterations on the vapor composition and 1/T with analytic d ln phi / dT,
+        including d ln gamma / dT of UNIFAC.
+        Without T0 the first point starts from 0.7 of the mean critical temperature
+        )pbdoc", true, false).c_str(),
+             "x"_a, "P"_a, "T0"_a = py::none(), "warm_start"_a = true, "tol"_a = 1e-10, "max_iter"_a = 50,
+             "n_threads"_a = 1)
+
+        .def("dew_t", [](const PSRK &self, ndarray_t<double> y, ndarray_t<double> P, py::object T0,
+                         bool warm_start, double tol, int max_iter, int n_threads)
+            {
+                return psrk_saturation(self, Saturation::dew_t, y, P, T0, warm_start, tol, max_iter, n_threads);
+            }, saturation_docstring(R"pbdoc(
+        Dew temperatures
+
+        Newton iterations on the liquid composition and 1/T with analytic d ln phi / dT,
+        including d ln gamma / dT of UNIFAC.
+        Without T0 the first point starts from 0.7 of the mean critical temperature
+        )pbdoc", false, false).c_str(),
+             "y"_a, "P"_a, "T0"_a = py::none(), "warm_start"_a = true, "tol"_a = 1e-10, "max_iter"_a = 50,
+             "n_threads"_a = 1)
+
+        .def("get_alpha", [](const PSRK &self, double T)
+            {
+                py::array_t<double> alpha(self.get_n_comps());
+                self.get_alpha(T, alpha.mutable_data());
+                return alpha;
+            }, R"pbdoc(
+        Mathias-Copeman alpha of every component
+
+        Parameters
+        ----------
+        T : float
+            Temperature, [K]
+
+        Returns
+        -------
+        np.ndarray
+            alpha [n_comps]
+        )pbdoc",
+             "T"_a)
+
+        .def_property_readonly("b_i", [](const PSRK &self)
+            {
+                return py::array_t<double>(self.get_n_comps(), self.get_b_i().data());
+            }, "SRK co-volumes of components [n_comps], [m^3/mol]")
+
+        .doc() = R"pbdoc(
+        Predictive Soave-Redlich-Kwong equation of state
+
+        SRK with Mathias-Copeman alpha functions and the MHV1 mixing rule (A1 = -0.64663),
+        g^E is calculated by the C++ UNIFAC model, usually with the PSRK dataset
+
+        Parameters
+        ----------
+        model : UNIFAC64
+            Double precision UNIFAC in molar fractions, it is kept alive by the equation of state
+        Tc : list[float]
+            Critical temperatures, [K]
+        Pc : list[float]
+            Critical pressures, [Pa]
+        mc : list[list[float]]
+            Mathias-Copeman parameters [c1, c2, c3] of every component
+        )pbdoc";
+}
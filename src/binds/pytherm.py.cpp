@@ -2,10 +2,13 @@
 
 #include "pybind11.h"
 #include "activity.py.cpp"
+#include "eos.py.cpp"
 
 void linkActivity(py::module& m);
+void linkEOS(py::module& m);
 
 PYBIND11_MODULE(cpp, m)
 {
     linkActivity(m);
+    linkEOS(m);
 }
\ No newline at end of file
@@ -1,11 +1,38 @@
 #pragma once
 
 #include <vector>
+#include <cstddef>
 
-class ActivityModel
-{   
+// Real is the floating point type of parameters, intermediates and results
+template <typename Real>
+class BasicActivityModel
+{
 public:
-    virtual std::vector<float> get_y(const std::vector<float> &conc, float T) = 0;
-    virtual std::vector<float> get_a(const std::vector<float> &conc, float T) = 0;
+    typedef Real real_type;
+
+    virtual std::vector<Real> get_y(const std::vector<Real> &conc, Real T) = 0;
+    virtual std::vector<Real> get_a(const std::vector<Real> &conc, Real T) = 0;
+
+    // conc is a row-major [n_points, n_comps] buffer, out has the same shape.
+    // T_stride is 0 for one temperature for all points and 1 for T[n_points].
+    // The default implementation is serial, thread-safe models override it and use n_threads
+    virtual void get_y_batch(const Real *conc, const Real *T, size_t n_points, size_t n_comps,
+                             size_t T_stride, Real *out, int n_threads = 1)
+    {
+        std::vector<Real> x(n_comps);
+        for (size_t p = 0; p < n_points; ++p)
+        {
+            x.assign(conc + p * n_comps, conc + (p + 1) * n_comps);
+            std::vector<Real> y = get_y(x, T[p * T_stride]);
+            for (size_t i = 0; i < n_comps; ++i)
+            {
+                out[p * n_comps + i] = y[i];
+            }
+        }
+    }
+    virtual ~BasicActivityModel() {}
     // ActivityModel() {}
 };
+
+typedef BasicActivityModel<float> ActivityModel;
+typedef BasicActivityModel<double> ActivityModel64;
@@ -0,0 +1,79 @@
+#pragma once
+
+#include <list>
+#include <memory>
+#include <mutex>
+
+// Bounded LRU cache of temperature dependent model states.
+// State must have a floating point T member, calculate(T, state) fills a new state.
+// Lookups are guarded by a mutex, states are computed outside of the lock
+template <typename State>
+class TemperatureCache
+{
+private:
+    std::list<std::shared_ptr<const State>> items; // most recently used first
+    size_t max_size;
+    size_t hits = 0;
+    size_t misses = 0;
+    mutable std::mutex mtx;
+
+    void shrink()
+    {
+        while (this->items.size() > this->max_size)
+        {
+            this->items.pop_back();
+        }
+    }
+
+public:
+    explicit TemperatureCache(size_t max_size = 8): max_size(max_size) {}
+
+    template <typename Real, typename F>
+    std::shared_ptr<const State> get(Real T, F calculate)
+    {
+        {
+            std::lock_guard<std::mutex> lock(this->mtx);
+            for (auto it = this->items.begin(); it != this->items.end(); ++it)
+            {
+                if ((*it)->T == T)
+                {
+                    this->hits++;
+                    this->items.splice(this->items.begin(), this->items, it);
+                    return this->items.front();
+                }
+            }
+            this->misses++;
+        }
+
+        std::shared_ptr<State> st = std::make_shared<State>();
+        calculate(T, *st);
+
+        std::lock_guard<std::mutex> lock(this->mtx);
+        if (this->max_size > 0)
+        {
+            this->items.push_front(st);
+            shrink();
+        }
+        return st;
+    }
+
+    void set_max_size(size_t max_size)
+    {
+        std::lock_guard<std::mutex> lock(this->mtx);
+        this->max_size = max_size;
+        shrink();
+    }
+
+    void clear()
+    {
+        std::lock_guard<std::mutex> lock(this->mtx);
+        this->items.clear();
+        this->hits = 0;
+        this->misses = 0;
+    }
+
+    size_t get_hits() const { std::lock_guard<std::mutex> lock(this->mtx); return this->hits; }
+    size_t get_misses() const { std::lock_guard<std::mutex> lock(this->mtx); return this->misses; }
+    size_t get_max_size() const { std::lock_guard<std::mutex> lock(this->mtx); return this->max_size; }
+    size_t get_size() const { std::lock_guard<std::mutex> lock(this->mtx); return this->items.size(); }
+};
@@ -5,7 +5,12 @@
 #include <fstream>
 #include <sstream>
 #include <math.h>
+#include <stdexcept>
+#include <algorithm>
+#include <cstring>
 
+#include <pytherm/mmap.h>
+#include <pytherm/parallel.h>
 #include "unifac.h"
 
 namespace py = pybind11;
@@ -43,22 +48,172 @@ void tokenizeBySpace(std::string const &str, std::vector<std::string> &out)
     if (!v.empty()) out.push_back(v);
 }
 
-bool contains(std::vector<std::string> &v, std::string &key)
-{
-    for (auto s : v)
-    {
-        if (s == key) return true;
-    }
-    return false;
-}
-
 
 ParametersUNIFAC::ParametersUNIFAC(std::string path)
 {   
-    std::ifstream in(path);
+    char magic[sizeof(UNIFAC_BINARY_MAGIC)] = {};
+    std::ifstream in(path, std::ios::binary);
+    if (!in.is_open())
+    {
+        throw std::runtime_error("cannot open UNIFAC dataset: " + path);
+    }
+    in.read(magic, sizeof(magic));
+    if (in.gcount() == sizeof(magic) && std::equal(magic, magic + sizeof(magic), UNIFAC_BINARY_MAGIC))
+    {
+        in.close();
+        readBinary(path);
+        return;
+    }
+    in.clear();
+    in.seekg(0);
     readData(in);
     in.close();
 
+    // dense interaction table from the parsed rows
+    this->n_main = this->mainGroups.size();
+    for (const auto &row : this->inter_rows)
+    {
+        this->n_main = std::max(this->n_main, (size_t)std::max(row.first.first, row.first.second) + 1);
+    }
+    size_t n2 = this->n_main * this->n_main;
+    // same layout as the binary format, [n_main, n_main, 3] parameters followed by [n_main, n_main] flags
+    std::shared_ptr<std::vector<double>> block = std::make_shared<std::vector<double>>(3 * n2 + (n2 + 7) / 8, 0.0);
+    double *res = block->data();
+    uint8_t *defined = reinterpret_cast<uint8_t *>(res + 3 * n2);
+    for (const auto &row : this->inter_rows)
+    {
+        size_t ij = row.first.first * this->n_main + row.first.second;
+        std::copy(row.second.begin(), row.second.end(), res + 3 * ij);
+        defined[ij] = 1;
+    }
+    this->inter_rows.clear();
+
+    this->resParams = res;
+    this->resDefined = defined;
+    this->storage = block;
+    buildIndex();
+}
+
+void ParametersUNIFAC::readBinary(const std::string &path)
+{
+    std::shared_ptr<MappedFile> file = std::make_shared<MappedFile>(path);
+    const char *base = file->data();
+    const UNIFACBinaryHeader *h = reinterpret_cast<const UNIFACBinaryHeader *>(base);
+    auto fits = [&](uint64_t offset, uint64_t size) { return offset <= file->size() && size <= file->size() - offset; };
+    // size of count elements of elem_size bytes, false if it overflows
+    auto array_size = [](uint64_t count, uint64_t elem_size, uint64_t &size) {
+        if (elem_size && count > UINT64_MAX / elem_size) return false;
+        size = count * elem_size;
+        return true;
+    };
+    if (file->size() < sizeof(UNIFACBinaryHeader)
+        || !std::equal(h->magic, h->magic + sizeof(h->magic), UNIFAC_BINARY_MAGIC)
+        || h->version != UNIFAC_BINARY_VERSION || h->file_size != file->size())
+    {
+        throw std::runtime_error("unsupported or truncated UNIFAC binary dataset: " + path);
+    }
+    uint64_t n2, sub_to_main_size, RQ_size, res_size;
+    if (!array_size(h->n_main, h->n_main, n2) || !array_size(h->n_sub, sizeof(int32_t), sub_to_main_size)
+        || !array_size(h->n_sub, sizeof(double), RQ_size) || !array_size(n2, 3 * sizeof(double), res_size)
+        || !fits(h->names_offset, h->names_size) || !fits(h->sub_to_main_offset, sub_to_main_size)
+        || !fits(h->R_offset, RQ_size) || !fits(h->Q_offset, RQ_size)
+        || !fits(h->res_offset, res_size) || !fits(h->defined_offset, n2))
+    {
+        throw std::runtime_error("corrupted UNIFAC binary dataset: " + path);
+    }
+
+    // every name must end with '\0' inside the names block
+    std::vector<std::string> names;
+    const char *name = base + h->names_offset;
+    const char *names_end = name + h->names_size;
+    while (name < names_end && names.size() < h->n_main + h->n_sub)
+    {
+        const char *end = static_cast<const char *>(std::memchr(name, '\0', names_end - name));
+        if (end == nullptr) break;
+        names.emplace_back(name, end);
+        name = end + 1;
+    }
+    const int32_t *sub_to_main = reinterpret_cast<const int32_t *>(base + h->sub_to_main_offset);
+    bool valid = names.size() == h->n_main + h->n_sub;
+    for (uint64_t i = 0; valid && i < h->n_sub; i++)
+    {
+        valid = sub_to_main[i] >= 0 && (uint64_t)sub_to_main[i] < h->n_main;
+    }
+    if (!valid)
+    {
+        throw std::runtime_error("corrupted UNIFAC binary dataset: " + path);
+    }
+
+    this->unifacType = h->unifac_type != 0;
+    this->mainGroups.assign(names.begin(), names.begin() + h->n_main);
+    this->subGroups.assign(names.begin() + h->n_main, names.end());
+    // main groups without a name are only present in the interaction table
+    while (!this->mainGroups.empty() && this->mainGroups.back().empty())
+    {
+        this->mainGroups.pop_back();
+    }
+    const double *R = reinterpret_cast<const double *>(base + h->R_offset);
+    const double *Q = reinterpret_cast<const double *>(base + h->Q_offset);
+    this->subToMain.assign(sub_to_main, sub_to_main + h->n_sub);
+    this->R.assign(R, R + h->n_sub);
+    this->Q.assign(Q, Q + h->n_sub);
+
+    // the interaction table is used in place, its pages are shared by all processes mapping the file
+    this->n_main = h->n_main;
+    this->resParams = reinterpret_cast<const double *>(base + h->res_offset);
+    this->resDefined = reinterpret_cast<const uint8_t *>(base + h->defined_offset);
+    this->storage = file;
+    this->mapped = true;
+    buildIndex();
+}
+
+void ParametersUNIFAC::save_binary(std::string path) const
+{
+    auto align = [](uint64_t offset, uint64_t a) { return (offset + a - 1) / a * a; };
+    std::string names;
+    for (const auto &s : this->mainGroups) names += s + '\0';
+    // unnamed main groups of the interaction table, every main group has a name in the file
+    names.append(this->n_main - std::min(this->n_main, this->mainGroups.size()), '\0');
+    for (const auto &s : this->subGroups) names += s + '\0';
+
+    uint64_t n_sub = this->subGroups.size();
+    uint64_t n2 = this->n_main * this->n_main;
+    UNIFACBinaryHeader h = {};
+    std::copy(UNIFAC_BINARY_MAGIC, UNIFAC_BINARY_MAGIC + sizeof(UNIFAC_BINARY_MAGIC), h.magic);
+    h.version = UNIFAC_BINARY_VERSION;
+    h.unifac_type = this->unifacType ? 1 : 0;
+    h.n_main = this->n_main;
+    h.n_sub = n_sub;
+    h.names_offset = sizeof(UNIFACBinaryHeader);
+    h.names_size = names.size();
+    h.sub_to_main_offset = align(h.names_offset + h.names_size, 8);
+    h.R_offset = align(h.sub_to_main_offset + n_sub * sizeof(int32_t), 8);
+    h.Q_offset = h.R_offset + n_sub * sizeof(double);
+    h.res_offset = align(h.Q_offset + n_sub * sizeof(double), SIMD_ALIGN);
+    h.defined_offset = h.res_offset + 3 * n2 * sizeof(double);
+    h.file_size = h.defined_offset + n2;
+
+    std::vector<char> buf(h.file_size, 0);
+    std::copy((const char *)&h, (const char *)&h + sizeof(h), buf.data());
+    std::copy(names.begin(), names.end(), buf.data() + h.names_offset);
+    int32_t *sub_to_main = reinterpret_cast<int32_t *>(buf.data() + h.sub_to_main_offset);
+    std::copy(this->subToMain.begin(), this->subToMain.end(), sub_to_main);
+    std::copy(this->R.begin(), this->R.end(), reinterpret_cast<double *>(buf.data() + h.R_offset));
+    std::copy(this->Q.begin(), this->Q.end(), reinterpret_cast<double *>(buf.data() + h.Q_offset));
+    std::copy(this->resParams, this->resParams + 3 * n2, reinterpret_cast<double *>(buf.data() + h.res_offset));
+    std::copy(this->resDefined, this->resDefined + n2, reinterpret_cast<uint8_t *>(buf.data() + h.defined_offset));
+
+    std::ofstream out(path, std::ios::binary);
+    if (!out.is_open())
+    {
+        throw std::runtime_error("cannot write UNIFAC dataset: " + path);
+    }
+    out.write(buf.data(), buf.size());
+}
+
+bool ParametersUNIFAC::is_mapped() const
+{
+    return this->mapped;
 }
 
 void ParametersUNIFAC::readData(std::ifstream &in)
@@ -137,8 +292,8 @@ void ParametersUNIFAC::readSubGroups(std::ifstream &in)
 
         this->subGroups.push_back(tokens[1]);
         this->subToMain.push_back(stoi(tokens[2]));
-        this->R.push_back(stof(tokens[4]));
-        this->Q.push_back(stof(tokens[5]));
+        this->R.push_back(stod(tokens[4]));
+        this->Q.push_back(stod(tokens[5]));
         // std::cout << tokens[1] << std::endl;
     }
    
@@ -158,21 +313,50 @@ void ParametersUNIFAC::readInter(std::ifstream &in)
         int i = stoi(tokens[0]);
         int j = stoi(tokens[1]);
 
-        std::vector<float> v1 {stof(tokens[2]), stof(tokens[3]), stof(tokens[4]),};
-        this->resParams[i][j] = v1;
-        std::vector<float> v2 {stof(tokens[5]), stof(tokens[6]), stof(tokens[7]),};
-        this->resParams[j][i] = v2;
+        std::vector<double> v1 {stod(tokens[2]), stod(tokens[3]), stod(tokens[4]),};
+        this->inter_rows.push_back(std::make_pair(std::make_pair(i, j), v1));
+        std::vector<double> v2 {stod(tokens[5]), stod(tokens[6]), stod(tokens[7]),};
+        this->inter_rows.push_back(std::make_pair(std::make_pair(j, i), v2));
     }
 }
 
-int ParametersUNIFAC::get_sub_id(std::string gr_name)
+void ParametersUNIFAC::buildIndex()
 {
-    for (int i = 0; i <= subGroups.size(); i++)
+    this->sub_index.clear();
+    this->sub_index.reserve(this->subGroups.size());
+    for (int i = 0; i < this->subGroups.size(); i++)
     {
-        if (subGroups[i] == gr_name) return i;
+        this->sub_index.emplace(this->subGroups[i], i);
     }
 }
 
+int ParametersUNIFAC::get_sub_id(const std::string &gr_name) const
+{
+    auto it = this->sub_index.find(gr_name);
+    if (it == this->sub_index.end())
+    {
+        throw py::key_error("UNIFAC subgroup '" + gr_name + "' is not in the dataset");
+    }
+    return it->second;
+}
+
+const double *ParametersUNIFAC::get_res_params_checked(int i, int j) const
+{
+    if (i != j && (i >= this->n_main || j >= this->n_main || !has_res_params(i, j)))
+    {
+        std::string gr_i = i < this->mainGroups.size() ? this->mainGroups[i] : std::to_string(i);
+        std::string gr_j = j < this->mainGroups.size() ? this->mainGroups[j] : std::to_string(j);
+        throw py::value_error("no UNIFAC interaction parameters between main groups '"
+                              + gr_i + "' and '" + gr_j + "'");
+    }
+    if (i >= this->n_main || j >= this->n_main)
+    {
+        static const double zeros[3] = {0, 0, 0};
+        return zeros;
+    }
+    return get_res_params(i, j);
+}
+
 
 SubstancesUNIFAC::SubstancesUNIFAC()
 {
@@ -199,19 +383,21 @@ void SubstancesUNIFAC::get_from_dict(py::dict s_dict)
 }
 
 
-UNIFAC::UNIFAC(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances): ActivityModel()
+template <typename Real>
+BasicUNIFAC<Real>::BasicUNIFAC(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances): BasicActivityModel<Real>()
 {   
     this->comp_names = substances.subs_names;
 
-    for (auto s : substances.subs_names)
+    // groups in order of the first appearance, global ids are checked once
+    std::unordered_map<std::string, int> group_index;
+    for (const auto &s : substances.subs_names)
     {   
-        for (auto el : substances.subs[s])
+        for (const auto &el : substances.subs[s])
         {
-            std::string gr_s = el.first;
-            if (!contains(this->groups_names, gr_s))
+            if (group_index.emplace(el.first, (int)this->groups_names.size()).second)
             {
                 this->groups_names.push_back(el.first);
-                this->sub_id_global.push_back(parameters.get_sub_id(gr_s));
+                this->sub_id_global.push_back(parameters.get_sub_id(el.first));
             }
         }
     }
@@ -228,113 +414,237 @@ UNIFAC::UNIFAC(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances): Acti
     }
 
     
+    this->group_comp.assign(comp_names.size(), groups_names.size());
     for (int i = 0; i < comp_names.size(); i++)
     {
-        vector<float> b;
-        for (int j = 0; j < groups_names.size(); j++)
+        for (const auto &el : substances.subs[this->comp_names[i]])
         {
-            auto comp = this->comp_names[i];
-            auto gr = this->groups_names[j];
-            auto n = substances.subs[comp][gr];
-            b.push_back(n);
+            this->group_comp(i, group_index[el.first]) = el.second;
         }
-        this->group_comp.push_back(b);
     }
 
-    for(int i = 0; i < groups_names.size(); i++)
+    int n = groups_names.size();
+    this->res_params.assign(3 * n, n);
+    for(int i = 0; i < n; i++)
     {   
-        vector<vector<float>> b;
-        for(int j = 0; j < groups_names.size(); j++)
+        for(int j = 0; j < n; j++)
         {
-            int i_global = this->id_global[i];
-            int j_global = this->id_global[j];
-            vector<float> a_ij {
-                    parameters.resParams[i_global][j_global][0], 
-                    parameters.resParams[i_global][j_global][1],  
-                    parameters.resParams[i_global][j_global][2]
-            };
-            b.push_back(a_ij);
-        }
-        this->res_params.push_back(b);
-    }
-
-    for(int i = 0; i < groups_names.size(); i++)
-    {   
-        vector<float> b;
-        for(int j = 0; j < groups_names.size(); j++)
-        {
-            b.push_back(0.0);
-        }
-        this->psi.push_back(b);
-    }  
-
-    for (int comp_i = 0; comp_i < this->comp_names.size(); comp_i++)
-    {   
-        vector<float> b;
-        for (int gr_i = 0; gr_i < this->groups_names.size(); gr_i++)
-        {
-            b.push_back(0.0);
+            const double *a = parameters.get_res_params_checked(this->id_global[i], this->id_global[j]);
+            for (int k = 0; k < 3; k++)
+            {
+                this->res_params(k * n + i, j) = a[k];
+            }
         }
-        this->ln_gamma_pure.push_back(b);
     }
 
-    this->T = -1;
     this->n_comps = this->comp_names.size();
     this->n_groups = this->groups_names.size();
     calculate_vdw();
+    this->ws = make_workspace();
 
     if (parameters.unifacType) 
     {
-        this->get_lny_comb = &UNIFAC::get_lny_comb_modified;
+        this->get_lny_comb = &BasicUNIFAC::get_lny_comb_modified;
+        this->get_lny_comb_dx = &BasicUNIFAC::get_lny_comb_dx_modified;
     }
     else
     {
-        this->get_lny_comb = &UNIFAC::get_lny_comb_classic;
+        this->get_lny_comb = &BasicUNIFAC::get_lny_comb_classic;
+        this->get_lny_comb_dx = &BasicUNIFAC::get_lny_comb_dx_classic;
     }
 }
 
-void UNIFAC::calculate_vdw()
+template <typename Real>
+void BasicUNIFAC<Real>::calculate_vdw()
 {
     for (int i = 0; i < this->comp_names.size(); i++)
     {   
-        float r = 0;
-        float q = 0;
+        Real r = 0;
+        Real q = 0;
         for (int j = 0; j < this->groups_names.size(); j++)
         {
-            r += this->R_v[j] * this->group_comp[i][j];
-            q += this->Q_v[j] * this->group_comp[i][j];
+            r += this->R_v[j] * this->group_comp(i, j);
+            q += this->Q_v[j] * this->group_comp(i, j);
         }
         this->r_v.push_back(r);
         this->q_v.push_back(q);
+        this->r34_v.push_back(pow(r, 3.0 / 4.0));
     }
 }
 
-vector<float> UNIFAC::get_y(const vector<float> &conc, const float T)
-{   
-    if (this->T != T)
+template <typename Real>
+typename BasicUNIFAC<Real>::Workspace BasicUNIFAC<Real>::make_workspace() const
+{
+    Workspace ws;
+    ws.X.resize(this->n_groups);
+    ws.THETA.resize(this->n_groups);
+    ws.S.resize(this->n_groups);
+    ws.THETA_S.resize(this->n_groups);
+    ws.gamma_gr.resize(this->n_groups);
+    ws.lny_res.resize(this->n_comps);
+    ws.conc_x.resize(this->n_comps);
+    ws.dTHETA.resize(this->n_groups);
+    ws.dS.resize(this->n_groups);
+    ws.dTHETA_S.resize(this->n_groups);
+    ws.dgamma_gr_dx.resize(this->n_comps * this->n_groups);
+    ws.dgamma_gr_dT.resize(this->n_groups);
+    return ws;
+}
+
+template <typename Real>
+const typename BasicUNIFAC<Real>::State &BasicUNIFAC<Real>::get_state(Real T)
+{
+    if (!this->current || this->current->T != T)
+    {
+        this->current = this->cache.get(T, [this](Real T, State &st) { calculate_state(T, st); });
+    }
+    return *this->current;
+}
+
+template <typename Real>
+const TemperatureCache<typename BasicUNIFAC<Real>::State> &BasicUNIFAC<Real>::get_cache() const
+{
+    return this->cache;
+}
+
+template <typename Real>
+std::shared_ptr<const typename BasicUNIFAC<Real>::State> BasicUNIFAC<Real>::get_cached_state(Real T)
+{
+    return this->cache.get(T, [this](Real T, State &st) { calculate_state(T, st); });
+}
+
+template <typename Real>
+const Matrix<Real> &BasicUNIFAC<Real>::get_group_comp() const
+{
+    return this->group_comp;
+}
+
+template <typename Real>
+const Matrix<Real> &BasicUNIFAC<Real>::get_res_params() const
+{
+    return this->res_params;
+}
+
+template <typename Real>
+void BasicUNIFAC<Real>::set_cache_size(size_t max_size)
+{
+    this->cache.set_max_size(max_size);
+}
+
+template <typename Real>
+void BasicUNIFAC<Real>::cache_clear()
+{
+    this->cache.clear();
+    this->current.reset();
+}
+
+template <typename Real>
+void BasicUNIFAC<Real>::calculate_state(Real T, State &st) const
+{
+    st.psi.assign(this->n_groups, this->n_groups);
+    st.dpsi_dT.assign(this->n_groups, this->n_groups);
+    st.ln_gamma_pure.assign(this->n_comps, this->n_groups);
+    st.dln_gamma_pure_dT.assign(this->n_comps, this->n_groups);
+    calculate_psi(T, st);
+    calculate_gamma_pure(st);
+    st.T = T;
+}
+
+template <typename Real>
+vector<Real> BasicUNIFAC<Real>::get_y(const vector<Real> &conc, const Real T)
+{
+    if (conc.size() != this->n_comps)
     {
-        this->T = T;
-        calculate_psi(T);
-        calculate_gamma_pure();
+        throw std::invalid_argument("conc has " + std::to_string(conc.size()) + " components, model has "
+                                    + std::to_string(this->n_comps));
     }
+    vector<Real> y(this->n_comps);
+    get_y_into(conc.data(), T, y.data());
+    return y;
+}
 
-    vector<float> y(this->n_comps, 0);
+template <typename Real>
+void BasicUNIFAC<Real>::get_y_into(const Real *conc, Real T, Real *y)
+{
+    get_y_state(conc, get_state(T), this->ws, y);
+}
 
-    const vector<float> lny_comb = (this->*get_lny_comb)(conc);
-    const vector<float> lny_res = get_lny_res(conc);
+template <typename Real>
+void BasicUNIFAC<Real>::get_y_state(const Real *conc, const State &st, Workspace &ws, Real *y) const
+{
+    // y holds ln_y_comb until the last loop
+    (this->*get_lny_comb)(conc, y);
+    get_lny_res(conc, st, ws, ws.lny_res.data());
 
     for(int i = 0; i < this->n_comps; ++i)
     {
-        y[i] = exp(lny_comb[i] + lny_res[i]);
+        y[i] = exp(y[i] + ws.lny_res[i]);
     }
+}
 
-    return y;
+template <typename Real>
+void BasicUNIFAC<Real>::get_lny_and_jacobian(const Real *conc, Real T, Real *lny, Real *dlny_dx, Real *dlny_dT)
+{
+    get_lny_and_jacobian_state(conc, get_state(T), this->ws, lny, dlny_dx, dlny_dT);
 }
 
-vector<float> UNIFAC::get_a(const vector<float> &conc, float T)
+template <typename Real>
+void BasicUNIFAC<Real>::get_lny_and_jacobian_state(const Real *conc, const State &st, Workspace &ws,
+                                                   Real *lny, Real *dlny_dx, Real *dlny_dT) const
+{
+    const int n = this->n_groups;
+    const int c = this->n_comps;
+
+    // combinatorial part does not depend on T
+    (this->*get_lny_comb)(conc, lny);
+    (this->*get_lny_comb_dx)(conc, dlny_dx);
+
+    Real *gamma_gr = ws.gamma_gr.data();
+    Real *dgamma_gr_dx = ws.dgamma_gr_dx.data();
+    Real *dgamma_gr_dT = ws.dgamma_gr_dT.data();
+    get_gamma_gr(conc, st.psi, ws, gamma_gr);
+    get_gamma_gr_dx(st.psi, ws, dgamma_gr_dx);
+    get_gamma_gr_dT(st.psi, st.dpsi_dT, ws, dgamma_gr_dT);
+
+    for (int i = 0; i < c; ++i)
+    {
+        const Real *nu = this->group_comp.row(i);
+        const Real *ln_gamma_pure = st.ln_gamma_pure.row(i);
+        const Real *dln_gamma_pure_dT = st.dln_gamma_pure_dT.row(i);
+        Real res = 0;
+        Real res_dT = 0;
+        for (int k = 0; k < n; ++k)
+        {
+            res += nu[k] * (gamma_gr[k] - ln_gamma_pure[k]);
+            res_dT += nu[k] * (dgamma_gr_dT[k] - dln_gamma_pure_dT[k]);
+        }
+        lny[i] += res;
+        dlny_dT[i] = res_dT;
+
+        for (int j = 0; j < c; ++j)
+        {
+            const Real *dgamma_j = dgamma_gr_dx + j * n;
+            Real s = 0;
+            for (int k = 0; k < n; ++k)
+            {
+                s += nu[k] * dgamma_j[k];
+            }
+            dlny_dx[i * c + j] += s;
+        }
+    }
+}
+
+template <typename Real>
+int BasicUNIFAC<Real>::get_n_comps() const
+{
+    return this->n_comps;
+}
+
+template <typename Real>
+vector<Real> BasicUNIFAC<Real>::get_a(const vector<Real> &conc, Real T)
 {   
-    vector<float> y = get_y(conc, T);
-    vector<float> a(conc.size());
+    vector<Real> y = get_y(conc, T);
+    vector<Real> a(conc.size());
     for(int i = 0; i < this->n_comps; ++i)
     {
         a[i] = y[i] * conc[i];
@@ -343,46 +653,65 @@ vector<float> UNIFAC::get_a(const vector<float> &conc, float T)
     return a;
 }
 
-vector<float> UNIFAC::get_lny_comb_modified(const vector<float> &conc)
+template <typename Real>
+void BasicUNIFAC<Real>::get_y_batch(const Real *conc, const Real *T, size_t n_points, size_t n_comps,
+                         size_t T_stride, Real *out, int n_threads)
 {
-    vector<float> ln_y_comb(this->n_comps, 0);
+    if (n_comps != this->n_comps)
+    {
+        throw std::invalid_argument("conc has " + std::to_string(n_comps) + " components, model has "
+                                    + std::to_string(this->n_comps));
+    }
+    if (n_points == 0) return;
 
-    vector<float> phi_m(this->n_comps, 0);
-    vector<float> phi(this->n_comps, 0);
-    vector<float> theta(this->n_comps, 0);
+    auto calculate = [this](Real T, State &st) { calculate_state(T, st); };
+    // states are shared by all threads through the temperature cache
+    std::shared_ptr<const State> first = this->cache.get(T[0], calculate);
 
-    float s1 = 0;
-    float s2 = 0;
-    float s3 = 0;
+    parallel_for(n_points, n_threads, [&](size_t begin, size_t end)
+    {
+        std::shared_ptr<const State> st = first;
+        Workspace ws = make_workspace();
+        for (size_t p = begin; p < end; ++p)
+        {
+            Real T_p = T[p * T_stride];
+            if (st->T != T_p)
+            {
+                st = this->cache.get(T_p, calculate);
+            }
+            get_y_state(conc + p * n_comps, *st, ws, out + p * n_comps);
+        }
+    });
+}
+
+template <typename Real>
+void BasicUNIFAC<Real>::get_lny_comb_modified(const Real *conc, Real *ln_y_comb) const
+{
+    Real s1 = 0;
+    Real s2 = 0;
+    Real s3 = 0;
     for(int i = 0; i < this->n_comps; ++i)
     {
-        s1 += pow(this->r_v[i], 3.0 / 4.0) * conc[i]; // phi_m
+        s1 += this->r34_v[i] * conc[i]; // phi_m
         s2 += this->r_v[i] * conc[i]; // phi
         s3 += this->q_v[i] * conc[i]; // theta
     }
 
     for(int i = 0; i < this->n_comps; ++i)
     {
-        phi_m[i] = pow(this->r_v[i], 3.0 / 4.0) / s1;
-        phi[i] = this->r_v[i] / s2;
-        theta[i] = this->q_v[i] / s3;
+        Real phi_m = this->r34_v[i] / s1;
+        Real phi = this->r_v[i] / s2;
+        Real theta = this->q_v[i] / s3;
 
-        ln_y_comb[i] = 1 - phi_m[i] + log(phi_m[i]) - 5 * this->q_v[i] * (1 - phi[i] / theta[i] + log(phi[i] / theta[i]));
+        ln_y_comb[i] = 1 - phi_m + log(phi_m) - 5 * this->q_v[i] * (1 - phi / theta + log(phi / theta));
     }
-
-    return ln_y_comb;
 }
 
-vector<float> UNIFAC::get_lny_comb_classic(const vector<float> &conc)
+template <typename Real>
+void BasicUNIFAC<Real>::get_lny_comb_classic(const Real *conc, Real *ln_y_comb) const
 {
-    vector<float> ln_y_comb(this->n_comps, 0);
-
-    vector<float> phi(this->n_comps, 0);
-    vector<float> theta(this->n_comps, 0);
-
-    float s1 = 0;
-    float s2 = 0;
-    float s3 = 0;
+    Real s1 = 0;
+    Real s2 = 0;
     for(int i = 0; i < this->n_comps; ++i)
     {
         s1 += this->r_v[i] * conc[i]; // phi
@@ -391,78 +720,117 @@ vector<float> UNIFAC::get_lny_comb_classic(const vector<float> &conc)
 
     for(int i = 0; i < this->n_comps; ++i)
     {
-        phi[i] = this->r_v[i] / s1;
-        theta[i] = this->q_v[i] / s2;
+        Real phi = this->r_v[i] / s1;
+        Real theta = this->q_v[i] / s2;
+
+        ln_y_comb[i] = 1 - phi + log(phi) - 5 * this->q_v[i] * (1 - phi / theta + log(phi / theta));
+    }
+}
+
+// phi_i = r_phi_i / sum(r_phi x), r_phi is r^(3/4) for modified UNIFAC and r for classic one.
+// d ln_y_comb_i / d x_j = phi_j (phi_i - 1) - 5 q_i (theta_j - V_j) (1 - V_i / theta_i)
+template <typename Real>
+void BasicUNIFAC<Real>::calculate_lny_comb_dx(const Real *conc, const vector<Real> &r_phi, Real *dlny_comb_dx) const
+{
+    Real s1 = 0;
+    Real s2 = 0;
+    Real s3 = 0;
+    for(int i = 0; i < this->n_comps; ++i)
+    {
+        s1 += r_phi[i] * conc[i]; // phi
+        s2 += this->r_v[i] * conc[i]; // V
+        s3 += this->q_v[i] * conc[i]; // theta
+    }
 
-        ln_y_comb[i] = 1 - phi[i] + log(phi[i]) - 5 * this->q_v[i] * (1 - phi[i] / theta[i] + log(phi[i] / theta[i]));
+    for(int i = 0; i < this->n_comps; ++i)
+    {
+        Real phi_i = r_phi[i] / s1;
+        Real V_theta_i = (this->r_v[i] / s2) / (this->q_v[i] / s3);
+        for(int j = 0; j < this->n_comps; ++j)
+        {
+            Real phi_j = r_phi[j] / s1;
+            Real V_j = this->r_v[j] / s2;
+            Real theta_j = this->q_v[j] / s3;
+            dlny_comb_dx[i * this->n_comps + j] = phi_j * (phi_i - 1) - 5 * this->q_v[i] * (theta_j - V_j) * (1 - V_theta_i);
+        }
     }
+}
 
-    return ln_y_comb;
+template <typename Real>
+void BasicUNIFAC<Real>::get_lny_comb_dx_modified(const Real *conc, Real *dlny_comb_dx) const
+{
+    calculate_lny_comb_dx(conc, this->r34_v, dlny_comb_dx);
+}
+
+template <typename Real>
+void BasicUNIFAC<Real>::get_lny_comb_dx_classic(const Real *conc, Real *dlny_comb_dx) const
+{
+    calculate_lny_comb_dx(conc, this->r_v, dlny_comb_dx);
 }
 
-vector<float> UNIFAC::get_lny_res(const vector<float> &conc)
+template <typename Real>
+void BasicUNIFAC<Real>::get_lny_res(const Real *conc, const State &st, Workspace &ws, Real *ln_y_res) const
 {
-    vector<float> ln_y_res(this->n_comps, 0);
-    vector<float> ln_gamma_gr = get_gamma_gr(conc);
+    Real *ln_gamma_gr = ws.gamma_gr.data();
+    get_gamma_gr(conc, st.psi, ws, ln_gamma_gr);
 
     for(int i = 0; i < this->n_comps; ++i)
     {   
-        float s = 0;
+        const Real *nu = this->group_comp.row(i);
+        const Real *ln_gamma_pure = st.ln_gamma_pure.row(i);
+        Real s = 0;
         for(int k = 0; k < this->n_groups; ++k)
         {   
-            s += this->group_comp[i][k] * (ln_gamma_gr[k] - this->ln_gamma_pure[i][k]);
+            s += nu[k] * (ln_gamma_gr[k] - ln_gamma_pure[k]);
         }
         ln_y_res[i] = s;
     }
-
-    return ln_y_res;
 }
 
-void UNIFAC::calculate_psi(float T)
+template <typename Real>
+void BasicUNIFAC<Real>::calculate_psi(Real T, State &st) const
 {
-    vector<double> temps {1, T, pow(T,  2)};
+    const int n = this->n_groups;
+    const double temps[3] {1, T, pow(T,  2)};
 
-    for(int i = 0; i < this->groups_names.size(); i++)
+    for(int i = 0; i < n; i++)
     {
-        for(int j = 0; j < this->groups_names.size(); j++)
+        Real *psi = st.psi.row(i);
+        Real *dpsi_dT = st.dpsi_dT.row(i);
+        for(int j = 0; j < n; j++)
         {   
-            float a = 0;
-            for (int k = 0; k < res_params[i][j].size(); k++)
+            Real a = 0;
+            for (int k = 0; k < 3; k++)
             {
-                a += res_params[i][j][k] * temps[k];
+                a += this->res_params(k * n + i, j) * temps[k];
             }
-            this->psi[i][j] = exp(- a / T);
+            psi[j] = exp(- a / T);
+            // -a / T = -a0 / T - a1 - a2 * T
+            dpsi_dT[j] = psi[j] * (this->res_params(i, j) / (T * T) - this->res_params(2 * n + i, j));
         }
     }
 
 }
 
-vector<float> UNIFAC::get_gamma_gr(const vector<float> &conc)
+template <typename Real>
+void BasicUNIFAC<Real>::get_gamma_gr(const Real *conc, const Matrix<Real> &psi, Workspace &ws, Real *gamma_gr) const
 {
-    vector<float> gamma_gr(this->n_groups, 0);
-
-    vector<float> X(this->n_groups, 0.0);
-    vector<float> THETA(this->n_groups, 0.0);
+    Real *X = ws.X.data();
+    Real *THETA = ws.THETA.data();
+    Real *S = ws.S.data();
+    Real *THETA_S = ws.THETA_S.data();
 
-    float total_X = 0;
-    for (int i = 0; i < this->n_comps; ++i)
+    std::fill(X, X + this->n_groups, Real(0));
+    for (int j = 0; j < this->n_comps; ++j)
     {
-        for (int j = 0; j < this->n_groups; ++j)
-        {
-            total_X += this->group_comp[i][j] * conc[i];
-        }
-    }
-    for (int i = 0; i < this->n_groups; ++i)
-    {   
-        float s = 0;
-        for (int j = 0; j < this->n_comps; ++j)
+        const Real *nu = this->group_comp.row(j);
+        for (int i = 0; i < this->n_groups; ++i)
         {
-            s += group_comp[j][i] * conc[j];
+            X[i] += nu[i] * conc[j];
         }
-        X[i] = s;
     }
 
-    float total_THETA = 0;
+    Real total_THETA = 0;
     for (int i = 0; i < this->n_groups; ++i)
     {
         total_THETA += this->Q_v[i] * X[i];
@@ -472,74 +840,207 @@ vector<float> UNIFAC::get_gamma_gr(const vector<float> &conc)
         THETA[i] = (this->Q_v[i] * X[i]) / total_THETA;
     }
 
-    for (int k = 0; k < this->n_groups; ++k)
+    // S[m] = sum_n THETA[n] * psi[n][m] does not depend on k, calculate it once, O(n_groups^2)
+    std::fill(S, S + this->n_groups, Real(0));
+    for (int n = 0; n < this->n_groups; ++n)
     {
-        float s1 = 0;
+        const Real *psi_n = psi.row(n);
+        const Real theta_n = THETA[n];
         for (int m = 0; m < this->n_groups; ++m)
         {
-            s1 += THETA[m] * this->psi[m][k];
+            S[m] += theta_n * psi_n[m];
         }
+    }
+    for (int m = 0; m < this->n_groups; ++m)
+    {
+        THETA_S[m] = THETA[m] / S[m];
+    }
 
-        float s2 = 0;
+    for (int k = 0; k < this->n_groups; ++k)
+    {
+        const Real *psi_k = psi.row(k);
+        Real s2 = 0;
         for (int m = 0; m < this->n_groups; ++m)
         {
-            float s3 = 0;
-            for (int n = 0; n < this->n_groups; ++n)
+            s2 += psi_k[m] * THETA_S[m];
+        }
+        gamma_gr[k] = this->Q_v[k] * (1 - log(S[k]) - s2);
+    } 
+}
+
+// Derivatives use X, THETA, S and THETA_S of the last get_gamma_gr call.
+// Row j of dgamma_gr_dx is d ln_gamma_gr / d x_j, O(n_comps * n_groups^2)
+template <typename Real>
+void BasicUNIFAC<Real>::get_gamma_gr_dx(const Matrix<Real> &psi, Workspace &ws, Real *dgamma_gr_dx) const
+{
+    const int n = this->n_groups;
+    const Real *THETA = ws.THETA.data();
+    const Real *S = ws.S.data();
+    const Real *THETA_S = ws.THETA_S.data();
+    Real *dTHETA = ws.dTHETA.data();
+    Real *dS = ws.dS.data();
+    Real *dTHETA_S = ws.dTHETA_S.data();
+
+    Real total_THETA = 0;
+    for (int m = 0; m < n; ++m)
+    {
+        total_THETA += this->Q_v[m] * ws.X[m];
+    }
+
+    for (int j = 0; j < this->n_comps; ++j)
+    {
+        // sum_m Q_m nu_jm = q_j
+        const Real *nu = this->group_comp.row(j);
+        for (int m = 0; m < n; ++m)
+        {
+            dTHETA[m] = (this->Q_v[m] * nu[m] - THETA[m] * this->q_v[j]) / total_THETA;
+        }
+
+        std::fill(dS, dS + n, Real(0));
+        for (int k = 0; k < n; ++k)
+        {
+            const Real *psi_k = psi.row(k);
+            const Real dtheta_k = dTHETA[k];
+            for (int m = 0; m < n; ++m)
             {
-                s3 += THETA[n] * this->psi[n][m];
+                dS[m] += dtheta_k * psi_k[m];
             }
-            s2 += (THETA[m] * psi[k][m]) / s3;
         }
-        gamma_gr[k] = this->Q_v[k] * (1 - log(s1) - s2);
-    } 
+        for (int m = 0; m < n; ++m)
+        {
+            dTHETA_S[m] = (dTHETA[m] - THETA_S[m] * dS[m]) / S[m];
+        }
 
-    return gamma_gr;
+        Real *dgamma = dgamma_gr_dx + j * n;
+        for (int k = 0; k < n; ++k)
+        {
+            const Real *psi_k = psi.row(k);
+            Real s2 = 0;
+            for (int m = 0; m < n; ++m)
+            {
+                s2 += psi_k[m] * dTHETA_S[m];
+            }
+            dgamma[k] = - this->Q_v[k] * (dS[k] / S[k] + s2);
+        }
+    }
 }
 
-void UNIFAC::calculate_gamma_pure()
+// d ln_gamma_gr / dT at fixed composition, uses THETA, S and THETA_S of the last get_gamma_gr call
+template <typename Real>
+void BasicUNIFAC<Real>::get_gamma_gr_dT(const Matrix<Real> &psi, const Matrix<Real> &dpsi_dT, Workspace &ws, Real *dgamma_gr_dT) const
 {
-    
-    for (int i = 0; i < this->comp_names.size(); i++)
+    const int n = this->n_groups;
+    const Real *THETA = ws.THETA.data();
+    const Real *S = ws.S.data();
+    const Real *THETA_S = ws.THETA_S.data();
+    Real *dS = ws.dS.data();
+    Real *dTHETA_S = ws.dTHETA_S.data();
+
+    std::fill(dS, dS + n, Real(0));
+    for (int k = 0; k < n; ++k)
     {
-        vector<float> conc(this->comp_names.size(), 0);
-        conc[i] = 1;
-        vector<float> ln_gamma_pure = get_gamma_gr(conc);
-        for (int j = 0; j < this->groups_names.size(); j++)
+        const Real *dpsi_k = dpsi_dT.row(k);
+        const Real theta_k = THETA[k];
+        for (int m = 0; m < n; ++m)
+        {
+            dS[m] += theta_k * dpsi_k[m];
+        }
+    }
+    for (int m = 0; m < n; ++m)
+    {
+        dTHETA_S[m] = THETA_S[m] * dS[m] / S[m];
+    }
+
+    for (int k = 0; k < n; ++k)
+    {
+        const Real *psi_k = psi.row(k);
+        const Real *dpsi_k = dpsi_dT.row(k);
+        Real s2 = 0;
+        for (int m = 0; m < n; ++m)
         {
-            this->ln_gamma_pure[i][j] = ln_gamma_pure[j];
+            s2 += dpsi_k[m] * THETA_S[m] - psi_k[m] * dTHETA_S[m];
         }
+        dgamma_gr_dT[k] = - this->Q_v[k] * (dS[k] / S[k] + s2);
     }
+}
 
+template <typename Real>
+void BasicUNIFAC<Real>::calculate_gamma_pure(State &st) const
+{
+    Workspace ws = make_workspace();
+    vector<Real> conc(this->n_comps, 0);
+    for (int i = 0; i < this->n_comps; i++)
+    {
+        conc[i] = 1;
+        get_gamma_gr(conc.data(), st.psi, ws, st.ln_gamma_pure.row(i));
+        get_gamma_gr_dT(st.psi, st.dpsi_dT, ws, st.dln_gamma_pure_dT.row(i));
+        conc[i] = 0;
+    }
 }
 
 
-UNIFAC_W::UNIFAC_W(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances, vector<float> &Mw): UNIFAC(parameters, substances)
+template <typename Real>
+BasicUNIFAC_W<Real>::BasicUNIFAC_W(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances, vector<Real> &Mw): BasicUNIFAC<Real>(parameters, substances)
 {
     this->Mw = Mw;
 }
 
-vector<float> UNIFAC_W::get_y(const vector<float> &conc, float T)
+template <typename Real>
+void BasicUNIFAC_W<Real>::get_y_state(const Real *conc, const State &st, Workspace &ws, Real *y) const
 {   
-    float w_M = 0;
+    Real w_M = 0;
     for(int i = 0; i < this->n_comps; ++i)
     {
         w_M += conc[i] / this->Mw[i];
     }
 
-    vector<float> conc_x(this->n_comps, 0);
+    Real *conc_x = ws.conc_x.data();
     for(int i = 0; i < this->n_comps; ++i)
     {
         conc_x[i] = (conc[i] / this->Mw[i]) / w_M;
     }
 
-    vector<float> y_x(this->n_comps, 0); 
-    y_x = this->UNIFAC::get_y(conc_x, T);
+    this->BasicUNIFAC<Real>::get_y_state(conc_x, st, ws, y);
 
-    vector<float> y_w(this->n_comps, 0);
     for(int i = 0; i < this->n_comps; ++i)
     {
-        y_w[i] = y_x[i] / (this->Mw[i] * w_M);
+        y[i] = y[i] / (this->Mw[i] * w_M);
     }
+}
 
-    return y_w;
+// ln_y_w = ln_y_x - ln(Mw * w_M), x_k = (w_k / Mw_k) / w_M, so
+// d ln_y_w_i / d w_j = (J_ij - sum_k J_ik x_k - 1) / (Mw_j * w_M)
+template <typename Real>
+void BasicUNIFAC_W<Real>::get_lny_and_jacobian_state(const Real *conc, const State &st, Workspace &ws,
+                                                     Real *lny, Real *dlny_dx, Real *dlny_dT) const
+{
+    const int c = this->n_comps;
+    Real w_M = 0;
+    for(int i = 0; i < c; ++i)
+    {
+        w_M += conc[i] / this->Mw[i];
+    }
+
+    Real *conc_x = ws.conc_x.data();
+    for(int i = 0; i < c; ++i)
+    {
+        conc_x[i] = (conc[i] / this->Mw[i]) / w_M;
+    }
+
+    this->BasicUNIFAC<Real>::get_lny_and_jacobian_state(conc_x, st, ws, lny, dlny_dx, dlny_dT);
+
+    for(int i = 0; i < c; ++i)
+    {
+        Real *J_i = dlny_dx + i * c;
+        Real s = 0;
+        for(int k = 0; k < c; ++k)
+        {
+            s += J_i[k] * conc_x[k];
+        }
+        for(int j = 0; j < c; ++j)
+        {
+            J_i[j] = (J_i[j] - s - 1) / (this->Mw[j] * w_M);
+        }
+        lny[i] -= log(this->Mw[i] * w_M);
+    }
 }
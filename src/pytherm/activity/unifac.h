@@ -1,17 +1,45 @@
 #pragma once
 
+#include <cstdint>
+#include <memory>
 #include <string>
 #include <map>
+#include <unordered_map>
 #include <vector>
 #include <binds/pybind11.h>
 
+#include <pytherm/matrix.h>
+
 #include "activitymodel.h"
+#include "tcache.h"
 
 using std::string;
 using std::vector;
 
 namespace py = pybind11;
 
+// Header of the binary UNIFAC dataset (.ufb), written by ParametersUNIFAC::save_binary.
+// Offsets are in bytes from the start of the file, the interaction table is SIMD_ALIGN aligned
+struct UNIFACBinaryHeader
+{
+    char magic[8];              // "PTUNIFAC"
+    uint32_t version;
+    uint32_t unifac_type;       // 1 - modified, 0 - classic
+    uint64_t n_main;
+    uint64_t n_sub;
+    uint64_t names_offset;      // '\0' terminated main group names, then subgroup names
+    uint64_t names_size;
+    uint64_t sub_to_main_offset; // int32_t [n_sub]
+    uint64_t R_offset;          // double [n_sub]
+    uint64_t Q_offset;          // double [n_sub]
+    uint64_t res_offset;        // double [n_main, n_main, 3]
+    uint64_t defined_offset;    // uint8_t [n_main, n_main]
+    uint64_t file_size;
+};
+
+const char UNIFAC_BINARY_MAGIC[8] = {'P', 'T', 'U', 'N', 'I', 'F', 'A', 'C'};
+const uint32_t UNIFAC_BINARY_VERSION = 1;
+
 class ParametersUNIFAC
 {
 private:
@@ -20,16 +48,35 @@ private:
     void readMainGroups(std::ifstream &in);
     void readSubGroups(std::ifstream &in);
     void readInter(std::ifstream &in);
+    void readBinary(const std::string &path);
+    void buildIndex();
+    std::unordered_map<std::string, int> sub_index; // subgroup name -> subgroup id
+    // owner of the interaction table: a heap block for text datasets or a MappedFile for binary ones,
+    // shared between copies of the parameters
+    std::shared_ptr<const void> storage;
+    std::vector<std::pair<std::pair<int, int>, std::vector<double>>> inter_rows;
+    bool mapped = false;
 public:
     bool unifacType;
     std::vector<std::string> mainGroups;
     std::vector<std::string> subGroups;
     std::vector<int> subToMain;
-    std::vector<float> R;
-    std::vector<float> Q;
-    std::map<int, std::map<int, std::vector<float>>> resParams;
+    std::vector<double> R;
+    std::vector<double> Q;
+    size_t n_main = 0;
+    const double *resParams = nullptr;   // [n_main, n_main, 3], a_ij, b_ij, c_ij
+    const uint8_t *resDefined = nullptr; // [n_main, n_main], 1 if the pair is in the dataset
+    // loads a text .dat or a binary .ufb dataset, the format is detected by the file header
     ParametersUNIFAC(std::string path);
-    int get_sub_id(std::string gr_name);
+    // converts the dataset to the binary format
+    void save_binary(std::string path) const;
+    bool is_mapped() const;
+    const double *get_res_params(int i, int j) const { return this->resParams + 3 * (i * this->n_main + j); }
+    bool has_res_params(int i, int j) const { return this->resDefined[i * this->n_main + j] != 0; }
+    // throws KeyError for unknown subgroups
+    int get_sub_id(const std::string &gr_name) const;
+    // interaction parameters of main groups i, j, throws ValueError if the pair is not in the dataset
+    const double *get_res_params_checked(int i, int j) const;
     int get_R(int id);
     int get_Q(int id);
 };
@@ -46,44 +93,118 @@ public:
 };
 
 
-class UNIFAC: public ActivityModel
+// Temperature dependent part of UNIFAC, read-only during evaluation
+template <typename Real>
+struct UNIFACState
+{
+    Real T = -1;
+    Matrix<Real> psi;               // [n_groups, n_groups]
+    Matrix<Real> dpsi_dT;           // [n_groups, n_groups]
+    Matrix<Real> ln_gamma_pure;     // [n_comps, n_groups]
+    Matrix<Real> dln_gamma_pure_dT; // [n_comps, n_groups]
+};
+
+// Scratch buffers for one evaluation, sized once for the model.
+// Every thread needs its own workspace
+template <typename Real>
+struct UNIFACWorkspace
+{
+    vector<Real> X;         // [n_groups]
+    vector<Real> THETA;     // [n_groups]
+    vector<Real> S;         // [n_groups]
+    vector<Real> THETA_S;   // [n_groups]
+    vector<Real> gamma_gr;  // [n_groups]
+    vector<Real> lny_res;   // [n_comps]
+    vector<Real> conc_x;    // [n_comps]
+    vector<Real> dTHETA;        // [n_groups]
+    vector<Real> dS;            // [n_groups]
+    vector<Real> dTHETA_S;      // [n_groups]
+    vector<Real> dgamma_gr_dx;  // [n_comps, n_groups]
+    vector<Real> dgamma_gr_dT;  // [n_groups]
+};
+
+// UNIFAC in Real precision, see UNIFAC and UNIFAC64 below
+template <typename Real>
+class BasicUNIFAC: public BasicActivityModel<Real>
 {
+public:
+    typedef UNIFACState<Real> State;
+    typedef UNIFACWorkspace<Real> Workspace;
+
 protected:
     int n_groups;
     int n_comps;
-    vector<vector<float>> group_comp;
-    vector<vector<float>> psi;
-    float T;
-    vector<float> q_v;
-    vector<float> r_v;
-    vector<vector<float>> ln_gamma_pure;
+    Matrix<Real> group_comp;        // [n_comps, n_groups]
+    TemperatureCache<State> cache;
+    std::shared_ptr<const State> current; // state of the last get_y call
+    vector<Real> q_v;
+    vector<Real> r_v;
+    vector<Real> r34_v;             // r_v^(3/4) for the modified combinatorial part
     vector<string> comp_names;
     vector<string> groups_names;
     vector<int> sub_id_global;
-    vector<float> Q_v;
-    vector<float> R_v;
+    vector<Real> Q_v;
+    vector<Real> R_v;
     vector<int> id_global;
-    vector<vector<vector<float>>> res_params;
+    Matrix<Real> res_params;        // [3 * n_groups, n_groups], a, b and c blocks
+    Workspace ws;                   // workspace of the calling thread for get_y
     void calculate_vdw();
-    vector<float> get_lny_comb_classic(const vector<float> &conc);
-    vector<float> get_lny_comb_modified(const vector<float> &conc);
-    vector<float> (UNIFAC::*get_lny_comb)(const vector<float> &);
-    vector<float> get_lny_res(const vector<float> &conc);
-    void calculate_psi(float T);
-    void calculate_gamma_pure();
-    vector<float> get_gamma_gr(const vector<float> &conc);
+    void get_lny_comb_classic(const Real *conc, Real *lny_comb) const;
+    void get_lny_comb_modified(const Real *conc, Real *lny_comb) const;
+    void (BasicUNIFAC::*get_lny_comb)(const Real *, Real *) const;
+    void calculate_lny_comb_dx(const Real *conc, const vector<Real> &r_phi, Real *dlny_comb_dx) const;
+    void get_lny_comb_dx_classic(const Real *conc, Real *dlny_comb_dx) const;
+    void get_lny_comb_dx_modified(const Real *conc, Real *dlny_comb_dx) const;
+    void (BasicUNIFAC::*get_lny_comb_dx)(const Real *, Real *) const;
+    void get_lny_res(const Real *conc, const State &st, Workspace &ws, Real *lny_res) const;
+    void calculate_psi(Real T, State &st) const;
+    void calculate_gamma_pure(State &st) const;
+    void calculate_state(Real T, State &st) const;
+    const State &get_state(Real T);
+    void get_gamma_gr(const Real *conc, const Matrix<Real> &psi, Workspace &ws, Real *gamma_gr) const;
+    void get_gamma_gr_dx(const Matrix<Real> &psi, Workspace &ws, Real *dgamma_gr_dx) const;
+    void get_gamma_gr_dT(const Matrix<Real> &psi, const Matrix<Real> &dpsi_dT, Workspace &ws, Real *dgamma_gr_dT) const;
 
 public:
-    UNIFAC(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances);
-    vector<float> get_y(const vector<float> &conc, float T) override;
-    vector<float> get_a(const vector<float> &conc, float T) override;
+    BasicUNIFAC(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances);
+    vector<Real> get_y(const vector<Real> &conc, Real T) override;
+    vector<Real> get_a(const vector<Real> &conc, Real T) override;
+    // writes n_comps activity coefficients to y, allocates nothing once T is cached
+    void get_y_into(const Real *conc, Real T, Real *y);
+    Workspace make_workspace() const;
+    // thread-safe evaluation with a precomputed temperature state and a workspace per thread
+    virtual void get_y_state(const Real *conc, const State &st, Workspace &ws, Real *y) const;
+    // ln_y [n_comps], d ln_y_i / d x_j [n_comps, n_comps] with other x fixed and d ln_y_i / dT [n_comps]
+    void get_lny_and_jacobian(const Real *conc, Real T, Real *lny, Real *dlny_dx, Real *dlny_dT);
+    virtual void get_lny_and_jacobian_state(const Real *conc, const State &st, Workspace &ws,
+                                            Real *lny, Real *dlny_dx, Real *dlny_dT) const;
+    int get_n_comps() const;
+    void get_y_batch(const Real *conc, const Real *T, size_t n_points, size_t n_comps,
+                     size_t T_stride, Real *out, int n_threads = 1) override;
+    const TemperatureCache<State> &get_cache() const;
+    std::shared_ptr<const State> get_cached_state(Real T);
+    const Matrix<Real> &get_group_comp() const;
+    const Matrix<Real> &get_res_params() const;
+    void set_cache_size(size_t max_size);
+    void cache_clear();
 };
 
-class UNIFAC_W: public UNIFAC
+template <typename Real>
+class BasicUNIFAC_W: public BasicUNIFAC<Real>
 {
 protected:
-    vector<float> Mw;
+    vector<Real> Mw;
 public:
-    UNIFAC_W(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances, vector<float> &Mw);
-    vector<float> get_y(const vector<float> &conc, float T) override;
-};
\ No newline at end of file
+    typedef typename BasicUNIFAC<Real>::State State;
+    typedef typename BasicUNIFAC<Real>::Workspace Workspace;
+
+    BasicUNIFAC_W(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances, vector<Real> &Mw);
+    void get_y_state(const Real *conc, const State &st, Workspace &ws, Real *y) const override;
+    void get_lny_and_jacobian_state(const Real *conc, const State &st, Workspace &ws,
+                                    Real *lny, Real *dlny_dx, Real *dlny_dT) const override;
+};
+
+typedef BasicUNIFAC<float> UNIFAC;
+typedef BasicUNIFAC<double> UNIFAC64;
+typedef BasicUNIFAC_W<float> UNIFAC_W;
+typedef BasicUNIFAC_W<double> UNIFAC_W64;
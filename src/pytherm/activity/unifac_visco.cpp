@@ -1,22 +1,21 @@
 #include "unifac_visco.h"
 
 
-UNIFAC_VISCO::UNIFAC_VISCO(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances): UNIFAC(parameters, substances)
+template <typename Real>
+BasicUNIFAC_VISCO<Real>::BasicUNIFAC_VISCO(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances): BasicUNIFAC<Real>(parameters, substances)
 {
     
 }
 
-double UNIFAC_VISCO::get_GE_RT(const vector<float> &conc, double T)
+template <typename Real>
+double BasicUNIFAC_VISCO<Real>::get_GE_RT(const vector<Real> &conc, double T)
 {   
-    if (this->T != T)
-    {
-        this->T = T;
-        calculate_psi(T);
-        calculate_gamma_pure();
-    }
+    const UNIFACState<Real> &st = this->get_state(T);
 
-    auto lny_comb = (this->*UNIFAC::get_lny_comb)(conc);
-    auto lny_res = this->UNIFAC::get_lny_res(conc);
+    vector<Real> lny_comb(this->n_comps);
+    vector<Real> lny_res(this->n_comps);
+    (this->*(this->get_lny_comb))(conc.data(), lny_comb.data());
+    this->get_lny_res(conc.data(), st, this->ws, lny_res.data());
 
     double GE_RT_comb = 0;
     double DE_RT_res = 0;
@@ -2,9 +2,13 @@
 
 #include "unifac.h"
 
-class UNIFAC_VISCO: public UNIFAC
+template <typename Real>
+class BasicUNIFAC_VISCO: public BasicUNIFAC<Real>
 {
 public:
-    UNIFAC_VISCO(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances);
-    double get_GE_RT(const vector<float> &conc, double T);
-};
\ No newline at end of file
+    BasicUNIFAC_VISCO(ParametersUNIFAC &parameters, SubstancesUNIFAC &substances);
+    double get_GE_RT(const vector<Real> &conc, double T);
+};
+
+typedef BasicUNIFAC_VISCO<float> UNIFAC_VISCO;
+typedef BasicUNIFAC_VISCO<double> UNIFAC_VISCO64;
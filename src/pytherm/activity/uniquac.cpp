@@ -1,18 +1,24 @@
 #pragma once
 
+#include <algorithm>
+#include <stdexcept>
+#include <string>
+
+#include <pytherm/parallel.h>
 #include "uniquac.h"
 
-std::vector<float> get_lny_SH(const std::vector<float> &conc, const std::vector<float> &r, const std::vector<float> &q)
+template <typename Real>
+std::vector<Real> get_lny_SH(const std::vector<Real> &conc, const std::vector<Real> &r, const std::vector<Real> &q)
 {
     int n_comps = conc.size();
-    std::vector<float> ln_y_comb(n_comps, 0);
+    std::vector<Real> ln_y_comb(n_comps, 0);
 
-    std::vector<float> phi(n_comps, 0);
-    std::vector<float> theta(n_comps, 0);
+    std::vector<Real> phi(n_comps, 0);
+    std::vector<Real> theta(n_comps, 0);
 
-    float s1 = 0;
-    float s2 = 0;
-    float s3 = 0;
+    Real s1 = 0;
+    Real s2 = 0;
+    Real s3 = 0;
     for (int i = 0; i < n_comps; ++i)
     {
         s1 += r[i] * conc[i]; // phi
@@ -30,54 +36,190 @@ std::vector<float> get_lny_SH(const std::vector<float> &conc, const std::vector<
     return ln_y_comb;
 }
 
-UNIQUAC::UNIQUAC(std::vector<float> &r, std::vector<float> &q, std::vector<std::vector<std::vector<float>>> &res_matrix)
+// d ln_y_comb_i / d x_j = phi_j (phi_i - 1) - 5 q_i (theta_j - phi_j) (1 - phi_i / theta_i)
+template <typename Real>
+void get_lny_SH_dx(const std::vector<Real> &conc, const std::vector<Real> &r, const std::vector<Real> &q, Real *dlny_dx)
+{
+    int n_comps = conc.size();
+
+    Real s1 = 0;
+    Real s2 = 0;
+    for (int i = 0; i < n_comps; ++i)
+    {
+        s1 += r[i] * conc[i]; // phi
+        s2 += q[i] * conc[i]; // theta
+    }
+
+    for (int i = 0; i < n_comps; ++i)
+    {
+        Real phi_i = r[i] / s1;
+        Real theta_i = q[i] / s2;
+        for (int j = 0; j < n_comps; ++j)
+        {
+            Real phi_j = r[j] / s1;
+            Real theta_j = q[j] / s2;
+            dlny_dx[i * n_comps + j] = phi_j * (phi_i - 1) - 5 * q[i] * (theta_j - phi_j) * (1 - phi_i / theta_i);
+        }
+    }
+}
+
+template <typename Real>
+BasicUNIQUAC<Real>::BasicUNIQUAC(std::vector<Real> &r, std::vector<Real> &q, std::vector<std::vector<std::vector<Real>>> &res_matrix)
 {
     this->r = r;
     this->q = q;
-    this->T = -1;
     this->n_comp = r.size();
     this->res_matrix = res_matrix;
-    this->get_lny_comb = get_lny_SH;
+    this->get_lny_comb = get_lny_SH<Real>;
 
-    // std::vector<std::vector<std::vector<float>>> m;
+    // std::vector<std::vector<std::vector<Real>>> m;
     // for(int i = 0; i < this->n_comp; ++i)
     // {
-    //     std::vector<std::vector<float>> b;
+    //     std::vector<std::vector<Real>> b;
     //     for(int j = 0; j < this->n_comp; ++j)
     //     {
     //         b.push_back(
-    //             std::vector<float> {0, 0}
+    //             std::vector<Real> {0, 0}
     //         );
     //     }
     //     m.push_back(b);
     // }
     // this->res_matrix = m;
 
-    std::vector<std::vector<float>> m;
-    for (int i = 0; i < this->n_comp; ++i)
+}
+
+template <typename Real>
+const typename BasicUNIQUAC<Real>::State &BasicUNIQUAC<Real>::get_state(Real T)
+{
+    if (!this->current || this->current->T != T)
     {
-        std::vector<float> b;
-        for (int j = 0; j < this->n_comp; ++j)
-        {
-            b.push_back(0.0);
-        }
-        m.push_back(b);
+        this->current = this->cache.get(T, [this](Real T, State &st) { update_t_matrix(T, st); });
     }
-    this->t_matrix = m;
+    return *this->current;
+}
+
+template <typename Real>
+std::vector<Real> BasicUNIQUAC<Real>::get_y(const std::vector<Real> &conc, Real T)
+{
+    return get_y_state(conc, get_state(T));
 }
 
-std::vector<float> UNIQUAC::get_y(const std::vector<float> &conc, float T)
+// Residual part has the form of the UNIFAC group term with components as groups:
+// ln_y_res_i = q_i (1 - ln S_i - sum_m t_im theta_m / S_m), S_m = sum_n theta_n t_nm
+template <typename Real>
+void BasicUNIQUAC<Real>::get_lny_and_jacobian(const Real *conc, Real T, Real *lny, Real *dlny_dx, Real *dlny_dT)
 {
-    if (this->T != T)
+    const State &st = get_state(T);
+    const int n = this->n_comp;
+    std::vector<Real> x(conc, conc + n);
+
+    std::vector<Real> lny_comb = this->get_lny_comb(x, this->r, this->q);
+    std::vector<Real> lny_res = get_lny_res(x, st);
+    get_lny_SH_dx(x, this->r, this->q, dlny_dx);
+
+    Real total_theta = 0;
+    for (int m = 0; m < n; ++m)
     {
-        this->T = T;
-        update_t_matrix(T);
+        total_theta += this->q[m] * x[m];
+    }
+    std::vector<Real> theta(n);
+    for (int m = 0; m < n; ++m)
+    {
+        theta[m] = this->q[m] * x[m] / total_theta;
+    }
+    std::vector<Real> S(n, 0);
+    std::vector<Real> dS(n, 0);
+    for (int k = 0; k < n; ++k)
+    {
+        for (int m = 0; m < n; ++m)
+        {
+            S[m] += theta[k] * st.t_matrix[k][m];
+            dS[m] += theta[k] * st.dt_matrix_dT[k][m];
+        }
+    }
+    std::vector<Real> theta_S(n);
+    std::vector<Real> dtheta_S(n);
+    for (int m = 0; m < n; ++m)
+    {
+        theta_S[m] = theta[m] / S[m];
+        dtheta_S[m] = theta_S[m] * dS[m] / S[m];
     }
 
-    std::vector<float> y(this->n_comp, 0);
+    for (int i = 0; i < n; ++i)
+    {
+        lny[i] = lny_comb[i] + lny_res[i];
+        Real s2 = 0;
+        for (int m = 0; m < n; ++m)
+        {
+            s2 += st.dt_matrix_dT[i][m] * theta_S[m] - st.t_matrix[i][m] * dtheta_S[m];
+        }
+        dlny_dT[i] = - this->q[i] * (dS[i] / S[i] + s2);
+    }
 
-    std::vector<float> lny_comb = this->get_lny_comb(conc, this->r, this->q);
-    std::vector<float> lny_res = get_lny_res(conc);
+    // d theta_m / d x_j = (q_m delta_mj - theta_m q_j) / total_theta
+    std::vector<Real> dtheta(n);
+    for (int j = 0; j < n; ++j)
+    {
+        for (int m = 0; m < n; ++m)
+        {
+            dtheta[m] = ((m == j ? this->q[m] : 0) - theta[m] * this->q[j]) / total_theta;
+        }
+        std::fill(dS.begin(), dS.end(), Real(0));
+        for (int k = 0; k < n; ++k)
+        {
+            for (int m = 0; m < n; ++m)
+            {
+                dS[m] += dtheta[k] * st.t_matrix[k][m];
+            }
+        }
+        for (int m = 0; m < n; ++m)
+        {
+            dtheta_S[m] = (dtheta[m] - theta_S[m] * dS[m]) / S[m];
+        }
+        for (int i = 0; i < n; ++i)
+        {
+            Real s2 = 0;
+            for (int m = 0; m < n; ++m)
+            {
+                s2 += st.t_matrix[i][m] * dtheta_S[m];
+            }
+            dlny_dx[i * n + j] += - this->q[i] * (dS[i] / S[i] + s2);
+        }
+    }
+}
+
+template <typename Real>
+int BasicUNIQUAC<Real>::get_n_comps() const
+{
+    return this->n_comp;
+}
+
+template <typename Real>
+const TemperatureCache<typename BasicUNIQUAC<Real>::State> &BasicUNIQUAC<Real>::get_cache() const
+{
+    return this->cache;
+}
+
+template <typename Real>
+void BasicUNIQUAC<Real>::set_cache_size(size_t max_size)
+{
+    this->cache.set_max_size(max_size);
+}
+
+template <typename Real>
+void BasicUNIQUAC<Real>::cache_clear()
+{
+    this->cache.clear();
+    this->current.reset();
+}
+
+template <typename Real>
+std::vector<Real> BasicUNIQUAC<Real>::get_y_state(const std::vector<Real> &conc, const State &st) const
+{
+    std::vector<Real> y(this->n_comp, 0);
+
+    std::vector<Real> lny_comb = this->get_lny_comb(conc, this->r, this->q);
+    std::vector<Real> lny_res = get_lny_res(conc, st);
 
     for (int i = 0; i < this->n_comp; ++i)
     {
@@ -87,10 +229,11 @@ std::vector<float> UNIQUAC::get_y(const std::vector<float> &conc, float T)
     return y;
 }
 
-std::vector<float> UNIQUAC::get_a(const std::vector<float> &conc, float T)
+template <typename Real>
+std::vector<Real> BasicUNIQUAC<Real>::get_a(const std::vector<Real> &conc, Real T)
 {   
-    std::vector<float> y = get_y(conc, T);
-    std::vector<float> a(conc.size());
+    std::vector<Real> y = get_y(conc, T);
+    std::vector<Real> a(conc.size());
     for(int i = 0; i < this->n_comp; ++i)
     {
         a[i] = y[i] * conc[i];
@@ -99,29 +242,63 @@ std::vector<float> UNIQUAC::get_a(const std::vector<float> &conc, float T)
     return a;
 }
 
-std::vector<float> UNIQUAC::get_lny_res(const std::vector<float> &conc)
+template <typename Real>
+void BasicUNIQUAC<Real>::get_y_batch(const Real *conc, const Real *T, size_t n_points, size_t n_comps,
+                          size_t T_stride, Real *out, int n_threads)
+{
+    if (n_comps != this->n_comp)
+    {
+        throw std::invalid_argument("conc has " + std::to_string(n_comps) + " components, model has "
+                                    + std::to_string(this->n_comp));
+    }
+    if (n_points == 0) return;
+
+    auto calculate = [this](Real T, State &st) { update_t_matrix(T, st); };
+    // states are shared by all threads through the temperature cache
+    std::shared_ptr<const State> first = this->cache.get(T[0], calculate);
+
+    parallel_for(n_points, n_threads, [&](size_t begin, size_t end)
+    {
+        std::shared_ptr<const State> st = first;
+        std::vector<Real> x(n_comps);
+        for (size_t p = begin; p < end; ++p)
+        {
+            Real T_p = T[p * T_stride];
+            if (st->T != T_p)
+            {
+                st = this->cache.get(T_p, calculate);
+            }
+            x.assign(conc + p * n_comps, conc + (p + 1) * n_comps);
+            std::vector<Real> y = get_y_state(x, *st);
+            std::copy(y.begin(), y.end(), out + p * n_comps);
+        }
+    });
+}
+
+template <typename Real>
+std::vector<Real> BasicUNIQUAC<Real>::get_lny_res(const std::vector<Real> &conc, const State &st) const
 {
-    std::vector<float> lny_res(this->n_comp);
+    std::vector<Real> lny_res(this->n_comp);
     for (int i = 0; i < this->n_comp; ++i)
     {
-        float acc1 = 0;
-        float acc2 = 0;
+        Real acc1 = 0;
+        Real acc2 = 0;
         for (int j = 0; j < this->n_comp; ++j)
         {
-            acc1 += this->q[j] * conc[j] * this->t_matrix[j][i];
+            acc1 += this->q[j] * conc[j] * st.t_matrix[j][i];
             acc2 += this->q[j] * conc[j];
         }
-        float s1 = log(acc1 / acc2);
+        Real s1 = log(acc1 / acc2);
 
-        float s2 = 0;
+        Real s2 = 0;
         for (int j = 0; j < this->n_comp; ++j)
         {
-            float acc1 = 0;
+            Real acc1 = 0;
             for (int k = 0; k < this->n_comp; ++k)
             {
-                acc1 += this->q[k] * conc[k] * this->t_matrix[k][j];
+                acc1 += this->q[k] * conc[k] * st.t_matrix[k][j];
             }
-            s2 += this->q[j] * conc[j] * this->t_matrix[i][j] / acc1;
+            s2 += this->q[j] * conc[j] * st.t_matrix[i][j] / acc1;
         }
 
         lny_res[i] = this->q[i] * (1 - s1 - s2);
@@ -130,19 +307,25 @@ std::vector<float> UNIQUAC::get_lny_res(const std::vector<float> &conc)
     return lny_res;
 }
 
-void UNIQUAC::update_t_matrix(float T)
+template <typename Real>
+void BasicUNIQUAC<Real>::update_t_matrix(Real T, State &st) const
 {
-    std::vector<float> temps{1, 1 / T};
+    st.t_matrix.assign(this->n_comp, std::vector<Real>(this->n_comp, 0.0));
+    st.dt_matrix_dT.assign(this->n_comp, std::vector<Real>(this->n_comp, 0.0));
+    std::vector<Real> temps{1, 1 / T};
     for (int i = 0; i < this->n_comp; ++i)
     {
         for (int j = 0; j < this->n_comp; ++j)
         {
-            float s = 0;
+            Real s = 0;
             for (int k = 0; k < 2; ++k)
             {
                 s += - this->res_matrix[i][j][k] * temps[k];
             }
-            this->t_matrix[i][j] = exp(s);
+            st.t_matrix[i][j] = exp(s);
+            // s = -a - b / T
+            st.dt_matrix_dT[i][j] = st.t_matrix[i][j] * this->res_matrix[i][j][1] / (T * T);
         }
     }
+    st.T = T;
 }
@@ -3,25 +3,56 @@
 #include <vector>
 
 #include "activitymodel.h"
+#include "tcache.h"
 
 
-std::vector<float> get_lny_SH(const std::vector<float> &conc, const std::vector<float> &r, const std::vector<float> &q);
+template <typename Real>
+std::vector<Real> get_lny_SH(const std::vector<Real> &conc, const std::vector<Real> &r, const std::vector<Real> &q);
+template <typename Real>
+void get_lny_SH_dx(const std::vector<Real> &conc, const std::vector<Real> &r, const std::vector<Real> &q, Real *dlny_dx);
 
-class UNIQUAC: public ActivityModel
+// Temperature dependent part of UNIQUAC, read-only during evaluation
+template <typename Real>
+struct UNIQUACState
 {
+    Real T = -1;
+    std::vector<std::vector<Real>> t_matrix;
+    std::vector<std::vector<Real>> dt_matrix_dT;
+};
+
+// UNIQUAC in Real precision, see UNIQUAC and UNIQUAC64 below
+template <typename Real>
+class BasicUNIQUAC: public BasicActivityModel<Real>
+{
+public:
+    typedef UNIQUACState<Real> State;
+
 private:
-    std::vector<float> r;
-    std::vector<float> q;
-    std::vector<std::vector<std::vector<float>>> res_matrix;
-    float T;
+    std::vector<Real> r;
+    std::vector<Real> q;
+    std::vector<std::vector<std::vector<Real>>> res_matrix;
     int n_comp;
-    std::vector<std::vector<float>> t_matrix;
+    TemperatureCache<State> cache;
+    std::shared_ptr<const State> current; // state of the last get_y call
 
-    std::vector<float> get_lny_res(const std::vector<float> &conc);
-    std::vector<float> (*get_lny_comb)(const std::vector<float> &, const std::vector<float> &,const std::vector<float> &);
-    void update_t_matrix(float T);
+    std::vector<Real> get_lny_res(const std::vector<Real> &conc, const State &st) const;
+    std::vector<Real> (*get_lny_comb)(const std::vector<Real> &, const std::vector<Real> &,const std::vector<Real> &);
+    void update_t_matrix(Real T, State &st) const;
+    const State &get_state(Real T);
+    std::vector<Real> get_y_state(const std::vector<Real> &conc, const State &st) const;
 public:
-    UNIQUAC(std::vector<float> &r, std::vector<float> &q, std::vector<std::vector<std::vector<float>>> &res_matrix);
-    std::vector<float> get_y(const std::vector<float> &conc, float T) override;
-    std::vector<float> get_a(const std::vector<float> &conc, float T) override;
-};
\ No newline at end of file
+    BasicUNIQUAC(std::vector<Real> &r, std::vector<Real> &q, std::vector<std::vector<std::vector<Real>>> &res_matrix);
+    std::vector<Real> get_y(const std::vector<Real> &conc, Real T) override;
+    std::vector<Real> get_a(const std::vector<Real> &conc, Real T) override;
+    // ln_y [n_comps], d ln_y_i / d x_j [n_comps, n_comps] with other x fixed and d ln_y_i / dT [n_comps]
+    void get_lny_and_jacobian(const Real *conc, Real T, Real *lny, Real *dlny_dx, Real *dlny_dT);
+    int get_n_comps() const;
+    void get_y_batch(const Real *conc, const Real *T, size_t n_points, size_t n_comps,
+                     size_t T_stride, Real *out, int n_threads = 1) override;
+    const TemperatureCache<State> &get_cache() const;
+    void set_cache_size(size_t max_size);
+    void cache_clear();
+};
+
+typedef BasicUNIQUAC<float> UNIQUAC;
+typedef BasicUNIQUAC<double> UNIQUAC64;
@@ -0,0 +1,46 @@
+#pragma once
+
+#include <algorithm>
+#include <cmath>
+
+// Real roots of z^3 + c2 z^2 + c1 z + c0 = 0 in ascending order, returns their number (1 or 3).
+// Trigonometric form for three roots, Cardano otherwise, every root is polished by Newton steps
+inline int solve_cubic(double c2, double c1, double c0, double *roots)
+{
+    const double pi = 3.14159265358979323846;
+    double q = (c2 * c2 - 3 * c1) / 9;
+    double r = (2 * c2 * c2 * c2 - 9 * c2 * c1 + 27 * c0) / 54;
+    double q3 = q * q * q;
+    int n;
+    if (r * r < q3)
+    {
+        double theta = std::acos(r / std::sqrt(q3));
+        double s = -2 * std::sqrt(q);
+        roots[0] = s * std::cos(theta / 3) - c2 / 3;
+        roots[1] = s * std::cos((theta + 2 * pi) / 3) - c2 / 3;
+        roots[2] = s * std::cos((theta - 2 * pi) / 3) - c2 / 3;
+        std::sort(roots, roots + 3);
+        n = 3;
+    }
+    else
+    {
+        double a = -std::copysign(std::cbrt(std::fabs(r) + std::sqrt(r * r - q3)), r);
+        double b = a != 0 ? q / a : 0;
+        roots[0] = a + b - c2 / 3;
+        n = 1;
+    }
+
+    for (int i = 0; i < n; i++)
+    {
+        double z = roots[i];
+        for (int it = 0; it < 2; it++)
+        {
+            double f = ((z + c2) * z + c1) * z + c0;
+            double df = (3 * z + 2 * c2) * z + c1;
+            if (df == 0) break;
+            z -= f / df;
+        }
+        roots[i] = z;
+    }
+    return n;
+}
@@ -0,0 +1,527 @@
+#pragma once
+
+#include <chrono>
+#include <cmath>
+#include <limits>
+#include <stdexcept>
+
+#include <pytherm/linalg.h>
+#include <pytherm/parallel.h>
+#include "cubic.h"
+#include "psrk.h"
+
+
+PSRK::PSRK(Model &model, const vector<double> &Tc, const vector<double> &Pc, const vector<vector<double>> &mc)
+    : model(model), n_comps(model.get_n_comps()), Tc(Tc), Pc(Pc)
+{
+    if (Tc.size() != this->n_comps || Pc.size() != this->n_comps || mc.size() != this->n_comps)
+    {
+        throw std::invalid_argument("Tc, Pc and Mathias-Copeman parameters must be given for "
+                                    + std::to_string(this->n_comps) + " components");
+    }
+    for (size_t i = 0; i < this->n_comps; i++)
+    {
+        if (mc[i].empty() || mc[i].size() > 3)
+        {
+            throw std::invalid_argument("Mathias-Copeman parameters must be [c1, c2, c3] for every component");
+        }
+        this->c1.push_back(mc[i][0]);
+        this->c2.push_back(mc[i].size() > 1 ? mc[i][1] : 0);
+        this->c3.push_back(mc[i].size() > 2 ? mc[i][2] : 0);
+        this->b_i.push_back(0.08664 * R_GAS * Tc[i] / Pc[i]);
+        this->a_c.push_back(0.42748 * R_GAS * R_GAS * Tc[i] * Tc[i] / Pc[i]);
+    }
+}
+
+size_t PSRK::get_n_comps() const
+{
+    return this->n_comps;
+}
+
+const vector<double> &PSRK::get_b_i() const
+{
+    return this->b_i;
+}
+
+PSRK::Workspace PSRK::make_workspace() const
+{
+    Workspace ws;
+    ws.model = this->model.make_workspace();
+    ws.alpha.resize(this->n_comps);
+    ws.alpha_ii.resize(this->n_comps);
+    ws.lny.resize(this->n_comps);
+    ws.alpha_bar.resize(this->n_comps);
+    ws.dalpha_dT.resize(this->n_comps);
+    ws.dalpha_bar_dT.resize(this->n_comps);
+    ws.dlny_dx.resize(this->n_comps * this->n_comps);
+    ws.dlny_dT.resize(this->n_comps);
+    for (int k = 0; k < 2; k++)
+    {
+        ws.lnphi[k].resize(this->n_comps);
+        ws.dlnphi[k].resize(this->n_comps);
+    }
+    ws.dlnphi_dx.resize(this->n_comps * this->n_comps);
+    ws.jac.resize((this->n_comps + 1) * (this->n_comps + 1));
+    ws.g.resize(this->n_comps + 1);
+    return ws;
+}
+
+void PSRK::get_alpha(double T, double *alpha, double *dalpha_dT) const
+{
+    for (size_t i = 0; i < this->n_comps; i++)
+    {
+        double d = 1 - std::sqrt(T / this->Tc[i]);
+        // above Tc only the first term is used
+        bool sub = T < this->Tc[i];
+        double s = sub
+            ? 1 + this->c1[i] * d + this->c2[i] * d * d + this->c3[i] * d * d * d
+            : 1 + this->c1[i] * d;
+        alpha[i] = s * s;
+        if (dalpha_dT)
+        {
+            double ds_dd = sub ? this->c1[i] + 2 * this->c2[i] * d + 3 * this->c3[i] * d * d : this->c1[i];
+            double dd_dT = -0.5 / std::sqrt(T * this->Tc[i]);
+            dalpha_dT[i] = 2 * s * ds_dd * dd_dT;
+        }
+    }
+}
+
+PSRK::Mixture PSRK::get_mixture(const double *x, double T, double P, const Model::State &st, Workspace &ws,
+                                bool partial, bool jacobian) const
+{
+    double RT = R_GAS * T;
+    if (jacobian)
+    {
+        get_alpha(T, ws.alpha.data(), ws.dalpha_dT.data());
+        this->model.get_lny_and_jacobian_state(x, st, ws.model, ws.lny.data(), ws.dlny_dx.data(), ws.dlny_dT.data());
+    }
+    else
+    {
+        get_alpha(T, ws.alpha.data());
+        this->model.get_y_state(x, st, ws.model, ws.lny.data());
+        for (size_t i = 0; i < this->n_comps; i++)
+        {
+            ws.lny[i] = std::log(ws.lny[i]);
+        }
+    }
+
+    double b = 0;
+    for (size_t i = 0; i < this->n_comps; i++)
+    {
+        b += x[i] * this->b_i[i];
+    }
+
+    // alpha_mix = sum x_i alpha_ii + (g^E / RT + sum x_i ln(b / b_i)) / A1
+    double ge_RT = 0;
+    double s_alpha = 0;
+    double s_ln_b = 0;
+    double dalpha_mix_dT = 0;
+    for (size_t i = 0; i < this->n_comps; i++)
+    {
+        ws.alpha_ii[i] = this->a_c[i] * ws.alpha[i] / (this->b_i[i] * RT);
+        ge_RT += x[i] * ws.lny[i];
+        s_alpha += x[i] * ws.alpha_ii[i];
+        s_ln_b += x[i] * std::log(b / this->b_i[i]);
+        if (jacobian)
+        {
+            // d(a_i / (b_i R T)) / dT, the mixing term changes only through ln y
+            double dalpha_ii = this->a_c[i] / (this->b_i[i] * R_GAS) * (ws.dalpha_dT[i] / T - ws.alpha[i] / (T * T));
+            ws.dalpha_bar_dT[i] = dalpha_ii + ws.dlny_dT[i] / PSRK_A1;
+            dalpha_mix_dT += x[i] * ws.dalpha_bar_dT[i];
+        }
+    }
+    if (partial)
+    {
+        for (size_t i = 0; i < this->n_comps; i++)
+        {
+            ws.alpha_bar[i] = ws.alpha_ii[i]
+                + (ws.lny[i] + std::log(b / this->b_i[i]) + this->b_i[i] / b - 1) / PSRK_A1;
+        }
+    }
+
+    Mixture mix;
+    mix.b = b;
+    mix.alpha_mix = s_alpha + (ge_RT + s_ln_b) / PSRK_A1;
+    mix.B = b * P / RT;
+    mix.A = mix.alpha_mix * mix.B;
+    mix.dalpha_mix_dT = dalpha_mix_dT;
+    return mix;
+}
+
+double PSRK::get_Z(const Mixture &mix, Phase phase) const
+{
+    // Z^3 - Z^2 + (A - B - B^2) Z - A B = 0
+    double roots[3];
+    int n = solve_cubic(-1, mix.A - mix.B - mix.B * mix.B, -mix.A * mix.B, roots);
+    if (phase == Phase::vapor)
+    {
+        return roots[n - 1];
+    }
+    for (int i = 0; i < n; i++)
+    {
+        if (roots[i] > mix.B) return roots[i];
+    }
+    return roots[n - 1];
+}
+
+double PSRK::get_lnphi(const double *x, double T, double P, Phase phase, const Model::State &st, Workspace &ws,
+                       double *lnphi) const
+{
+    return get_lnphi_derivatives(x, T, P, phase, st, ws, lnphi, nullptr, nullptr);
+}
+
+double PSRK::get_lnphi_derivatives(const double *x, double T, double P, Phase phase, const Model::State &st,
+                                   Workspace &ws, double *lnphi, double *dlnphi_dT, double *dlnphi_dP,
+                                   double *dlnphi_dx) const
+{
+    Mixture mix = get_mixture(x, T, P, st, ws, true, dlnphi_dT != nullptr || dlnphi_dx != nullptr);
+    double Z = get_Z(mix, phase);
+    double A = mix.A, B = mix.B;
+    double ln_ZB = std::log(Z - B);
+    double ln_BZ = std::log(1 + B / Z);
+    for (size_t i = 0; i < this->n_comps; i++)
+    {
+        lnphi[i] = this->b_i[i] / mix.b * (Z - 1) - ln_ZB - ws.alpha_bar[i] * ln_BZ;
+    }
+
+    // implicit derivative of the cubic f(Z, A, B) = Z^3 - Z^2 + (A - B - B^2) Z - A B
+    double f_Z = (3 * Z - 2) * Z + A - B - B * B;
+    double f_A = Z - B;
+    double f_B = -Z - 2 * B * Z - A;
+    if (dlnphi_dP)
+    {
+        // A and B are proportional to P, alpha_bar does not depend on P
+        double dB = B / P;
+        double dZ = -(f_A * A + f_B * B) / (P * f_Z);
+        double d_ZB = (dZ - dB) / (Z - B);
+        double d_BZ = (Z * dB - B * dZ) / (Z * (Z + B));
+        for (size_t i = 0; i < this->n_comps; i++)
+        {
+            dlnphi_dP[i] = this->b_i[i] / mix.b * dZ - d_ZB - ws.alpha_bar[i] * d_BZ;
+        }
+    }
+    if (dlnphi_dT)
+    {
+        double dB = -B / T;
+        double dA = mix.dalpha_mix_dT * B + mix.alpha_mix * dB;
+        double dZ = -(f_A * dA + f_B * dB) / f_Z;
+        double d_ZB = (dZ - dB) / (Z - B);
+        double d_BZ = (Z * dB - B * dZ) / (Z * (Z + B));
+        for (size_t i = 0; i < this->n_comps; i++)
+        {
+            dlnphi_dT[i] = this->b_i[i] / mix.b * dZ - d_ZB - ws.dalpha_bar_dT[i] * ln_BZ - ws.alpha_bar[i] * d_BZ;
+        }
+    }
+    if (dlnphi_dx)
+    {
+        const size_t n = this->n_comps;
+        const double *J = ws.dlny_dx.data();
+        double b = mix.b;
+        for (size_t j = 0; j < n; j++)
+        {
+            double b_j = this->b_i[j];
+            // d(sum x_k ln y_k) / dx_j = ln y_j + sum x_k d ln y_k / dx_j
+            double xJ = 0;
+            for (size_t k = 0; k < n; k++) xJ += x[k] * J[k * n + j];
+            double dB = B * b_j / b;
+            double dalpha_mix = ws.alpha_bar[j] + (1 + xJ) / PSRK_A1;
+            double dA = dalpha_mix * B + mix.alpha_mix * dB;
+            double dZ = -(f_A * dA + f_B * dB) / f_Z;
+            double d_ZB = (dZ - dB) / (Z - B);
+            double d_BZ = (Z * dB - B * dZ) / (Z * (Z + B));
+            for (size_t i = 0; i < n; i++)
+            {
+                double b_i = this->b_i[i];
+                double dalpha_bar = (J[i * n + j] + b_j / b - b_i * b_j / (b * b)) / PSRK_A1;
+                dlnphi_dx[i * n + j] = b_i / b * dZ - b_i * b_j / (b * b) * (Z - 1) - d_ZB
+                    - dalpha_bar * ln_BZ - ws.alpha_bar[i] * d_BZ;
+            }
+        }
+    }
+    return Z;
+}
+
+double PSRK::get_p(const double *x, double T, double V, const Model::State &st, Workspace &ws) const
+{
+    Mixture mix = get_mixture(x, T, 0, st, ws, false);
+    double RT = R_GAS * T;
+    double a = mix.b * RT * mix.alpha_mix;
+    return RT / (V - mix.b) - a / (V * (V + mix.b));
+}
+
+template <typename F>
+void PSRK::for_each_point(size_t n_points, const double *T, size_t T_stride, int n_threads, F f)
+{
+    if (n_points == 0) return;
+    std::shared_ptr<const Model::State> first = this->model.get_cached_state(T[0]);
+    parallel_for(n_points, n_threads, [&](size_t begin, size_t end)
+    {
+        std::shared_ptr<const Model::State> st = first;
+        Workspace ws = make_workspace();
+        for (size_t p = begin; p < end; ++p)
+        {
+            double T_p = T[p * T_stride];
+            if (st->T != T_p)
+            {
+                st = this->model.get_cached_state(T_p);
+            }
+            f(p, T_p, *st, ws);
+        }
+    });
+}
+
+void PSRK::get_Z_batch(const double *x, const double *T, const double *P, size_t n_points,
+                       size_t T_stride, size_t P_stride, Phase phase, double *Z, int n_threads)
+{
+    for_each_point(n_points, T, T_stride, n_threads,
+        [&](size_t p, double T_p, const Model::State &st, Workspace &ws)
+        {
+            Mixture mix = get_mixture(x + p * this->n_comps, T_p, P[p * P_stride], st, ws, false);
+            Z[p] = get_Z(mix, phase);
+        });
+}
+
+void PSRK::get_lnphi_batch(const double *x, const double *T, const double *P, size_t n_points,
+                           size_t T_stride, size_t P_stride, Phase phase, double *lnphi, double *Z, int n_threads)
+{
+    for_each_point(n_points, T, T_stride, n_threads,
+        [&](size_t p, double T_p, const Model::State &st, Workspace &ws)
+        {
+            Z[p] = get_lnphi(x + p * this->n_comps, T_p, P[p * P_stride], phase, st, ws,
+                             lnphi + p * this->n_comps);
+        });
+}
+
+void PSRK::get_p_batch(const double *x, const double *T, const double *V, size_t n_points,
+                       size_t T_stride, size_t V_stride, double *P, int n_threads)
+{
+    for_each_point(n_points, T, T_stride, n_threads,
+        [&](size_t p, double T_p, const Model::State &st, Workspace &ws)
+        {
+            P[p] = get_p(x + p * this->n_comps, T_p, V[p * V_stride], st, ws);
+        });
+}
+
+SaturationPoint PSRK::solve_saturation(Saturation kind, const double *z, double T, double P, double *w, bool guess,
+                                       double tol, int max_iter, Workspace &ws) const
+{
+    const size_t n = this->n_comps;
+    const double P_ref = 1e5;
+    bool bubble = kind == Saturation::bubble_p || kind == Saturation::bubble_t;
+    bool p_kind = kind == Saturation::bubble_p || kind == Saturation::dew_p;
+    double *lnphi_l = ws.lnphi[0].data();
+
+    if (!guess && !p_kind && !(T > 0))
+    {
+        T = 0;
+        for (size_t i = 0; i < n; i++) T += 0.7 * z[i] * this->Tc[i];
+    }
+    std::shared_ptr<const Model::State> st = this->model.get_cached_state(T);
+    if (!guess)
+    {
+        // ideal vapor: f_i = x_i phi_i^L P does not depend much on P
+        if (!(P > 0)) P = P_ref;
+        std::copy(z, z + n, w);
+        for (int it = 0; it < (bubble ? 1 : 3); it++)
+        {
+            get_lnphi(bubble ? z : w, T, P, Phase::liquid, *st, ws, lnphi_l);
+            double s = 0;
+            for (size_t i = 0; i < n; i++)
+            {
+                w[i] = bubble ? z[i] * std::exp(lnphi_l[i]) : z[i] / std::exp(lnphi_l[i]);
+                s += w[i];
+            }
+            for (size_t i = 0; i < n; i++) w[i] /= s;
+            if (p_kind) P = bubble ? P * s : P / s;
+        }
+    }
+
+    // Newton on g_i = ln w_i + ln phi_i(w) - ln z_i - ln phi_i(z), g_n = sum w - 1
+    // with unknowns w and v = ln P or 1/T
+    const size_t m = n + 1;
+    Phase phase_z = bubble ? Phase::liquid : Phase::vapor;
+    Phase phase_w = bubble ? Phase::vapor : Phase::liquid;
+    double *lnphi_z = ws.lnphi[0].data(), *lnphi_w = ws.lnphi[1].data();
+    double *d_z = ws.dlnphi[0].data(), *d_w = ws.dlnphi[1].data();
+    double *dlnphi_dw = ws.dlnphi_dx.data();
+    double *J = ws.jac.data(), *g = ws.g.data();
+
+    SaturationPoint res = {T, P, 0, false};
+    for (int it = 1; it <= max_iter; it++)
+    {
+        res.n_iter = it;
+        if (!p_kind && st->T != T) st = this->model.get_cached_state(T);
+        get_lnphi_derivatives(z, T, P, phase_z, *st, ws, lnphi_z, p_kind ? nullptr : d_z, p_kind ? d_z : nullptr);
+        get_lnphi_derivatives(w, T, P, phase_w, *st, ws, lnphi_w, p_kind ? nullptr : d_w, p_kind ? d_w : nullptr,
+                              dlnphi_dw);
+
+        // d / d ln P = P d / dP, d / d(1/T) = -T^2 d / dT
+        double dv = p_kind ? P : -T * T;
+        double max_g = 0, max_lnK = 0;
+        std::fill(J, J + m * m, 0.0);
+        for (size_t i = 0; i < n; i++)
+        {
+            double *J_i = J + i * m;
+            if (z[i] > 0)
+            {
+                g[i] = std::log(w[i]) + lnphi_w[i] - std::log(z[i]) - lnphi_z[i];
+                for (size_t j = 0; j < n; j++) J_i[j] = dlnphi_dw[i * n + j];
+                J_i[i] += 1 / w[i];
+                J_i[n] = dv * (d_w[i] - d_z[i]);
+                max_lnK = std::max(max_lnK, std::fabs(lnphi_w[i] - lnphi_z[i]));
+            }
+            else
+            {
+                g[i] = w[i];
+                J_i[i] = 1;
+            }
+            J[n * m + i] = 1;
+            max_g = std::max(max_g, std::fabs(g[i]));
+        }
+        g[n] = -1;
+        for (size_t i = 0; i < n; i++) g[n] += w[i];
+        max_g = std::max(max_g, std::fabs(g[n]));
+        if (!std::isfinite(max_g)) break;
+        if (max_g < tol)
+        {
+            // identical phases are the trivial solution
+            res.converged = max_lnK > 1e-6;
+            break;
+        }
+
+        for (size_t i = 0; i < m; i++) g[i] = -g[i];
+        if (!solve_linear(m, J, g) || !std::isfinite(g[n])) break;
+
+        // at most a factor e in P or 10 % in 1/T, compositions stay positive
+        double u = 1 / T;
+        double limit = p_kind ? 1.0 : 0.1 * u;
+        double step = std::min(1.0, limit / std::fabs(g[n]));
+        for (size_t i = 0; i < n; i++)
+        {
+            if (g[i] < 0 && z[i] > 0) step = std::min(step, 0.9 * w[i] / -g[i]);
+        }
+        for (size_t i = 0; i < n; i++) w[i] += step * g[i];
+        if (p_kind)
+        {
+            P *= std::exp(step * g[n]);
+        }
+        else
+        {
+            T = 1 / (u + step * g[n]);
+        }
+    }
+    res.T = T;
+    res.P = P;
+    return res;
+}
+
+void PSRK::saturation_curve(Saturation kind, const double *z, const double *spec, size_t n_points,
+                            size_t spec_stride, double guess, bool warm_start, double tol, int max_iter,
+                            double *T, double *P, double *w, int *n_iter, uint8_t *converged, double *time) const
+{
+    const size_t n = this->n_comps;
+    bool p_kind = kind == Saturation::bubble_p || kind == Saturation::dew_p;
+    Workspace ws = make_workspace();
+    // unknown of the continuation, ln P or 1/T
+    auto unknown = [&](size_t p) { return p_kind ? std::log(P[p]) : 1 / T[p]; };
+    size_t n_prev = 0;
+    for (size_t p = 0; p < n_points; ++p)
+    {
+        auto start = std::chrono::steady_clock::now();
+        double T_p = p_kind ? spec[p * spec_stride] : guess;
+        double P_p = p_kind ? guess : spec[p * spec_stride];
+        double *w_p = w + p * n;
+        bool warm = warm_start && n_prev > 0;
+        if (warm)
+        {
+            // ln K and the unknown of the previous point, extrapolated linearly along the curve
+            // from the two previous points when they are converged
+            const double *z_p = z + p * n, *z_1 = z_p - n, *w_1 = w_p - n;
+            double t = 0;
+            if (n_prev > 1)
+            {
+                const double *z_2 = z_1 - n, *w_2 = w_1 - n;
+                double s_p = spec[p * spec_stride], s_1 = spec[(p - 1) * spec_stride], s_2 = spec[(p - 2) * spec_stride];
+                // projection of the step to p on the previous step, in compositions and relative specification
+                double dot = (s_p - s_1) * (s_1 - s_2) / (s_1 * s_1), norm = (s_1 - s_2) * (s_1 - s_2) / (s_1 * s_1);
+                for (size_t i = 0; i < n; i++)
+                {
+                    dot += (z_p[i] - z_1[i]) * (z_1[i] - z_2[i]);
+                    norm += (z_1[i] - z_2[i]) * (z_1[i] - z_2[i]);
+                }
+                bool defined = norm > 0;
+                for (size_t i = 0; i < n; i++) defined = defined && (z_2[i] > 0) == (z_1[i] > 0);
+                t = defined ? std::min(dot / norm, 2.0) : 0;
+                if (t != 0)
+                {
+                    double v = unknown(p - 1) + t * (unknown(p - 1) - unknown(p - 2));
+                    (p_kind ? P_p : T_p) = p_kind ? std::exp(v) : 1 / v;
+                }
+                double s = 0;
+                for (size_t i = 0; i < n; i++)
+                {
+                    double lnK_1 = z_1[i] > 0 ? std::log(w_1[i] / z_1[i]) : 0;
+                    double lnK_2 = z_2[i] > 0 ? std::log(w_2[i] / z_2[i]) : 0;
+                    w_p[i] = z_1[i] > 0 ? z_p[i] * std::exp(lnK_1 + t * (lnK_1 - lnK_2)) : 0;
+                    s += w_p[i];
+                }
+                for (size_t i = 0; i < n; i++) w_p[i] /= s;
+            }
+            if (t == 0)
+            {
+                // previous T or P and K-values
+                (p_kind ? P_p : T_p) = p_kind ? P[p - 1] : T[p - 1];
+                double s = 0;
+                for (size_t i = 0; i < n; i++)
+                {
+                    w_p[i] = z_1[i] > 0 ? z_p[i] * w_1[i] / z_1[i] : 0;
+                    s += w_p[i];
+                }
+                for (size_t i = 0; i < n; i++) w_p[i] /= s;
+            }
+        }
+        SaturationPoint res = solve_saturation(kind, z + p * n, T_p, P_p, w_p, warm, tol, max_iter, ws);
+        T[p] = res.T;
+        P[p] = res.P;
+        n_iter[p] = res.n_iter;
+        converged[p] = res.converged;
+        if (!res.converged && warm)
+        {
+            // the previous points may be too far, retry from the ideal vapor estimate
+            res = solve_saturation(kind, z + p * n, p_kind ? spec[p * spec_stride] : guess,
+                                   p_kind ? guess : spec[p * spec_stride], w_p, false, tol, max_iter, ws);
+            T[p] = res.T;
+            P[p] = res.P;
+            n_iter[p] += res.n_iter;
+            converged[p] = res.converged;
+        }
+        n_prev = res.converged ? n_prev + 1 : 0;
+        time[p] = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+    }
+}
+
+void PSRK::saturation_curves(Saturation kind, const double *z, const double *spec, size_t n_curves, size_t n_points,
+                             size_t spec_curve_stride, size_t spec_point_stride, double guess, bool warm_start,
+                             double tol, int max_iter, double *T, double *P, double *w, int *n_iter,
+                             uint8_t *converged, double *time, int n_threads) const
+{
+    const size_t n = this->n_comps;
+    // curves never share continuation, results do not depend on n_threads
+    parallel_for(n_curves, n_threads, [&](size_t begin, size_t end)
+    {
+        for (size_t c = begin; c < end; ++c)
+        {
+            size_t k = c * n_points;
+            saturation_curve(kind, z + k * n, spec + c * spec_curve_stride, n_points, spec_point_stride,
+                             guess, warm_start, tol, max_iter, T + k, P + k, w + k * n, n_iter + k,
+                             converged + k, time + k);
+        }
+    });
+}
+
+Phase parse_phase(const std::string &phase)
+{
+    if (phase == "liquid" || phase == "l") return Phase::liquid;
+    if (phase == "vapor" || phase == "v") return Phase::vapor;
+    throw std::invalid_argument("phase must be 'liquid' or 'vapor', got '" + phase + "'");
+}
@@ -0,0 +1,142 @@
+#pragma once
+
+#include <cstdint>
+#include <string>
+#include <vector>
+
+#include <pytherm/activity/unifac.h>
+
+using std::vector;
+
+const double R_GAS = 8.31446261815324; // J/(mol K)
+const double PSRK_A1 = -0.64663;       // MHV1 constant of PSRK
+
+enum class Phase
+{
+    liquid, // smallest root with Z > B
+    vapor,  // largest root
+};
+
+enum class Saturation
+{
+    bubble_p, // liquid composition and T given
+    dew_p,    // vapor composition and T given
+    bubble_t, // liquid composition and P given
+    dew_t,    // vapor composition and P given
+};
+
+// Solution of one saturation point
+struct SaturationPoint
+{
+    double T;
+    double P;
+    int n_iter;
+    bool converged;
+};
+
+// Predictive Soave-Redlich-Kwong equation of state:
+// SRK with Mathias-Copeman alpha functions and the MHV1 mixing rule with g^E from UNIFAC.
+// Compositions are molar fractions, the model must be a molar fraction UNIFAC in double precision
+class PSRK
+{
+public:
+    typedef BasicUNIFAC<double> Model;
+
+    // Scratch buffers for one evaluation, every thread needs its own workspace
+    struct Workspace
+    {
+        Model::Workspace model;
+        vector<double> alpha;     // [n_comps] Mathias-Copeman alpha
+        vector<double> alpha_ii;  // [n_comps] a_i / (b_i R T)
+        vector<double> lny;       // [n_comps]
+        vector<double> alpha_bar; // [n_comps] d(n alpha_mix) / dn_i
+        vector<double> dalpha_dT;     // [n_comps]
+        vector<double> dalpha_bar_dT; // [n_comps]
+        vector<double> dlny_dx;       // [n_comps, n_comps]
+        vector<double> dlny_dT;       // [n_comps]
+        vector<double> lnphi[2];      // [n_comps] liquid and vapor, used by the saturation solver
+        vector<double> dlnphi[2];     // [n_comps] d ln phi / dT or d ln phi / dP of the liquid and vapor
+        vector<double> dlnphi_dx;     // [n_comps, n_comps] of the incipient phase
+        vector<double> jac;           // [n_comps + 1, n_comps + 1] Newton matrix of the saturation solver
+        vector<double> g;             // [n_comps + 1] residuals and Newton step
+    };
+
+    // b, alpha_mix = a / (b R T) and the reduced SRK parameters at one point
+    struct Mixture
+    {
+        double b;
+        double alpha_mix;
+        double A; // a P / (R T)^2
+        double B; // b P / (R T)
+        double dalpha_mix_dT;
+    };
+
+private:
+    Model &model;
+    size_t n_comps;
+    vector<double> Tc;
+    vector<double> Pc;
+    vector<double> c1;
+    vector<double> c2;
+    vector<double> c3;
+    vector<double> b_i; // 0.08664 R Tc / Pc
+    vector<double> a_c; // 0.42748 R^2 Tc^2 / Pc
+
+    // calls f(p, state, workspace) for every point, states come from the model temperature cache
+    template <typename F>
+    void for_each_point(size_t n_points, const double *T, size_t T_stride, int n_threads, F f);
+
+public:
+    PSRK(Model &model, const vector<double> &Tc, const vector<double> &Pc, const vector<vector<double>> &mc);
+    size_t get_n_comps() const;
+    Workspace make_workspace() const;
+    const vector<double> &get_b_i() const;
+
+    // Mathias-Copeman alpha of every component and, if dalpha_dT is not null, its temperature derivative
+    void get_alpha(double T, double *alpha, double *dalpha_dT = nullptr) const;
+    // MHV1 mixing, fills ws.lny and, if partial, ws.alpha_bar.
+    // With jacobian also fills ws.dlny_dx, ws.dlny_dT, ws.dalpha_bar_dT and mix.dalpha_mix_dT
+    Mixture get_mixture(const double *x, double T, double P, const Model::State &st, Workspace &ws,
+                        bool partial, bool jacobian = false) const;
+    // compressibility factor of the phase
+    double get_Z(const Mixture &mix, Phase phase) const;
+    // writes ln phi [n_comps], returns Z
+    double get_lnphi(const double *x, double T, double P, Phase phase, const Model::State &st, Workspace &ws,
+                     double *lnphi) const;
+    // writes ln phi and its derivatives, returns Z. d ln phi_i / dx_j [n_comps, n_comps] is taken with
+    // other x fixed at sum x = 1. Derivative pointers may be null
+    double get_lnphi_derivatives(const double *x, double T, double P, Phase phase, const Model::State &st,
+                                 Workspace &ws, double *lnphi, double *dlnphi_dT, double *dlnphi_dP,
+                                 double *dlnphi_dx = nullptr) const;
+    double get_p(const double *x, double T, double V, const Model::State &st, Workspace &ws) const;
+
+    // Saturation point of the feed z (liquid for bubble points, vapor for dew points).
+    // Newton iterations on the incipient phase w and ln P or 1/T with analytic derivatives of ln phi.
+    // T and P hold the specification and the initial value of the unknown,
+    // without guess the unknown and w are estimated with an ideal vapor
+    SaturationPoint solve_saturation(Saturation kind, const double *z, double T, double P, double *w, bool guess,
+                                     double tol, int max_iter, Workspace &ws) const;
+    // saturation points along z [n_points, n_comps] with the specification (T or P) of stride 0 or 1,
+    // if warm_start every point starts from the linear extrapolation of the two previous converged points
+    // of the curve in ln K and ln P or 1/T, or from the previous one after the first point.
+    // guess is the initial value of the unknown for the first point or NaN
+    void saturation_curve(Saturation kind, const double *z, const double *spec, size_t n_points, size_t spec_stride,
+                          double guess, bool warm_start, double tol, int max_iter,
+                          double *T, double *P, double *w, int *n_iter, uint8_t *converged, double *time) const;
+    // independent curves z [n_curves, n_points, n_comps] solved in parallel, one thread per curve at a time.
+    // Specification of curve c and point p is spec[c * spec_curve_stride + p * spec_point_stride]
+    void saturation_curves(Saturation kind, const double *z, const double *spec, size_t n_curves, size_t n_points,
+                           size_t spec_curve_stride, size_t spec_point_stride, double guess, bool warm_start,
+                           double tol, int max_iter, double *T, double *P, double *w, int *n_iter,
+                           uint8_t *converged, double *time, int n_threads = 1) const;
+
+    // batches of points, x [n_points, n_comps], T and P with stride 0 (one value) or 1 (per point)
+    void get_Z_batch(const double *x, const double *T, const double *P, size_t n_points,
+                     size_t T_stride, size_t P_stride, Phase phase, double *Z, int n_threads = 1);
+    void get_lnphi_batch(const double *x, const double *T, const double *P, size_t n_points,
+                         size_t T_stride, size_t P_stride, Phase phase, double *lnphi, double *Z, int n_threads = 1);
+    void get_p_batch(const double *x, const double *T, const double *V, size_t n_points,
+                     size_t T_stride, size_t V_stride, double *P, int n_threads = 1);
+};
+
+Phase parse_phase(const std::string &phase);
@@ -0,0 +1,39 @@
+#pragma once
+
+#include <cmath>
+#include <cstddef>
+#include <utility>
+
+// Solves a x = b in place for a dense row-major a [n, n] by Gaussian elimination with partial pivoting,
+// b is replaced by x and a is destroyed. Returns false for a singular matrix
+inline bool solve_linear(size_t n, double *a, double *b)
+{
+    for (size_t k = 0; k < n; ++k)
+    {
+        size_t p = k;
+        for (size_t i = k + 1; i < n; ++i)
+        {
+            if (std::fabs(a[i * n + k]) > std::fabs(a[p * n + k])) p = i;
+        }
+        if (a[p * n + k] == 0) return false;
+        if (p != k)
+        {
+            for (size_t j = k; j < n; ++j) std::swap(a[k * n + j], a[p * n + j]);
+            std::swap(b[k], b[p]);
+        }
+        for (size_t i = k + 1; i < n; ++i)
+        {
+            double f = a[i * n + k] / a[k * n + k];
+            if (f == 0) continue;
+            for (size_t j = k; j < n; ++j) a[i * n + j] -= f * a[k * n + j];
+            b[i] -= f * b[k];
+        }
+    }
+    for (size_t k = n; k-- > 0;)
+    {
+        double s = b[k];
+        for (size_t j = k + 1; j < n; ++j) s -= a[k * n + j] * b[j];
+        b[k] = s / a[k * n + k];
+    }
+    return true;
+}
@@ -0,0 +1,71 @@
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+#include <new>
+#include <vector>
+
+const size_t SIMD_ALIGN = 64;
+
+// std::allocator replacement that returns SIMD_ALIGN aligned blocks
+template <typename T>
+struct AlignedAllocator
+{
+    typedef T value_type;
+
+    AlignedAllocator() {}
+    template <typename U>
+    AlignedAllocator(const AlignedAllocator<U> &) {}
+
+    T *allocate(size_t n)
+    {
+        // keep the pointer returned by operator new right before the aligned block
+        void *raw = ::operator new(n * sizeof(T) + SIMD_ALIGN + sizeof(void *));
+        uintptr_t start = reinterpret_cast<uintptr_t>(raw) + sizeof(void *);
+        uintptr_t aligned = (start + SIMD_ALIGN - 1) & ~(uintptr_t)(SIMD_ALIGN - 1);
+        reinterpret_cast<void **>(aligned)[-1] = raw;
+        return reinterpret_cast<T *>(aligned);
+    }
+
+    void deallocate(T *p, size_t)
+    {
+        ::operator delete(reinterpret_cast<void **>(p)[-1]);
+    }
+
+    template <typename U>
+    bool operator==(const AlignedAllocator<U> &) const { return true; }
+    template <typename U>
+    bool operator!=(const AlignedAllocator<U> &) const { return false; }
+};
+
+template <typename T>
+using avector = std::vector<T, AlignedAllocator<T>>;
+
+// Row-major matrix in one contiguous buffer.
+// Rows are padded to ld elements so that every row starts on a SIMD_ALIGN boundary
+template <typename T>
+class Matrix
+{
+public:
+    size_t rows = 0;
+    size_t cols = 0;
+    size_t ld = 0;
+    avector<T> data;
+
+    Matrix() {}
+    Matrix(size_t rows, size_t cols, T value = 0) { assign(rows, cols, value); }
+
+    void assign(size_t rows, size_t cols, T value = 0)
+    {
+        const size_t block = SIMD_ALIGN / sizeof(T);
+        this->rows = rows;
+        this->cols = cols;
+        this->ld = (cols + block - 1) / block * block;
+        this->data.assign(rows * this->ld, value);
+    }
+
+    T *row(size_t i) { return this->data.data() + i * this->ld; }
+    const T *row(size_t i) const { return this->data.data() + i * this->ld; }
+    T &operator()(size_t i, size_t j) { return this->data[i * this->ld + j]; }
+    const T &operator()(size_t i, size_t j) const { return this->data[i * this->ld + j]; }
+};
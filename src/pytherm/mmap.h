@@ -0,0 +1,93 @@
+#pragma once
+
+#include <cstddef>
+#include <stdexcept>
+#include <string>
+
+#ifdef _WIN32
+#ifndef NOMINMAX
+#define NOMINMAX
+#endif
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+// Read-only memory mapping of a whole file.
+// Pages are backed by the page cache, so every process mapping the same file shares one physical copy
+class MappedFile
+{
+private:
+    const char *ptr = nullptr;
+    size_t len = 0;
+#ifdef _WIN32
+    HANDLE file = INVALID_HANDLE_VALUE;
+    HANDLE mapping = NULL;
+#endif
+
+public:
+    explicit MappedFile(const std::string &path)
+    {
+#ifdef _WIN32
+        this->file = CreateFileA(path.c_str(), GENERIC_READ, FILE_SHARE_READ, NULL,
+                                 OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, NULL);
+        if (this->file == INVALID_HANDLE_VALUE)
+        {
+            throw std::runtime_error("cannot open file: " + path);
+        }
+        LARGE_INTEGER size;
+        GetFileSizeEx(this->file, &size);
+        this->len = (size_t)size.QuadPart;
+        if (this->len > 0)
+        {
+            this->mapping = CreateFileMappingA(this->file, NULL, PAGE_READONLY, 0, 0, NULL);
+            if (this->mapping == NULL)
+            {
+                CloseHandle(this->file);
+                throw std::runtime_error("cannot map file: " + path);
+            }
+            this->ptr = (const char *)MapViewOfFile(this->mapping, FILE_MAP_READ, 0, 0, 0);
+        }
+#else
+        int fd = open(path.c_str(), O_RDONLY);
+        if (fd < 0)
+        {
+            throw std::runtime_error("cannot open file: " + path);
+        }
+        struct stat st;
+        fstat(fd, &st);
+        this->len = (size_t)st.st_size;
+        if (this->len > 0)
+        {
+            void *p = mmap(NULL, this->len, PROT_READ, MAP_SHARED, fd, 0);
+            if (p == MAP_FAILED)
+            {
+                close(fd);
+                throw std::runtime_error("cannot map file: " + path);
+            }
+            this->ptr = (const char *)p;
+        }
+        close(fd);
+#endif
+    }
+
+    ~MappedFile()
+    {
+#ifdef _WIN32
+        if (this->ptr) UnmapViewOfFile(this->ptr);
+        if (this->mapping) CloseHandle(this->mapping);
+        if (this->file != INVALID_HANDLE_VALUE) CloseHandle(this->file);
+#else
+        if (this->ptr) munmap((void *)this->ptr, this->len);
+#endif
+    }
+
+    MappedFile(const MappedFile &) = delete;
+    MappedFile &operator=(const MappedFile &) = delete;
+
+    const char *data() const { return this->ptr; }
+    size_t size() const { return this->len; }
+};
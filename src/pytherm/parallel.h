@@ -0,0 +1,76 @@
+#pragma once
+
+#include <algorithm>
+#include <exception>
+#include <thread>
+#include <vector>
+
+// Split [0, n) into contiguous chunks and call f(begin, end) for each chunk in its own thread.
+// n_threads <= 0 means one thread per hardware core.
+// All threads are joined before returning, the first exception of a chunk is rethrown on the calling thread
+template <typename F>
+void parallel_for(size_t n, int n_threads, F f)
+{
+    if (n_threads <= 0)
+    {
+        n_threads = std::thread::hardware_concurrency();
+    }
+    size_t n_chunks = std::min<size_t>(std::max(n_threads, 1), n);
+    if (n_chunks <= 1)
+    {
+        f((size_t)0, n);
+        return;
+    }
+
+    std::vector<std::exception_ptr> errors(n_chunks);
+    // every thread calls its own copy of f, as with std::thread(f, begin, end)
+    auto run = [&errors](F g, size_t i, size_t begin, size_t end) {
+        try
+        {
+            g(begin, end);
+        }
+        catch (...)
+        {
+            errors[i] = std::current_exception();
+        }
+    };
+
+    std::vector<std::thread> workers;
+    workers.reserve(n_chunks - 1);
+    size_t chunk = n / n_chunks;
+    size_t rest = n % n_chunks;
+    size_t begin = 0;
+    for (size_t i = 0; i < n_chunks; ++i)
+    {
+        size_t end = begin + chunk + (i < rest ? 1 : 0);
+        if (i == n_chunks - 1)
+        {
+            run(f, i, begin, end);
+        }
+        else
+        {
+            try
+            {
+                workers.emplace_back(run, f, i, begin, end);
+            }
+            catch (...)
+            {
+                // the thread could not be started, the remaining chunks are skipped
+                errors[i] = std::current_exception();
+                break;
+            }
+        }
+        begin = end;
+    }
+    for (auto &w : workers)
+    {
+        w.join();
+    }
+    for (const auto &e : errors)
+    {
+        if (e)
+        {
+            std::rethrow_exception(e);
+        }
+    }
+}
@@ -0,0 +1,42 @@
+from pytherm.activity import unifac as uf
+from datetime import datetime
+import numpy as np
+
+n = 1_000_000
+
+params = uf.datasets.DOR()
+subs = {
+    "hexane": "2*CH3 4*CH2",
+    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+}
+s = uf.SubstancesUNIFAC()
+s.get_from_dict(subs)
+am = uf.UNIFAC(params, s)
+
+x = np.linspace(0.001, 0.999, n, dtype=np.float32)
+conc = np.ascontiguousarray(np.stack((x, 1 - x), axis=1))
+
+start_time = datetime.now()
+for c in conc[:n // 10]:
+    am.get_y(c, 298)
+print("get_y loop, 1/10 of points", datetime.now() - start_time)
+
+y = np.empty(2, dtype=np.float32)
+start_time = datetime.now()
+for c in conc[:n // 10]:
+    am.get_y(c, 298, out=y)
+print("get_y loop with out, 1/10 of points", datetime.now() - start_time)
+
+start_time = datetime.now()
+am.get_y_batch(conc, 298)
+print("get_y_batch", datetime.now() - start_time)
+
+T = np.linspace(280, 350, n, dtype=np.float32)
+start_time = datetime.now()
+am.get_y_batch(conc, T)
+print("get_y_batch, T array", datetime.now() - start_time)
+
+for n_threads in (1, 2, 4, 8, 0):
+    start_time = datetime.now()
+    am.get_y_batch(conc, T, n_threads=n_threads)
+    print(f"get_y_batch, T array, n_threads={n_threads}", datetime.now() - start_time)
@@ -0,0 +1,46 @@
+"""UNIFAC datasets: text .dat parser vs memory mapped binary .ufb
+
+Every load runs in a fresh process, RSS is read from /proc (Linux)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from pytherm.activity import unifac as uf
+
+n_runs = 5
+data_dir = os.path.join(os.path.dirname(uf.__file__), "..", "parameters", "unifac", "data")
+tmp_dir = tempfile.mkdtemp()
+
+child = r"""
+import sys
+from datetime import datetime
+from pytherm.activity import unifac as uf
+
+def rss():
+    try:
+        with open("/proc/self/status") as f:
+            s = dict(line.split(":", 1) for line in f)
+        return {k: int(s[k].split()[0]) for k in ("RssAnon", "RssFile")}
+    except OSError:
+        return {}
+
+before = rss()
+start_time = datetime.now()
+params = uf.ParametersUNIFAC(sys.argv[1])
+dt = datetime.now() - start_time
+after = rss()
+print(dt.total_seconds(), *[after[k] - before[k] for k in after])
+"""
+
+for name in ("dor", "nist2015", "psrk"):
+    dat = os.path.join(data_dir, name + ".dat")
+    ufb = os.path.join(tmp_dir, name + ".ufb")
+    uf.ParametersUNIFAC(dat).save_binary(ufb)
+    for path in (dat, ufb):
+        res = [subprocess.run([sys.executable, "-c", child, path], capture_output=True, text=True).stdout.split()
+               for _ in range(n_runs)]
+        t = min(float(r[0]) for r in res)
+        mem = f", RssAnon +{res[-1][1]} kB, RssFile +{res[-1][2]} kB" if len(res[-1]) == 3 else ""
+        print(f"{os.path.basename(path)}: {os.path.getsize(path) // 1024} kB, load {t * 1e3:.3f} ms{mem}")
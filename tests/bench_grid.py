@@ -0,0 +1,29 @@
+"""Ternary composition grid: Python loop over get_y vs chunked pytherm.grid.evaluate"""
+from datetime import datetime
+import numpy as np
+
+from pytherm import grid
+from pytherm.activity import unifac as uf
+
+n_div = 1413  # 1 000 405 points
+
+subs = {
+    "hexane": "2*CH3 4*CH2",
+    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    "water": "1*H2O",
+}
+s = uf.SubstancesUNIFAC()
+s.get_from_dict(subs)
+am = uf.UNIFAC64(uf.datasets.DOR(), s)
+
+x = grid.simplex_grid(3, n_div)
+start_time = datetime.now()
+for c in x[:len(x) // 100]:
+    y = am.get_y(list(c), 298)
+    ge_rt = np.sum(c * np.log(y))
+print("get_y loop, 1/100 of points", datetime.now() - start_time)
+
+for n_threads in (1, 0):
+    start_time = datetime.now()
+    x, y, a, ge_rt = grid.evaluate(am, 3, n_div, T=298, n_threads=n_threads)
+    print(f"grid.evaluate, {len(x)} points, n_threads={n_threads}", datetime.now() - start_time)
@@ -0,0 +1,36 @@
+"""Harvie J(x), J'(x): shared vectorised evaluator vs the per-call Chebyshev recurrence"""
+from datetime import datetime
+import numpy as np
+
+from pytherm.activity.electrolytes import AK_I, AK_II, get_harvie_j
+
+
+def get_harvie_j_scalar(x):
+    # previous Pitzer.get_harvie_j, one x per call
+    ak = np.where(np.full_like(AK_I, x) < 1, AK_I, AK_II)
+    z = np.where(x < 1, 4 * x ** 0.2 - 2, 40 / 9 * x ** -0.1 - 22 / 9)
+    dz_dx = np.where(x < 1, 4 * x ** -0.8 / 5, -4 * x ** -1.1 / 9)
+    b2, b1, b0 = 0.0, 0.0, 0.0
+    d2, d1, d0 = 0.0, 0.0, 0.0
+    for a in ak:
+        b2, b1 = b1, b0
+        d2, d1 = d1, d0
+        b0 = z * b1 - b2 + a
+        d0 = b1 + z * d1 - d2
+    return 0.25 * x - 1 + 0.5 * (b0 - b2), 0.25 + 0.5 * dz_dx * (d0 - d2)
+
+
+n = 1_000_000
+x = np.geomspace(1e-6, 1e3, n)
+
+start_time = datetime.now()
+ref = np.array([get_harvie_j_scalar(xi) for xi in x[::100]])
+print("scalar loop, every 100th point", datetime.now() - start_time)
+
+start_time = datetime.now()
+J, Jp = get_harvie_j(x)
+print("vectorised", datetime.now() - start_time)
+
+# every 100th point covers both coefficient ranges, x < 1 and x >= 1
+print("max |J - J_ref|", np.max(np.abs(J[::100] - ref[:, 0])))
+print("max |J' - J'_ref|", np.max(np.abs(Jp[::100] - ref[:, 1])))
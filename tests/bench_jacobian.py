@@ -0,0 +1,50 @@
+"""Analytical d ln_y / dx and d ln_y / dT against central finite differences over get_y"""
+from datetime import datetime
+import numpy as np
+
+from pytherm.activity import unifac as uf
+
+n = 10_000
+h = 1e-6
+
+subs = {
+    "hexane": "2*CH3 4*CH2",
+    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    "water": "1*H2O",
+    "acetone": "1*CH3 1*CH3CO",
+}
+params = uf.datasets.DOR()
+s = uf.SubstancesUNIFAC()
+s.get_from_dict(subs)
+am = uf.UNIFAC64(params, s)
+
+x = np.array([0.3, 0.25, 0.15, 0.3])
+T = 320.0
+
+
+def lny(x, T):
+    return np.log(am.get_y(list(x), T))
+
+
+def jacobian_fd(x, T):
+    J = np.empty((len(x), len(x)))
+    for j in range(len(x)):
+        dx = np.zeros(len(x))
+        dx[j] = h
+        J[:, j] = (lny(x + dx, T) - lny(x - dx, T)) / (2 * h)
+    dT = (lny(x, T + 1e-3) - lny(x, T - 1e-3)) / 2e-3
+    return lny(x, T), J, dT
+
+
+start_time = datetime.now()
+for i in range(n):
+    lny_a, J_a, dT_a = am.get_lny_and_jacobian(x, T)
+print("get_lny_and_jacobian", datetime.now() - start_time)
+
+start_time = datetime.now()
+for i in range(n):
+    lny_fd, J_fd, dT_fd = jacobian_fd(x, T)
+print("finite differences", datetime.now() - start_time)
+
+print("max relative difference d ln_y / dx", np.max(np.abs(J_a - J_fd)) / np.max(np.abs(J_fd)))
+print("max relative difference d ln_y / dT", np.max(np.abs(dT_a - dT_fd)) / np.max(np.abs(dT_fd)))
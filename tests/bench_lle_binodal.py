@@ -0,0 +1,45 @@
+"""Ternary binodals traced from one seed per system, serially and in worker processes"""
+from datetime import datetime
+import numpy as np
+
+from pytherm import lle
+from pytherm.activity import unifac as uf
+
+groups = {
+    "hexane": "2*CH3 4*CH2",
+    "heptane": "2*CH3 5*CH2",
+    "benzene": "6*ACH",
+    "toluene": "5*ACH 1*ACCH3",
+    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    "methanol": "1*CH3OH",
+    "acetone": "1*CH3 1*CH3CO",
+    "water": "1*H2O",
+}
+
+
+def get_model(system):
+    s = uf.SubstancesUNIFAC()
+    s.get_from_dict({name: groups[name] for name in system})
+    return uf.UNIFAC64(uf.datasets.DOR(), s)
+
+
+systems = [
+    (hydrocarbon, solute, "water")
+    for hydrocarbon in ("hexane", "heptane", "benzene", "toluene")
+    for solute in ("ethanol", "methanol", "acetone")
+]
+seeds = [(system, np.array([0.45, 0.1, 0.45])) for system in systems]
+
+if __name__ == "__main__":
+    start_time = datetime.now()
+    res = lle.trace_binodal(get_model(systems[0]), seeds[0][1])
+    print(systems[0], "trace_binodal", datetime.now() - start_time, "tie lines", len(res["beta"]),
+          "n_eval", res["n_eval"], "plait point", res["plait_point"])
+
+    for processes in (False, True):
+        start_time = datetime.now()
+        results = lle.trace_binodals(get_model, seeds, processes=processes)
+        print(len(systems), "systems, processes" if processes else "systems, threads",
+              datetime.now() - start_time)
+    for system, res in zip(systems, results):
+        print(system, "tie lines", len(res["beta"]), "n_eval", res["n_eval"], "plait point", res["plait_point"])
@@ -0,0 +1,45 @@
+"""Ternary tie lines: bisection of extents in find_lle against the Newton flash_lle"""
+from datetime import datetime
+import numpy as np
+
+from pytherm import lle
+from pytherm.activity import unifac as uf
+
+names = ["hexane", "ethanol", "water"]
+s = uf.SubstancesUNIFAC()
+s.get_from_dict({"hexane": "2*CH3 4*CH2", "ethanol": "1*CH3 1*CH2 1*OH(P)", "water": "1*H2O"})
+am = uf.UNIFAC64(uf.datasets.DOR(), s)
+T = 298.0
+
+
+class ActivityAdapter:
+    n_eval = 0
+
+    def get_y(self, system, T):
+        self.n_eval += 1
+        return dict(zip(names, am.get_y([system[i] for i in names], T)))
+
+
+feeds = np.array([[0.45, 0.1, 0.45], [0.3, 0.2, 0.5], [0.6, 0.05, 0.35]])
+
+for z in feeds:
+    start_time = datetime.now()
+    res = lle.flash_lle(am, z, T)
+    t_flash = datetime.now() - start_time
+    print("z", z, "flash_lle", t_flash, "n_eval", res["n_eval"], "n_iter", res["n_iter"], "error", res["error"])
+
+    # the same split as the initial phases of find_lle
+    adapter = ActivityAdapter()
+    x1, x2 = 0.9 * res["x1"] + 0.1 * z, 0.9 * res["x2"] + 0.1 * z
+    beta = res["beta"]
+    phase1 = dict(zip(names, (1 - beta) * x1))
+    phase2 = dict(zip(names, beta * x2))
+    start_time = datetime.now()
+    ph1, ph2 = lle.find_lle(phase1, phase2, adapter, T=T, notifier=None)
+    t_find = datetime.now() - start_time
+    print("z", z, "find_lle ", t_find, "n_eval", adapter.n_eval,
+          "max |dx|", np.abs(np.array([ph1[i] for i in names]) - res["x1"]).max() if ph1 else None)
+
+    start_time = datetime.now()
+    res_warm = lle.flash_lle(am, z, T, x1=x1, x2=x2)
+    print("z", z, "warm start", datetime.now() - start_time, "n_eval", res_warm["n_eval"])
@@ -0,0 +1,33 @@
+"""Numba UNIFAC: get_y loop vs parallel get_y_array for a ternary with per-row temperatures"""
+from datetime import datetime
+import numba
+import numpy as np
+
+from pytherm.activity import unifac_numba as uf_numba
+
+n = 100_000
+
+subs = {
+    "hexane": "2*CH3 4*CH2",
+    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    "water": "1*H2O",
+}
+s = uf_numba.datasets.SubstancesUNIFAC()
+s.get_from_dict(subs)
+am = uf_numba.UNIFAC(dataset=uf_numba.datasets.DOR, substances=s)
+
+rng = np.random.default_rng(0)
+conc = rng.dirichlet(np.ones(len(subs)), n)
+T = rng.choice(np.linspace(290, 350, 13), n)
+am.get_y_array(conc[:10], T[:10])
+
+start_time = datetime.now()
+y_ref = np.array([am.get_y(x, T_i) for x, T_i in zip(conc[:n // 10], T[:n // 10])])
+print("get_y loop, 1/10 of rows", datetime.now() - start_time)
+
+for n_threads in sorted({1, numba.config.NUMBA_NUM_THREADS}):
+    numba.set_num_threads(n_threads)
+    start_time = datetime.now()
+    y = am.get_y_array(conc, T)
+    print(f"get_y_array, {n_threads} threads", datetime.now() - start_time)
+    print("max relative difference to the get_y loop", np.max(np.abs(y[:n // 10] / y_ref - 1)))
@@ -0,0 +1,35 @@
+"""Pitzer model: one vectorised pass over a 2-D molality array vs a loop of single solutions"""
+from datetime import datetime
+import numpy as np
+
+from pytherm.activity.pitzer_new import Pitzer
+
+n = 100_000
+
+ph = {
+    "Na_+1": 2.0,
+    "K_+1": 0.5,
+    "Mg_+2": 0.3,
+    "Ca_+2": 0.2,
+    "Cl_-1": 3.5,
+    "SO4_-2": 0.3,
+    "HCO3_-1": 0.1,
+    "CO2": 0.05,
+}
+am = Pitzer(ph)
+
+rng = np.random.default_rng(0)
+m = np.array(list(ph.values())) * rng.uniform(0.1, 1.5, (n, len(ph)))
+
+start_time = datetime.now()
+for row in m[:n // 100]:
+    am.get_lny(row)
+print("get_lny loop, 1/100 of points", datetime.now() - start_time)
+
+start_time = datetime.now()
+lny = am.get_lny(m)
+print("get_lny 2-D", datetime.now() - start_time)
+
+start_time = datetime.now()
+am.get_G_nRT(m)
+print("get_G_nRT 2-D", datetime.now() - start_time)
@@ -0,0 +1,49 @@
+"""Throughput and accuracy of single (float32) and double (float64) precision C++ models"""
+from datetime import datetime
+import numpy as np
+
+from pytherm.activity import unifac as uf
+from pytherm.activity import unifac_numba as uf_numba
+from pytherm.activity import uniquac as uq
+
+n = 1_000_000
+
+subs = {
+    "hexane": "2*CH3 4*CH2",
+    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    "water": "1*H2O",
+}
+params = uf.datasets.DOR()
+s = uf.SubstancesUNIFAC()
+s.get_from_dict(subs)
+
+rng = np.random.default_rng(0)
+conc = rng.dirichlet(np.ones(len(subs)), n)
+
+s_numba = uf_numba.datasets.SubstancesUNIFAC()
+s_numba.get_from_dict(subs)
+am_numba = uf_numba.UNIFAC(dataset=uf_numba.datasets.DOR, substances=s_numba)
+y_ref = np.array([am_numba.get_y(x, 298) for x in conc[:1000]])
+
+for model, dtype in ((uf.UNIFAC, np.float32), (uf.UNIFAC64, np.float64)):
+    am = model(params, s)
+    x = conc.astype(dtype)
+    am.get_y_batch(x[:1], 298)
+    start_time = datetime.now()
+    y = am.get_y_batch(x, 298)
+    print(f"{model.__name__} get_y_batch", datetime.now() - start_time)
+    print(f"{model.__name__} max relative error vs numba", np.max(np.abs(y[:1000] / y_ref - 1)))
+
+rs = [0.92, 2.1055, 3.1878]
+qs = [1.4, 1.972, 2.4]
+inter = [
+    [[0, 0], [0, 526.02], [0, 309.64]],
+    [[0, -318.06], [0, 0], [0, -91.532]],
+    [[0, 1325.1], [0, 302.57], [0, 0]],
+]
+for model, dtype in ((uq.UNIQUAC, np.float32), (uq.UNIQUAC64, np.float64)):
+    am = model(rs, qs, inter)
+    x = conc.astype(dtype)
+    start_time = datetime.now()
+    am.get_y_batch(x, 298)
+    print(f"{model.__name__} get_y_batch", datetime.now() - start_time)
@@ -0,0 +1,68 @@
+"""PSRK: pure Python dict implementation vs native PSRK_UNIFAC batches"""
+from datetime import datetime
+from math import log
+import numpy as np
+
+from pytherm import constants
+from pytherm.activity import unifac as uf
+from pytherm.eos import PSRK, PSRK_UNIFAC
+
+n = 100_000
+
+names = ["ethanol", "water"]
+s = uf.SubstancesUNIFAC()
+s.get_from_dict({"ethanol": "1*CH3 1*CH2 1*OH", "water": "1*H2O"})
+am = uf.UNIFAC64(uf.datasets.PSRK(), s)
+Tc = [513.9, 647.3]
+Pc = [61.48e5, 220.48e5]
+mc = [[1.2277, 0.0965, -0.6736], [1.0783, -0.5832, 0.5462]]
+
+
+class ActivityAdapter:
+    def get_y(self, system, T):
+        return dict(zip(names, am.get_y([system[i] for i in names], T)))
+
+    def get_ge_RT(self, system, T):
+        y = self.get_y(system, T)
+        return sum(system[i] * log(y[i]) for i in names)
+
+    def get_ge(self, system, T):
+        return constants.R * T * self.get_ge_RT(system, T)
+
+
+x = np.random.default_rng(0).uniform(0.01, 0.99, n)
+x = np.stack((x, 1 - x), axis=1)
+T = np.random.default_rng(1).choice(np.linspace(300, 360, 13), n)
+P = 1e5
+
+system = dict(zip(names, x[0]))
+eos_py = PSRK(
+    system,
+    {i: {"Tc": Tc[k], "Pc": Pc[k]} for k, i in enumerate(names)},
+    {i: dict(zip(("c1", "c2", "c3"), mc[k])) for k, i in enumerate(names)},
+    ActivityAdapter(),
+)
+start_time = datetime.now()
+for x_p, T_p in zip(x[:n // 100], T[:n // 100]):
+    system = dict(zip(names, x_p))
+    V = eos_py.get_roots(system, P=P, T=T_p)[0]
+    eos_py.get_f(system, P=P, V=V, T=T_p)
+print("Python PSRK roots + fugacities, 1/100 of points", datetime.now() - start_time)
+
+eos = PSRK_UNIFAC(am, Tc, Pc, mc)
+for n_threads in (1, 0):
+    start_time = datetime.now()
+    lnphi, Z = eos.get_lnphi(x, T, P, "liquid", n_threads=n_threads)
+    print(f"PSRK_UNIFAC.get_lnphi, n_threads={n_threads}", datetime.now() - start_time)
+
+# reference: Python roots and fugacities against the native ln phi on the same points
+m = n // 100
+for phase, root in (("liquid", 0), ("vapor", -1)):
+    lnphi, _ = eos.get_lnphi(x[:m], T[:m], P, phase)
+    lnphi_py = np.empty((m, len(names)))
+    for p, (x_p, T_p) in enumerate(zip(x[:m], T[:m])):
+        system = dict(zip(names, x_p))
+        V = eos_py.get_roots(system, P=P, T=T_p)[root]
+        f = eos_py.get_f(system, P=P, V=V, T=T_p)
+        lnphi_py[p] = np.log([f[i] for i in names])
+    print(f"max |ln phi - ln phi Python|, {phase}", np.abs(np.asarray(lnphi) - lnphi_py).max())
@@ -0,0 +1,44 @@
+"""Python PSRK: state points with array kernels and cached alpha, isotherm sweeps of a_i"""
+from datetime import datetime
+from math import log
+import numpy as np
+
+from pytherm.eos import PSRK
+
+
+class ActivityModelStub:
+    """Constant activity coefficients, so that only the equation of state is timed"""
+
+    def get_y(self, system, T):
+        return {k: 1.0 + 0.01 * i for i, k in enumerate(system)}
+
+    def get_ge_RT(self, system, T):
+        y = self.get_y(system, T)
+        return sum(system[k] * log(y[k]) for k in system)
+
+    def get_ge(self, system, T):
+        return 8.314462618 * T * self.get_ge_RT(system, T)
+
+
+n_points = 2000
+for n_comps in (2, 10, 30):
+    names = [f"c{i}" for i in range(n_comps)]
+    system = {k: 1 / n_comps for k in names}
+    cr_params = {k: {"Tc": 400 + 10 * i, "Pc": 40e5 + 1e5 * i} for i, k in enumerate(names)}
+    ms_params = {k: {"c1": 0.8, "c2": 0.1, "c3": -0.2} for k in names}
+    model = PSRK(system, cr_params, ms_params, ActivityModelStub())
+
+    start_time = datetime.now()
+    for _ in range(n_points):
+        V = model.get_roots(system, P=1e5, T=340.0)[0]
+        model.get_f(system, P=1e5, V=V, T=340.0)
+    print(f"{n_comps} components, get_roots + get_f per point", (datetime.now() - start_time) / n_points)
+
+    T = np.linspace(250, 450, 1000)
+    start_time = datetime.now()
+    ai_loop = [model.get_ai(model.get_alphas(T_i)) for T_i in T]
+    print(f"{n_comps} components, get_ai over {len(T)} temperatures", datetime.now() - start_time)
+    start_time = datetime.now()
+    ai = model.get_ai_array(T)
+    print(f"{n_comps} components, get_ai_array over {len(T)} temperatures", datetime.now() - start_time,
+          "max difference", np.max(np.abs(ai - [list(a.values()) for a in ai_loop]) / ai))
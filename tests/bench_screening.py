@@ -0,0 +1,58 @@
+"""Infinite dilution screening of ~1000 solutes in 286 blends of four solvents:
+the dict lle.get_yinf per value against one batched model over all components"""
+from datetime import datetime
+import io
+import numpy as np
+
+from pytherm import grid, lle, screening
+from pytherm.activity import unifac as uf
+
+groups = {
+    "hexane": "2*CH3 4*CH2",
+    "toluene": "5*ACH 1*ACCH3",
+    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    "water": "1*H2O",
+}
+solvents = list(groups)
+solutes = []
+for n_ch2 in range(25):
+    for ring, ring_groups in (("", ""), ("phenyl", "5*ACH 1*AC "), ("naphthyl", "7*ACH 3*AC ")):
+        for tail, tail_groups in (("", ""), ("ol", " 1*OH(P)"), ("one", " 1*CH3CO"), ("ether", " 1*CH3O")):
+            for n_ch3 in (1, 2):
+                name = f"{ring}C{n_ch2}M{n_ch3}{tail}"
+                g = f"{ring_groups}{n_ch3}*CH3" + (f" {n_ch2}*CH2" if n_ch2 else "") + tail_groups
+                groups[name] = g
+                solutes.append(name)
+
+start_time = datetime.now()
+screen = screening.Screening(uf.datasets.DOR(), groups, solutes, solvents)
+print(len(solutes), "solutes, model of", len(screen.names), "components", datetime.now() - start_time)
+
+blends = grid.simplex_grid(len(solvents), 10)
+T = 298.0
+start_time = datetime.now()
+y_inf = screen.get_yinf(blends, T)
+print("get_yinf", y_inf.shape, datetime.now() - start_time)
+
+start_time = datetime.now()
+k = screen.get_k_molar(blends[-1], blends, T)
+buffer = io.StringIO()
+n_rows = screening.write_csv(buffer, screening.iter_ranked(k, screen.solutes, top=5))
+print("get_k_molar and top 5 blends to CSV,", n_rows, "rows", datetime.now() - start_time)
+
+# one value at a time through the dict interface, on a part of the matrix
+names = screen.names
+
+
+class ActivityAdapter:
+    def get_y(self, system, T):
+        return dict(zip(names, screen.model.get_y([system.get(i, 0.0) for i in names], T)))
+
+
+adapter = ActivityAdapter()
+n_blends = 5
+start_time = datetime.now()
+y_dict = np.array([[lle.get_yinf(adapter, {**dict(zip(solvents, blend)), name: 0.0}, name, T) for name in solutes]
+                   for blend in blends[:n_blends]])
+print("lle.get_yinf,", y_dict.size, "values", datetime.now() - start_time,
+      "max relative difference", np.nanmax(np.abs(y_dict / y_inf[:n_blends] - 1)))
@@ -0,0 +1,47 @@
+"""Solubility of naphthalene and anthracene in ethanol-water mixtures:
+bisection per point against batched secant iterations over whole curves"""
+from datetime import datetime
+import numpy as np
+
+from pytherm import lle
+from pytherm.activity import unifac as uf
+
+names = ["naphthalene", "anthracene", "ethanol", "water"]
+s = uf.SubstancesUNIFAC()
+s.get_from_dict({
+    "naphthalene": "8*ACH 2*AC",
+    "anthracene": "10*ACH 4*AC",
+    "ethanol": "1*CH3 1*CH2 1*OH(P)",
+    "water": "1*H2O",
+})
+am = uf.UNIFAC64(uf.datasets.DOR(), s)
+T_m = np.array([353.4, 489.7])
+H_m = np.array([19000.0, 29400.0])
+
+
+class ActivityAdapter:
+    n_eval = 0
+
+    def get_y(self, system, T):
+        self.n_eval += 1
+        return dict(zip(names, am.get_y([system.get(i, 0.0) for i in names], T)))
+
+
+T = np.linspace(280, 350, 71)
+x_ethanol = np.linspace(0, 1, 51)
+solvents = np.zeros((len(x_ethanol), 4))
+solvents[:, 2] = x_ethanol
+solvents[:, 3] = 1 - x_ethanol
+
+adapter = ActivityAdapter()
+start_time = datetime.now()
+x_bisection = [lle.calculate_solubility(adapter, ["ethanol", "naphthalene"], T_i, T_m[0], H_m[0]) for T_i in T]
+print("calculate_solubility, 71 temperatures in ethanol", datetime.now() - start_time, "get_y calls", adapter.n_eval)
+
+for warm_start in (True, False):
+    start_time = datetime.now()
+    res = lle.get_solubility(am, [0, 1], T, T_m, H_m, solvents, warm_start=warm_start)
+    print(f"get_solubility, 2 solutes x 51 solvents x 71 temperatures, warm_start={warm_start}",
+          datetime.now() - start_time, "get_y_batch calls", res["n_eval"],
+          "mean iterations", res["n_iter"].mean(), "converged", res["converged"].all())
+print("max |ln x - ln x_bisection| in ethanol", np.abs(np.log(res["x"][0, -1] / x_bisection)).max())
@@ -0,0 +1,40 @@
+"""Backends of pytherm.solver on the two-phase split of find_lle and on aqueous complexation"""
+from pytherm import lle, solver
+from pytherm.activity import unifac as uf
+from pytherm.activity.sit import SIT
+from pytherm.systems import ChemicalReaction, EquilibriumSolver, EquilibriumSystem
+
+names = ["hexane", "ethanol", "water"]
+s = uf.SubstancesUNIFAC()
+s.get_from_dict({"hexane": "2*CH3 4*CH2", "ethanol": "1*CH3 1*CH2 1*OH(P)", "water": "1*H2O"})
+am = uf.UNIFAC64(uf.datasets.DOR(), s)
+
+
+class ActivityAdapter:
+    def get_y(self, system, T):
+        return dict(zip(names, am.get_y([system[i] for i in names], T)))
+
+
+chem_sys = EquilibriumSystem(
+    ["Co_+2", "Cl_-1", "Na_+1"],
+    [
+        ChemicalReaction(log10_k=0.570, reaction_str="1*Co_+2 + 1*Cl_-1 = 1*CoCl_+1"),
+        ChemicalReaction(log10_k=0.020, reaction_str="1*Co_+2 + 2*Cl_-1 = 1*CoCl2"),
+        ChemicalReaction(log10_k=-1.710, reaction_str="1*Co_+2 + 3*Cl_-1 = 1*CoCl3_-1"),
+        ChemicalReaction(log10_k=-2.090, reaction_str="1*Co_+2 + 4*Cl_-1 = 1*CoCl4_-2"),
+    ],
+)
+chem_sys.set_concentrations({"Co_+2": 0.1, "Cl_-1": 0.7, "Na_+1": 0.5})
+chem_sys.set_activity_model(SIT(chem_sys.substances))
+
+backends = [solver.Bisection(1e-5, ftol=1e-12), solver.DampedNewton(1e-10), solver.Broyden(1e-10)]
+
+for backend in backends:
+    phase1 = {"hexane": 0.4, "ethanol": 0.05, "water": 0.05}
+    phase2 = {"hexane": 0.05, "ethanol": 0.05, "water": 0.4}
+    _, _, res = lle.find_lle(phase1, phase2, ActivityAdapter(), solver=backend, notifier=None, full_output=True)
+    print("find_lle  ", type(backend).__name__, res)
+
+for backend in backends:
+    res = EquilibriumSolver(chem_sys, solver=backend).equilibrate()
+    print("complexes ", type(backend).__name__, res)
@@ -0,0 +1,50 @@
+"""Spinodal pressures from the analytic dP/dV = 0 and tangent plane stability over the dict PSRK"""
+from datetime import datetime
+from math import log
+import numpy as np
+
+from pytherm import constants, vle
+from pytherm.activity import unifac as uf
+from pytherm.eos import PSRK
+
+names = ["ethanol", "water"]
+s = uf.SubstancesUNIFAC()
+s.get_from_dict({"ethanol": "1*CH3 1*CH2 1*OH", "water": "1*H2O"})
+am = uf.UNIFAC64(uf.datasets.PSRK(), s)
+
+
+class ActivityAdapter:
+    def get_y(self, system, T):
+        return dict(zip(names, am.get_y([system[i] for i in names], T)))
+
+    def get_ge_RT(self, system, T):
+        y = self.get_y(system, T)
+        return sum(system[i] * log(y[i]) for i in names)
+
+    def get_ge(self, system, T):
+        return constants.R * T * self.get_ge_RT(system, T)
+
+
+model = PSRK(
+    {"ethanol": 0.5, "water": 0.5},
+    {"ethanol": {"Tc": 513.9, "Pc": 61.48e5}, "water": {"Tc": 647.3, "Pc": 220.48e5}},
+    {"ethanol": {"c1": 1.2277, "c2": 0.0965, "c3": -0.6736}, "water": {"c1": 1.0783, "c2": -0.5832, "c3": 0.5462}},
+    ActivityAdapter(),
+)
+T = 340.0
+x = np.linspace(0.001, 0.999, 50)
+
+start_time = datetime.now()
+P_s = [vle.is_unstable({"ethanol": x_i, "water": 1 - x_i}, model, T) for x_i in x]
+print("is_unstable, 50 compositions", datetime.now() - start_time)
+
+start_time = datetime.now()
+bubble_curve, dew_curve = vle.fit_Pxy(model, T, points=50)
+print("fit_Pxy, 50 points", datetime.now() - start_time)
+
+system = {"ethanol": 0.3, "water": 0.7}
+P_b, _ = vle.find_xy(model, T, system, abs_err=1e-10)
+for P in (0.9 * P_b, 1.1 * P_b):
+    start_time = datetime.now()
+    stable, tm, w = vle.check_stability(model, system, T, P)
+    print(f"check_stability at {P / P_b:.1f} P_bubble", datetime.now() - start_time, "stable", stable, "tm", tm)
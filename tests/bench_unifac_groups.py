@@ -0,0 +1,48 @@
+"""Residual part scaling with the number of UNIFAC groups (5/15/30 groups, 5 components)"""
+from datetime import datetime
+import numpy as np
+
+from pytherm.activity import unifac as uf
+from pytherm.activity import unifac_numba as uf_numba
+
+n = 100_000
+n_comps = 5
+
+# DOR subgroups with interaction parameters for every pair of main groups
+groups = [
+    'CH3', 'CH2', 'CH', 'C', 'CH2=CH', 'CH=CH', 'CH2=C', 'CH=C', 'C=C', 'ACH',
+    'AC', 'ACCH3', 'ACCH2', 'ACCH', 'OH(P)', 'OH(S)', 'OH(T)', 'CH3OH', 'H2O', 'CH3NH2',
+    'CH2NH2', 'CHNH2', 'CNH2', 'CH3NH', 'CH2NH', 'CHNH', 'CH3N', 'CH2N', 'CONH2', 'CONHCH3',
+]
+
+
+def get_subs(n_groups):
+    subs = {f"comp{i}": [] for i in range(n_comps)}
+    for i in range(n_groups):
+        subs[f"comp{i % n_comps}"].append(f"1*{groups[i]}")
+    return {s: " ".join(subs[s]) for s in subs}
+
+
+params = uf.datasets.DOR()
+conc = np.full((n, n_comps), 1 / n_comps, dtype=np.float32)
+
+for n_groups in (5, 15, 30):
+    subs = get_subs(n_groups)
+
+    s = uf.SubstancesUNIFAC()
+    s.get_from_dict(subs)
+    am = uf.UNIFAC(params, s)
+    am.get_y_batch(conc[:1], 298)
+    start_time = datetime.now()
+    am.get_y_batch(conc, 298)
+    print(f"{n_groups} groups, C++ get_y_batch", datetime.now() - start_time)
+
+    s = uf_numba.datasets.SubstancesUNIFAC()
+    s.get_from_dict(subs)
+    am = uf_numba.UNIFAC(dataset=uf_numba.datasets.DOR, substances=s)
+    x = conc[0].astype(np.float64)
+    am.get_y(x, 298)
+    start_time = datetime.now()
+    for i in range(n // 10):
+        am.get_y(x, 298)
+    print(f"{n_groups} groups, numba get_y, 1/10 of points", datetime.now() - start_time)
@@ -0,0 +1,60 @@
+"""Bubble points: secant vle.find_xy over the dict PSRK vs Newton PSRK_UNIFAC solvers"""
+from datetime import datetime
+from math import log
+import numpy as np
+
+from pytherm import constants, vle
+from pytherm.activity import unifac as uf
+from pytherm.eos import PSRK, PSRK_UNIFAC
+
+names = ["ethanol", "water"]
+s = uf.SubstancesUNIFAC()
+s.get_from_dict({"ethanol": "1*CH3 1*CH2 1*OH", "water": "1*H2O"})
+am = uf.UNIFAC64(uf.datasets.PSRK(), s)
+Tc = [513.9, 647.3]
+Pc = [61.48e5, 220.48e5]
+mc = [[1.2277, 0.0965, -0.6736], [1.0783, -0.5832, 0.5462]]
+T = 340.0
+
+
+class ActivityAdapter:
+    def get_y(self, system, T):
+        return dict(zip(names, am.get_y([system[i] for i in names], T)))
+
+    def get_ge_RT(self, system, T):
+        y = self.get_y(system, T)
+        return sum(system[i] * log(y[i]) for i in names)
+
+    def get_ge(self, system, T):
+        return constants.R * T * self.get_ge_RT(system, T)
+
+
+eos_py = PSRK(
+    {"ethanol": 0.5, "water": 0.5},
+    {i: {"Tc": Tc[k], "Pc": Pc[k]} for k, i in enumerate(names)},
+    {i: dict(zip(("c1", "c2", "c3"), mc[k])) for k, i in enumerate(names)},
+    ActivityAdapter(),
+)
+x = np.linspace(0.001, 0.999, 200)
+x = np.stack((x, 1 - x), axis=1)
+
+start_time = datetime.now()
+P_py = []
+for x_p in x[::10]:
+    P, _ = vle.find_xy(eos_py, T, dict(zip(names, x_p)), abs_err=1e-8)
+    P_py.append(P)
+print("vle.find_xy, 20 points", datetime.now() - start_time)
+
+eos = PSRK_UNIFAC(am, Tc, Pc, mc)
+for warm_start in (False, True):
+    start_time = datetime.now()
+    res = eos.bubble_p(x, T, warm_start=warm_start)
+    print(f"PSRK_UNIFAC.bubble_p, 200 points, warm_start={warm_start}", datetime.now() - start_time,
+          "iterations", res["n_iter"].sum(), "converged", res["converged"].all())
+print("max relative difference", np.max(np.abs(res["P"][::10] / P_py - 1)))
+
+for name, spec in (("dew_p", T), ("bubble_t", 1e5), ("dew_t", 1e5)):
+    start_time = datetime.now()
+    res = getattr(eos, name)(x, spec)
+    print(f"PSRK_UNIFAC.{name}, 200 points", datetime.now() - start_time,
+          "mean iterations", res["n_iter"].mean(), "time per point", res["time"].mean())
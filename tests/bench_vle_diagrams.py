@@ -0,0 +1,46 @@
+"""Pxy isotherms and P-T envelopes of PSRK_UNIFAC: one thread vs all cores, thread pool over systems"""
+from datetime import datetime
+import numpy as np
+
+from pytherm import vle
+from pytherm.activity import unifac as uf
+from pytherm.eos import PSRK_UNIFAC
+
+s = uf.SubstancesUNIFAC()
+s.get_from_dict({"ethanol": "1*CH3 1*CH2 1*OH", "water": "1*H2O"})
+am = uf.UNIFAC64(uf.datasets.PSRK(), s)
+eos = PSRK_UNIFAC(am, [513.9, 647.3], [61.48e5, 220.48e5],
+                  [[1.2277, 0.0965, -0.6736], [1.0783, -0.5832, 0.5462]])
+
+T = np.linspace(300, 400, 1000)
+for n_threads in (1, 0):
+    start_time = datetime.now()
+    res = vle.get_Pxy(eos, T, n_points=101, n_threads=n_threads)
+    print(f"get_Pxy, {len(T)} isotherms x 101 points, n_threads={n_threads}", datetime.now() - start_time,
+          "converged", res["converged"].mean())
+
+z = np.linspace(0.05, 0.95, 100)
+z = np.stack((z, 1 - z), axis=1)
+P = np.geomspace(1e4, 1e7, 100)
+for n_threads in (1, 0):
+    start_time = datetime.now()
+    env = vle.get_envelope(eos, z, P, n_threads=n_threads)
+    print(f"get_envelope, {len(z)} compositions x {len(P)} pressures, n_threads={n_threads}",
+          datetime.now() - start_time)
+
+
+def pxy(T):
+    # every system builds its own model, as for a list of binary pairs
+    model = uf.UNIFAC64(uf.datasets.PSRK(), s)
+    psrk = PSRK_UNIFAC(model, [513.9, 647.3], [61.48e5, 220.48e5],
+                       [[1.2277, 0.0965, -0.6736], [1.0783, -0.5832, 0.5462]])
+    return vle.get_Pxy(psrk, T)["P"]
+
+
+start_time = datetime.now()
+serial = [pxy(T_i) for T_i in T[:200]]
+print("200 systems, serial", datetime.now() - start_time)
+start_time = datetime.now()
+pooled = vle.map_systems(pxy, T[:200])
+print("200 systems, vle.map_systems", datetime.now() - start_time,
+      "identical", all(np.array_equal(a, b) for a, b in zip(serial, pooled)))